@@ -0,0 +1,102 @@
+"""
+HTTP client of API tests
+All requests go through one keep-alive session with connection pool (config.api_client),
+independent requests can be sent concurrently by fetch_all
+Functions in change_listeners are called after every request, which may change data on server
+(all methods except GET and HEAD)
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import config
+
+_session = None
+# functions without arguments, e.g. ref_cache.invalidate_all
+change_listeners = []
+
+
+def get_session():
+    """
+    :return: shared requests.Session, created on first use
+    """
+    global _session
+    if _session is None:
+        _session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=config.api_client["pool_connections"],
+                              pool_maxsize=config.api_client["pool_size"],
+                              max_retries=config.api_client["retries"])
+        _session.mount("http://", adapter)
+        _session.mount("https://", adapter)
+    return _session
+
+
+def close():
+    """
+    Closes pooled connections, next request creates new session
+    """
+    global _session
+    if _session is not None:
+        _session.close()
+        _session = None
+
+
+def request(method, url, **kwargs):
+    kwargs.setdefault("timeout", config.api_client["timeout"])
+    try:
+        return get_session().request(method, url, **kwargs)
+    finally:
+        if method.upper() not in ("GET", "HEAD"):
+            for listener in change_listeners:
+                listener()
+
+
+def get(url, params=None, **kwargs):
+    return request("GET", url, params=params, **kwargs)
+
+
+def post(url, data=None, json=None, **kwargs):
+    return request("POST", url, data=data, json=json, **kwargs)
+
+
+def delete(url, **kwargs):
+    return request("DELETE", url, **kwargs)
+
+
+def _fetch(item):
+    if isinstance(item, str):
+        item = {"url": item}
+    item = dict(item)
+    method = item.pop("method", "GET")
+    try:
+        return request(method, item.pop("url"), **item)
+    except requests.RequestException as e:
+        return e
+
+
+def fetch_all(items, workers=None):
+    """
+    Sends independent requests concurrently
+    :param items: urls or dictionaries with url, optional method and arguments of request
+    :param workers: number of threads, default is config.api_client["workers"]
+    :return: list of responses in order of items, failed request is represented by its exception
+    so that it can be reported in subtest of its item
+    """
+    items = list(items)
+    workers = min(workers or config.api_client["workers"], len(items))
+    if workers <= 1:
+        return [_fetch(item) for item in items]
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(_fetch, items))
+
+
+def check(response):
+    """
+    :param response: item of fetch_all result
+    :return: response, exception of failed request is raised
+    """
+    if isinstance(response, Exception):
+        raise response
+    return response
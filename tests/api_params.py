@@ -0,0 +1,39 @@
+"""
+Values of parameters of API listing tests, shared by test_api and covering_array
+This module doesn't need database, so that sizes of grids can be computed without server
+"""
+from collections import OrderedDict
+
+from fc_test_library import PackageStatus
+
+# /hosts/
+hosts = OrderedDict([
+    ("page", [1, 2]),
+    ("status", ["", "active", "inactive"]),
+    ("order_by", ["", "domain_name", "os_name", "p_model", "time", "status"]),
+    ("descending", [None, False, True]),
+    ("per_page", [0, 10, 25, 50, 100]),
+    ("name", ["", "test", "green rabbit"]),
+])
+
+# /jobs/, empty status is listing without filter
+package_status_list = [s.name for s in PackageStatus]
+packages = OrderedDict([
+    ("page", [1, 2]),
+    ("per_page", [10, 25, 50, 100]),
+    ("status", [""] + package_status_list),
+    ("order_by", ["", "name", "time", "progress", "attack_mode", "status", "weight_of_sun"]),
+    ("descending", [None, False, True]),
+    ("name", ["", "Test", "blue_bear"]),
+    ("attack_mode", ["", "dict", "brute", "biggest"]),
+])
+
+# /jobs/<id>/host
+package_hosts = OrderedDict([
+    ("page", packages["page"]),
+    ("per_page", packages["per_page"]),
+    ("status", ["", "active", "inactive", "something"]),
+    ("order_by", packages["order_by"]),
+    ("descending", packages["descending"]),
+    ("name", packages["name"]),
+])
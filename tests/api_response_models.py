@@ -1,8 +1,84 @@
+import ref_cache
 from database.models import WorkUnit
-from database.service import session, get_mask, get_all_package_masks, get_charset, get_dict, \
-    is_host_active, get_host_by_boinc_host_id, get_user, get_active_boinc_hosts, get_boinc_host
+from database.service import session, get_mask, get_all_package_masks, is_host_active, \
+    get_host_by_boinc_host_id, get_active_boinc_hosts
 from fc_test_library import PackageStatus, HostStatus
-from src.database.models import FcPackage, FcDictionary, FcJob
+from src.database.models import FcPackage, FcDictionary, FcJob, FcHost, FcHostActivity, Host
+
+# maximum number of ids in one IN query
+in_chunk_size = 1000
+
+
+def chunks(ids):
+    ids = list(ids)
+    for i in range(0, len(ids), in_chunk_size):
+        yield ids[i:i + in_chunk_size]
+
+
+class ModelPrefetch:
+    """
+    Related rows of many packages, jobs or hosts loaded by few queries
+    Rows with lookup not expressible as simple IN query are loaded by service function once per
+    distinct key, reference rows (users, charsets, dictionaries) come from ref_cache
+    Host is active when it has any FcHostActivity row, same as is_host_active and status filter
+    of API (TestAPIResponseModels compares batch and single item models)
+    """
+
+    def __init__(self):
+        self.active = set()
+        self.fc_hosts = {}
+        self.users = {}
+        self.boinc_hosts = {}
+        self.package_hosts = {}
+
+    def load_package_hosts(self, package_ids):
+        """
+        Loads active BOINC hosts of packages (batch variant of get_active_boinc_hosts)
+        :return: dictionary package id -> list of hosts ordered by id
+        """
+        missing = set(package_ids) - set(self.package_hosts)
+        for ids in chunks(missing):
+            found = {package_id: {} for package_id in ids}
+            rows = session.query(FcHostActivity.package_id, Host). \
+                join(Host, Host.id == FcHostActivity.boinc_host_id). \
+                filter(FcHostActivity.package_id.in_(ids)).order_by(Host.id)
+            for package_id, host in rows:
+                found[package_id][host.id] = host
+                self.boinc_hosts[host.id] = host
+            for package_id, hosts in found.items():
+                self.package_hosts[package_id] = list(hosts.values())
+        return {package_id: self.package_hosts[package_id] for package_id in package_ids}
+
+    def load_boinc_hosts(self, boinc_host_ids):
+        """
+        Loads BOINC hosts by ids
+        :return: list of hosts in order of boinc_host_ids
+        """
+        missing = set(boinc_host_ids) - set(self.boinc_hosts)
+        for ids in chunks(missing):
+            for host in session.query(Host).filter(Host.id.in_(ids)):
+                self.boinc_hosts[host.id] = host
+        return [self.boinc_hosts.get(i) for i in boinc_host_ids]
+
+    def load_host_details(self, boinc_hosts):
+        """
+        Loads activity, fc_host and user of BOINC hosts
+        """
+        ids = {h.id for h in boinc_hosts} - set(self.fc_hosts)
+        for chunk in chunks(ids):
+            self.active.update(i for (i,) in session.query(FcHostActivity.boinc_host_id).
+                               filter(FcHostActivity.boinc_host_id.in_(chunk)).distinct())
+            found = {}
+            for host in session.query(FcHost).filter(FcHost.boinc_host_id.in_(chunk)):
+                found.setdefault(host.boinc_host_id, []).append(host)
+            for boinc_host_id in chunk:
+                hosts = found.get(boinc_host_id, [])
+                # more fc_hosts for one BOINC host, service function decides which one
+                self.fc_hosts[boinc_host_id] = hosts[0] if len(hosts) == 1 else \
+                    get_host_by_boinc_host_id(boinc_host_id) if hosts else None
+
+        for user_id in {h.userid for h in boinc_hosts} - set(self.users):
+            self.users[user_id] = ref_cache.user(user_id)
 
 
 def charset_model(charset):
@@ -78,7 +154,7 @@ def json_from_mask(mask):
 
 
 def json_from_charset_id(charset_id):
-    charset = get_charset(charset_id)
+    charset = ref_cache.charset(charset_id)
 
     return {
         "id": None if charset is None else charset.id,
@@ -88,7 +164,7 @@ def json_from_charset_id(charset_id):
 
 
 def json_from_dict(dict_id):
-    d = get_dict(dict_id)
+    d = ref_cache.dictionary(dict_id)
 
     return {
         "id": None if d is None else d.id,
@@ -98,9 +174,10 @@ def json_from_dict(dict_id):
     }
 
 
-def package_model(package):
-    hosts = get_active_boinc_hosts(package.id)
-    json_hosts = [db_item_from_boinc_host(h) for h in hosts]
+def package_model(package, prefetch=None, hosts=None):
+    if hosts is None:
+        hosts = get_active_boinc_hosts(package.id)
+    json_hosts = [db_item_from_boinc_host(h, prefetch) for h in hosts]
     return {
         "current_index": str(package.current_index),
         "markov": {
@@ -157,10 +234,15 @@ def package_model(package):
     }
 
 
-def db_item_from_boinc_host(boinc_host):
-    active = is_host_active(boinc_host.id)
-    host = get_host_by_boinc_host_id(boinc_host.id)
-    user = get_user(boinc_host.userid)
+def db_item_from_boinc_host(boinc_host, prefetch=None):
+    if prefetch is None:
+        active = is_host_active(boinc_host.id)
+        host = get_host_by_boinc_host_id(boinc_host.id)
+        user = ref_cache.user(boinc_host.userid)
+    else:
+        active = boinc_host.id in prefetch.active
+        host = prefetch.fc_hosts[boinc_host.id]
+        user = prefetch.users[boinc_host.userid]
     result = {
         'os_name': boinc_host.os_name,
         "active": active,
@@ -226,9 +308,12 @@ def json_from_collection_item(item):
     return json_item
 
 
-def job_model(job):
-    host = get_boinc_host(job.boinc_host_id)
-    json_host = db_item_from_boinc_host(host)
+def job_model(job, prefetch=None):
+    if prefetch is None:
+        host = ref_cache.boinc_host(job.boinc_host_id)
+    else:
+        host = prefetch.boinc_hosts.get(job.boinc_host_id)
+    json_host = db_item_from_boinc_host(host, prefetch)
 
     return {
         "cracking_time": float(job.cracking_time),
@@ -256,3 +341,41 @@ def json_from_status(status):
         'status': PackageStatus(status[0]).name,
         'count': status[1]
     }
+
+
+def db_items_from_boinc_hosts(boinc_hosts, prefetch=None):
+    """
+    Batch variant of db_item_from_boinc_host
+    :param boinc_hosts: list of BOINC hosts
+    :param prefetch: ModelPrefetch shared with other batches
+    :return: list of dictionaries
+    """
+    prefetch = prefetch or ModelPrefetch()
+    prefetch.load_host_details(boinc_hosts)
+    return [db_item_from_boinc_host(h, prefetch) for h in boinc_hosts]
+
+
+def package_models(packages, prefetch=None):
+    """
+    Batch variant of package_model
+    :param packages: list of packages
+    :param prefetch: ModelPrefetch shared with other batches
+    :return: list of dictionaries
+    """
+    prefetch = prefetch or ModelPrefetch()
+    hosts = prefetch.load_package_hosts([p.id for p in packages])
+    prefetch.load_host_details([h for package_hosts in hosts.values() for h in package_hosts])
+    return [package_model(p, prefetch, hosts[p.id]) for p in packages]
+
+
+def job_models(jobs, prefetch=None):
+    """
+    Batch variant of job_model
+    :param jobs: list of jobs
+    :param prefetch: ModelPrefetch shared with other batches
+    :return: list of dictionaries
+    """
+    prefetch = prefetch or ModelPrefetch()
+    boinc_hosts = prefetch.load_boinc_hosts({j.boinc_host_id for j in jobs})
+    prefetch.load_host_details([h for h in boinc_hosts if h is not None])
+    return [job_model(j, prefetch) for j in jobs]
@@ -0,0 +1,206 @@
+#!/usr/bin/python3
+"""
+Measures throughput of assimilator on burst of results
+Stages N workunits with canonical results, jobs and uploaded runner outputs, marks all of them
+ready for assimilation in one transaction and measures drain rate and latency of every result
+
+usage:
+    python3 bench_assimilator.py [-n 1000] [--timeout 600]
+                                 [--mix bench_ok=1 normal_found=1 normal_not_found=1 ...]
+"""
+import argparse
+import os
+import time
+
+from sqlalchemy import inspect
+
+import config
+from bench_utils import print_latency_histogram
+from boinc_dir_hier import stage_files, upload_path
+from database.service import *
+from fc_test_library import make_run_only, restore_daemons, is_running
+from result_xml import get_renderer
+from runner_output_columns import RunnerOutputColumns
+from test_assimilator import TestAssimilator
+
+tested_module = "sample_assimilator"
+# values of workunit.assimilate_state in BOINC
+assimilate_init = 0
+assimilate_ready = 1
+assimilate_done = 2
+
+
+def clone(obj, **values):
+    """
+    :param obj: ORM object used as template
+    :param values: columns, which differ from template
+    :return: new transient ORM object with columns copied from obj (except primary key)
+    """
+    mapper = inspect(obj).mapper
+    primary_keys = {c.key for c in mapper.primary_key}
+    columns = {attr.key: getattr(obj, attr.key) for attr in mapper.column_attrs
+               if attr.key not in primary_keys}
+    columns.update(values)
+    return mapper.class_(**columns)
+
+
+def parse_mix(items):
+    """
+    :param items: list of strings output=weight, output is key of config.in_files["assimilator"]
+    :return: list of output names, every name repeated weight times
+    """
+    mix = []
+    for item in items:
+        name, _, weight = item.partition("=")
+        if name not in config.in_files["assimilator"]:
+            raise ValueError("unknown runner output: " + name)
+        mix += [name] * int(weight or 1)
+    return mix
+
+
+def stage(package_id, count, mix):
+    """
+    Creates workunits, canonical results, jobs and uploads runner outputs, nothing is ready yet
+    :param package_id: id of package of jobs
+    :param count: number of workunits
+    :param mix: list of output names, see parse_mix
+    :return: tuple (dictionary workunit id -> output name, list of uploaded filenames)
+    """
+    template_wu = add_workunit()
+    template_result = add_result(template_wu.id)
+    template_job = add_job(package_id, template_wu.id)
+
+    outputs = [mix[i % len(mix)] for i in range(count)]
+    filenames = stage_files([(config.in_files["assimilator"][output],
+                              "bench_{}_{}".format(i, output))
+                             for i, output in enumerate(outputs)], link=True)
+
+    docs_in = get_renderer().render_many(filenames)
+
+    staged = {}
+    for i, (output, doc_in) in enumerate(zip(outputs, docs_in)):
+        wu = clone(template_wu, name="{}_bench_{}".format(template_wu.name, i),
+                   assimilate_state=assimilate_init)
+        session.add(wu)
+        session.flush()
+        result = clone(template_result, name="{}_bench_{}".format(template_result.name, i),
+                       workunitid=wu.id, xml_doc_in=doc_in)
+        session.add(result)
+        session.flush()
+        wu.canonical_resultid = result.id
+        session.add(clone(template_job, workunit_id=wu.id))
+        staged[wu.id] = output
+
+    session.commit()
+    return staged, filenames
+
+
+def output_name(path):
+    """
+    :return: name of runner output from name of staged file (bench_<i>_<output>)
+    """
+    return os.path.basename(path).split("_", 2)[2]
+
+
+def print_staged_totals(filenames):
+    """
+    Prints totals of uploaded runner outputs, which assimilator should account for
+    :param filenames: names of files in upload hierarchy
+    """
+    columns = RunnerOutputColumns.from_files([upload_path(f) for f in filenames],
+                                             key=output_name)
+    print("staged cracking time {:.2f}s".format(columns.total_cracking_time()))
+    for output, cracking_time in sorted(columns.cracking_time_by_key().items()):
+        print("    {:<20} {:12.2f}s".format(output, cracking_time))
+    counts, edges = columns.power_distribution()
+    if counts.sum():
+        print("benchmark power {:.0f} - {:.0f}, {} results".format(edges[0], edges[-1],
+                                                                    counts.sum()))
+    for path, message in columns.errors:
+        print("not runner output: {} ({})".format(path, message))
+
+
+def set_all_ready(wu_ids):
+    """
+    Marks all workunits ready for assimilation in one transaction
+    :param wu_ids: ids of workunits
+    :return: time of commit
+    """
+    session.query(WorkUnit).filter(WorkUnit.id.in_(wu_ids)). \
+        update({WorkUnit.assimilate_state: assimilate_ready}, synchronize_session=False)
+    session.commit()
+    return time.perf_counter()
+
+
+def drain(wu_ids, timeout, interval=0.05):
+    """
+    Polls state of workunits till all are assimilated
+    :param wu_ids: ids of workunits
+    :param timeout: maximum waiting time in seconds
+    :param interval: seconds between polls
+    :return: dictionary workunit id -> time when workunit was seen assimilated
+    """
+    pending = set(wu_ids)
+    done = {}
+    end = time.perf_counter() + timeout
+    while pending and time.perf_counter() < end:
+        time.sleep(interval)
+        session.expire_all()
+        rows = session.query(WorkUnit.id).filter(WorkUnit.id.in_(pending)). \
+            filter(WorkUnit.assimilate_state == assimilate_done).all()
+        now = time.perf_counter()
+        for (wu_id,) in rows:
+            done[wu_id] = now
+            pending.discard(wu_id)
+        session.commit()
+
+    return done
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput of assimilator")
+    parser.add_argument("-n", type=int, default=1000, help="number of results")
+    parser.add_argument("--timeout", type=float, default=600,
+                        help="maximum time for assimilation of all results in seconds")
+    parser.add_argument("--mix", nargs="+",
+                        default=["bench_ok", "bench_error", "normal_found", "normal_not_found",
+                                 "normal_hc_error"],
+                        help="runner outputs with weights, for example normal_not_found=8")
+    args = parser.parse_args()
+
+    mix = parse_mix(args.mix)
+    make_run_only(tested_module)
+    set_delete_finished_jobs_setting(0)
+    TestAssimilator.delete_all()
+    package_id = add_package().id
+    try:
+        start = time.perf_counter()
+        staged, filenames = stage(package_id, args.n, mix)
+        print("staged {} results in {:.2f}s".format(len(staged), time.perf_counter() - start))
+        print_staged_totals(filenames)
+
+        ready = set_all_ready(list(staged.keys()))
+        done = drain(staged.keys(), args.timeout)
+
+        if done:
+            elapsed = max(done.values()) - ready
+            print("assimilated {}/{} results in {:.2f}s, {:.1f} results/s".format(
+                len(done), len(staged), elapsed, len(done) / elapsed))
+        else:
+            print("no result assimilated in {}s".format(args.timeout))
+
+        print_latency_histogram("all", [t - ready for t in done.values()])
+        for output in sorted(set(mix)):
+            print_latency_histogram(output, [t - ready for wu_id, t in done.items()
+                                             if staged[wu_id] == output])
+
+        if not is_running(tested_module):
+            print(tested_module + " not running anymore")
+    finally:
+        TestAssimilator.delete_all()
+        delete_package(package_id)
+        restore_daemons()
+
+
+if __name__ == '__main__':
+    main()
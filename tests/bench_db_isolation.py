@@ -0,0 +1,73 @@
+#!/usr/bin/python3
+"""
+Compares cleaning of database after test: delete-based teardown, savepoint rollback and
+snapshot restore of shadow tables (isolation is measured with its start before test)
+
+usage:
+    python3 bench_db_isolation.py [-n 10] [--packages 10] [--hosts 10] [--jobs 10]
+"""
+import argparse
+import time
+
+from bench_utils import print_latency_report
+from database.service import *
+from db_isolation import SavepointIsolation, SnapshotIsolation
+from db_teardown import delete_generator_data
+
+
+def populate(packages, hosts, jobs):
+    """
+    Creates data like generator tests
+    :param packages: number of packages
+    :param hosts: number of hosts of every package
+    :param jobs: number of jobs of every package
+    """
+    for _ in range(packages):
+        package = add_package()
+        add_host(package.id, count=hosts)
+        add_job(package.id, 0, count=jobs)
+
+
+def measure_delete(count, args):
+    samples = []
+    for _ in range(count):
+        populate(args.packages, args.hosts, args.jobs)
+        start = time.perf_counter()
+        delete_generator_data()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def measure_isolation(isolation, count, args):
+    samples = []
+    try:
+        for _ in range(count):
+            # both are paid by every test, data made by test are not measured
+            start = time.perf_counter()
+            isolation.start()
+            elapsed = time.perf_counter() - start
+            populate(args.packages, args.hosts, args.jobs)
+            start = time.perf_counter()
+            isolation.restore()
+            samples.append(elapsed + time.perf_counter() - start)
+    finally:
+        isolation.close()
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cleaning of database after test")
+    parser.add_argument("-n", type=int, default=10, help="number of tests")
+    parser.add_argument("--packages", type=int, default=10, help="packages created by test")
+    parser.add_argument("--hosts", type=int, default=10, help="hosts of every package")
+    parser.add_argument("--jobs", type=int, default=10, help="jobs of every package")
+    args = parser.parse_args()
+
+    delete_generator_data()
+    print_latency_report("delete", measure_delete(args.n, args))
+    print_latency_report("savepoint", measure_isolation(SavepointIsolation(), args.n, args))
+    print_latency_report("snapshot", measure_isolation(SnapshotIsolation(), args.n, args))
+
+
+if __name__ == '__main__':
+    main()
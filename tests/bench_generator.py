@@ -0,0 +1,147 @@
+#!/usr/bin/python3
+"""
+Measures how long work generator takes to react
+    start:     package set to running -> first workunit of package exists
+    benchmark: host assigned to package -> benchmark job of host exists
+    finishing: host with done job assigned to package -> package is finishing
+
+usage:
+    python3 bench_generator.py [-n 20] [--timeout 30] [--scenario start benchmark finishing]
+"""
+import argparse
+import sys
+
+import config
+from bench_utils import print_latency_histogram
+from database.service import *
+from fc_test_library import *
+from test_generator import TestGenerator
+from waiting import fresh, wait_until
+
+tested_module = "sample_work_generator"
+
+
+def scenario_start():
+    """
+    :return: function starting measurement, condition ending it
+    """
+    c = FitcrackTLVConfig.create(attack_mode=AttackModes.dictionary, hash_type=0,
+                                 name="bench generator start")
+    package = add_package(status=PackageStatus.ready, attack_mode=AttackModes.dictionary,
+                          dict1=config.in_files["example_dict"]["name"], config_str=str(c))
+    add_host(package.id, status=HostStatus.normal, power=1500000000)
+    assign_host_to_package(boinc_host.id, package.id)
+
+    def start():
+        set_package_status(package.id, PackageStatus.running)
+
+    def done():
+        return session.query(FcJob).filter(FcJob.package_id == package.id). \
+                   filter(FcJob.workunit_id != 0).count() > 0
+
+    return start, done
+
+
+def scenario_benchmark():
+    """
+    :return: function starting measurement, condition ending it
+    """
+    package = add_package(status=PackageStatus.running)
+
+    def start():
+        assign_host_to_package(boinc_host.id, package.id)
+
+    def done():
+        return session.query(FcJob).filter(FcJob.package_id == package.id).count() > 0
+
+    return start, done
+
+
+def scenario_finishing():
+    """
+    :return: function starting measurement, condition ending it
+    """
+    c = FitcrackTLVConfig.create(attack_mode=AttackModes.dictionary, hash_type=0,
+                                 name="bench generator finishing")
+    package = add_package(status=PackageStatus.running, attack_mode=AttackModes.dictionary,
+                          dict1=config.in_files["example_dict"]["name"], config_str=str(c))
+    add_host(package.id, status=HostStatus.normal, power=42)
+
+    def start():
+        # same order as test_set_job_fin, host assigned before the job exists would get new job
+        # planned by generator and package would stay running
+        add_job(package.id, hc_keyspace=0)
+        assign_host_to_package(boinc_host.id, package.id)
+
+    def done():
+        return get_package(package.id).status == PackageStatus.finishing.value
+
+    return start, done
+
+
+scenarios = {
+    "start": scenario_start,
+    "benchmark": scenario_benchmark,
+    "finishing": scenario_finishing,
+}
+
+
+def measure(scenario, count, timeout):
+    """
+    :param scenario: function preparing database, see scenario_*
+    :param count: number of runs
+    :param timeout: maximum reaction time in seconds
+    :return: list of latencies of successful runs in seconds, number of timed out runs
+    """
+    samples = []
+    timeouts = 0
+    for _ in range(count):
+        TestGenerator.delete_all()
+        start, done = scenario()
+
+        start()
+        result = wait_until(fresh(done), timeout=timeout, max_delay=0.05)
+        if result:
+            samples.append(result.elapsed)
+        else:
+            timeouts += 1
+
+    TestGenerator.delete_all()
+    return samples, timeouts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latency of work generator")
+    parser.add_argument("-n", type=int, default=20, help="number of runs of every scenario")
+    parser.add_argument("--timeout", type=float, default=30,
+                        help="maximum reaction time in seconds")
+    parser.add_argument("--scenario", nargs="+", choices=scenarios.keys(),
+                        default=list(scenarios.keys()))
+    args = parser.parse_args()
+
+    ensure_example_dict()
+    make_run_only(tested_module)
+    failed = []
+    try:
+        for name in args.scenario:
+            samples, timeouts = measure(scenarios[name], args.n, args.timeout)
+            if timeouts:
+                failed.append(name)
+                print("{}: FAILED, {} of {} runs timed out after {}s, latencies of other runs "
+                      "follow".format(name, timeouts, args.n, args.timeout))
+            if samples:
+                print_latency_histogram(name, samples)
+            if not is_running(tested_module):
+                failed.append(tested_module)
+                print(tested_module + " not running anymore")
+                break
+    finally:
+        restore_daemons()
+
+    if failed:
+        print("failed: " + ", ".join(failed))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/python3
+"""
+Compares latency of one hashcat invocation between cold hashcat mock (new interpreter with all
+imports) and warm preloaded mock (hashcat_mock_server.py called through hashcat_mock_shim.py)
+
+usage:
+    python3 bench_hashcat_mock.py [-n 1000] [hashcat arguments]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+import config
+from bench_utils import print_latency_report
+
+tests_dir = os.path.dirname(os.path.realpath(__file__))
+mock = os.path.join(tests_dir, "hashcat_mock.py")
+shim = os.path.join(tests_dir, "hashcat_mock_shim.py")
+server = os.path.join(tests_dir, "hashcat_mock_server.py")
+
+
+def measure(command, count):
+    """
+    Runs command count times
+    :param command: list with command and arguments
+    :param count: number of invocations
+    :return: list of latencies in seconds
+    """
+    samples = []
+    for _ in range(count):
+        start = time.perf_counter()
+        subprocess.call(command, stdout=subprocess.DEVNULL)
+        samples.append(time.perf_counter() - start)
+
+    return samples
+
+
+def start_server(socket_path, timeout=10):
+    """
+    Starts hashcat mock server and waits for its socket
+    :param socket_path: path to unix socket
+    :param timeout: seconds
+    :return: Popen object of server
+    """
+    if os.path.exists(socket_path):
+        os.remove(socket_path)
+
+    process = subprocess.Popen([sys.executable, server, "--socket", socket_path])
+    while not os.path.exists(socket_path):
+        if timeout <= 0:
+            process.kill()
+            raise TimeoutError("hashcat mock server did not start")
+        time.sleep(0.05)
+        timeout -= 0.05
+
+    return process
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold vs warm hashcat mock latency")
+    parser.add_argument("-n", type=int, default=1000, help="number of invocations")
+    args, hashcat_args = parser.parse_known_args()
+    if len(hashcat_args) == 0:
+        hashcat_args = ["-b", "-m", "0", "--force", "--machine-readable"]
+
+    cold = measure([sys.executable, mock] + hashcat_args, args.n)
+    print_latency_report("cold", cold)
+
+    process = start_server(config.runner["mock_socket"])
+    try:
+        warm = measure([sys.executable, "-S", shim] + hashcat_args, args.n)
+    finally:
+        process.terminate()
+        process.wait()
+    print_latency_report("warm", warm)
+
+    print("speedup: {:.1f}x".format(sum(cold) / sum(warm)))
+
+
+if __name__ == '__main__':
+    main()
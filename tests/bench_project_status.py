@@ -0,0 +1,66 @@
+#!/usr/bin/python3
+"""
+Compares latency of project status probe with calling BOINC utility bin/status
+
+usage:
+    python3 bench_project_status.py [-n 100] [--fake]
+    --fake uses fake project home directory in temporary directory (no BOINC server needed)
+"""
+import argparse
+import tempfile
+import time
+
+import config
+from bench_utils import print_latency_report
+from fake_project import create_fake_project
+from fc_test_library import ProjectStatus, get_project_status, invalidate_project_status, \
+    is_project_running_bin_status
+
+
+def measure(function, count):
+    """
+    :param function: measured function without arguments
+    :param count: number of calls
+    :return: list of latencies in seconds
+    """
+    samples = []
+    for _ in range(count):
+        start = time.perf_counter()
+        function()
+        samples.append(time.perf_counter() - start)
+
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Project status probe vs bin/status")
+    parser.add_argument("-n", type=int, default=100, help="number of calls")
+    parser.add_argument("--fake", action="store_true", help="use fake project home")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.fake:
+            home = create_fake_project(tmp)
+        else:
+            home = config.project["home"]
+
+        bin_status = is_project_running_bin_status(home)
+        probe = ProjectStatus(home).enabled
+        print("bin/status:", bin_status, "probe:", probe)
+        if bin_status != probe:
+            print("WARNING: probe does not agree with bin/status")
+
+        print_latency_report("bin/status", measure(lambda: is_project_running_bin_status(home),
+                                                   args.n))
+
+        def uncached():
+            invalidate_project_status()
+            return get_project_status(home).enabled
+
+        print_latency_report("probe", measure(uncached, args.n))
+        print_latency_report("cached probe", measure(lambda: get_project_status(home).enabled,
+                                                     args.n))
+
+
+if __name__ == '__main__':
+    main()
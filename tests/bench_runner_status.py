@@ -0,0 +1,87 @@
+#!/usr/bin/python3
+"""
+Measures CPU cost of runner for parsing one hashcat status line
+Runner is run with hashcat mock in status stream mode, once with stream of one line and once
+with long stream, CPU time of mock generating lines is subtracted
+
+usage:
+    python3 bench_runner_status.py [--lines 100000] [-n 5]
+"""
+import argparse
+import io
+import os
+import resource
+import subprocess
+import time
+
+import config
+from fc_test_library import AttackModes, FitcrackTLVConfig
+from hashcat_status import StatusStream
+
+hash_rate = 1000
+status_timer = 10
+
+
+def children_cpu_time():
+    """
+    :return: user + system CPU time of all terminated children in seconds
+    """
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+def run_runner(lines):
+    """
+    Runs runner with task, which hashcat mock reports with given number of status lines
+    :param lines: number of status lines
+    :return: CPU time of runner and hashcat mock in seconds
+    """
+    hc_keyspace = lines * hash_rate * status_timer
+    conf = FitcrackTLVConfig.create(mode="n", attack_mode=AttackModes.mask, hash_type=0,
+                                    mask="?d?d?d?d", hc_keyspace=hc_keyspace, start_index=0)
+    conf.to_file(config.runner["tlv_config"])
+    with open(config.runner["local.conf"], "w") as f:
+        f.write("--status-stream --hash-rate " + str(hash_rate))
+
+    before = children_cpu_time()
+    subprocess.call(config.runner["path"] + config.runner["bin"], stdout=subprocess.DEVNULL)
+    return children_cpu_time() - before
+
+
+def generation_cpu_time(lines):
+    """
+    :param lines: number of status lines
+    :return: CPU time needed by hashcat mock to generate lines in seconds
+    """
+    stream = StatusStream(0, lines * hash_rate * status_timer, hash_rate, status_timer)
+    start = time.process_time()
+    stream.emit(io.StringIO())
+    return time.process_time() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Runner CPU cost per status line")
+    parser.add_argument("--lines", type=int, default=100000, help="status lines in long stream")
+    parser.add_argument("-n", type=int, default=5, help="number of repetitions")
+    args = parser.parse_args()
+
+    if not os.path.isfile(config.runner["path"] + config.runner["bin"]):
+        print(config.runner["bin"], "needs to be in the same directory as benchmark")
+        exit(1)
+
+    costs = []
+    for _ in range(args.n):
+        short = run_runner(1)
+        long = run_runner(args.lines)
+        generation = generation_cpu_time(args.lines)
+        costs.append((long - short - generation) / (args.lines - 1))
+
+    open(config.runner["local.conf"], "w").close()
+
+    costs.sort()
+    print("runner CPU per status line: median={:.2f}us min={:.2f}us max={:.2f}us".format(
+        costs[len(costs) // 2] * 10 ** 6, costs[0] * 10 ** 6, costs[-1] * 10 ** 6))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,38 @@
+#!/usr/bin/python3
+"""
+Micro-benchmark of encoding and decoding Fitcrack TLV configs
+
+usage:
+    python3 bench_tlv_codec.py [-n 1000000]
+"""
+import argparse
+import time
+
+from fc_test_library import AttackModes, FitcrackTLVConfig
+
+
+def main():
+    parser = argparse.ArgumentParser(description="TLV codec micro-benchmark")
+    parser.add_argument("-n", type=int, default=1000000, help="number of configs")
+    args = parser.parse_args()
+
+    configs = [FitcrackTLVConfig.create(mode="n", attack_mode=AttackModes.mask, hash_type=0,
+                                        name="benchmark", mask="?l?l?l?l?d?d",
+                                        hc_keyspace=456976 + i, start_index=i * 456976)
+               for i in range(args.n)]
+
+    start = time.perf_counter()
+    encoded = [str(c) for c in configs]
+    encode_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for e in encoded:
+        FitcrackTLVConfig.from_string(e)
+    decode_time = time.perf_counter() - start
+
+    print("encode: {:.2f}s ({:.0f} configs/s)".format(encode_time, args.n / encode_time))
+    print("decode: {:.2f}s ({:.0f} configs/s)".format(decode_time, args.n / decode_time))
+
+
+if __name__ == '__main__':
+    main()
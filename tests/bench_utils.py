@@ -0,0 +1,94 @@
+"""
+Helpers for benchmarks, which measure latencies of Fitcrack modules and test helpers
+"""
+import math
+import statistics
+
+
+def percentile(samples, p):
+    """
+    Nearest-rank percentile
+    :param samples: list of numbers
+    :param p: percentile from interval <0, 100>
+    :return: value of percentile or None if there are no samples
+    """
+    if len(samples) == 0:
+        return None
+
+    ordered = sorted(samples)
+    rank = max(1, int(math.ceil(p / 100 * len(ordered))))
+    return ordered[rank - 1]
+
+
+def latency_summary(samples):
+    """
+    :param samples: list of latencies in seconds
+    :return: dictionary with count, min, mean, p50, p95, p99 and max of samples
+    """
+    if len(samples) == 0:
+        return {"count": 0}
+
+    return {
+        "count": len(samples),
+        "min": min(samples),
+        "mean": statistics.mean(samples),
+        "p50": percentile(samples, 50),
+        "p95": percentile(samples, 95),
+        "p99": percentile(samples, 99),
+        "max": max(samples),
+    }
+
+
+def print_latency_report(name, samples):
+    """
+    Prints one line with summary of latencies in milliseconds
+    :param name: name of measured operation
+    :param samples: list of latencies in seconds
+    """
+    summary = latency_summary(samples)
+    if summary["count"] == 0:
+        print(name + ": no samples")
+        return
+
+    print("{}: n={} min={:.2f}ms mean={:.2f}ms p50={:.2f}ms p95={:.2f}ms p99={:.2f}ms "
+          "max={:.2f}ms".format(name, summary["count"], summary["min"] * 1000,
+                                summary["mean"] * 1000, summary["p50"] * 1000,
+                                summary["p95"] * 1000, summary["p99"] * 1000,
+                                summary["max"] * 1000))
+
+
+def latency_histogram(samples, bins=10):
+    """
+    :param samples: list of latencies in seconds
+    :param bins: number of buckets of the same width
+    :return: list of (upper bound of bucket, number of samples in bucket)
+    """
+    if len(samples) == 0:
+        return []
+
+    low = min(samples)
+    width = (max(samples) - low) / bins
+    if width == 0:
+        return [(low, len(samples))]
+
+    counts = [0] * bins
+    for sample in samples:
+        counts[min(int((sample - low) / width), bins - 1)] += 1
+
+    return [(low + (i + 1) * width, count) for i, count in enumerate(counts)]
+
+
+def print_latency_histogram(name, samples, bins=10, width=40):
+    """
+    Prints summary of latencies and text histogram in milliseconds
+    :param name: name of measured operation
+    :param samples: list of latencies in seconds
+    :param bins: number of buckets
+    :param width: length of longest bar
+    """
+    print_latency_report(name, samples)
+    histogram = latency_histogram(samples, bins)
+    highest = max((count for _, count in histogram), default=0)
+    for bound, count in histogram:
+        bar = "#" * math.ceil(count * width / highest) if count else ""
+        print("    <= {:10.2f}ms {:5d} {}".format(bound * 1000, count, bar))
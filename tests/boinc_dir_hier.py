@@ -0,0 +1,132 @@
+"""
+BOINC upload/download directory hierarchy without calling boinc-src/tools/dir_hier_path
+Directory of file is md5(filename)[1:8] as hexadecimal number modulo uldl_dir_fanout
+(see filename_hash and dir_hier_path in BOINC sched/sched_util.cpp)
+"""
+import errno
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from shutil import copy
+from xml.etree import ElementTree
+
+import config
+
+# default value of uldl_dir_fanout in BOINC
+default_fanout = 1024
+
+
+class HierarchyConfig:
+    """
+    Upload and download directories of project and their fanout from config.xml
+    """
+
+    def __init__(self, home):
+        self.upload_dir = os.path.join(home, "upload")
+        self.download_dir = os.path.join(home, "download")
+        self.fanout = default_fanout
+        try:
+            root = ElementTree.parse(os.path.join(home, "config.xml")).getroot()
+        except (OSError, ElementTree.ParseError):
+            return
+
+        self.upload_dir = root.findtext("config/upload_dir") or self.upload_dir
+        self.download_dir = root.findtext("config/download_dir") or self.download_dir
+        fanout = root.findtext("config/uldl_dir_fanout")
+        if fanout:
+            self.fanout = int(fanout)
+
+
+@lru_cache(maxsize=None)
+def get_hierarchy_config(home=None):
+    """
+    :param home: project home directory, default is config.project["home"]
+    :return: cached HierarchyConfig
+    """
+    return HierarchyConfig(home or config.project["home"])
+
+
+def filename_hash(filename, fanout):
+    """
+    :param filename: name of file without path
+    :param fanout: number of directories in hierarchy
+    :return: index of directory
+    """
+    digest = hashlib.md5(filename.encode()).hexdigest()
+    return int(digest[1:8], 16) % fanout
+
+
+@lru_cache(maxsize=65536)
+def dir_hier_path(filename, root, fanout):
+    """
+    :param filename: name of file without path
+    :param root: root of hierarchy (upload or download directory)
+    :param fanout: number of directories in hierarchy, 0 for flat directory
+    :return: path to file in hierarchy
+    """
+    if fanout == 0:
+        return os.path.join(root, filename)
+    return os.path.join(root, "%x" % filename_hash(filename, fanout), filename)
+
+
+def upload_path(filename, home=None):
+    """
+    :param filename: name of file without path
+    :param home: project home directory, default is config.project["home"]
+    :return: path to file in upload hierarchy
+    """
+    hierarchy = get_hierarchy_config(home)
+    return dir_hier_path(filename, hierarchy.upload_dir, hierarchy.fanout)
+
+
+def download_path(filename, home=None):
+    """
+    :param filename: name of file without path
+    :param home: project home directory, default is config.project["home"]
+    :return: path to file in download hierarchy
+    """
+    hierarchy = get_hierarchy_config(home)
+    return dir_hier_path(filename, hierarchy.download_dir, hierarchy.fanout)
+
+
+def stage_file(file_path, filename=None, link=False, home=None):
+    """
+    Copies (or hard links) file to upload hierarchy
+    :param file_path: path to file
+    :param filename: name of file in hierarchy, default is name of file_path
+    :param link: create hard link instead of copy, falls back to copy across file systems
+    :param home: project home directory, default is config.project["home"]
+    :return: filename without path
+    """
+    if filename is None:
+        filename = os.path.basename(file_path)
+    path = upload_path(filename, home)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # existing file could be hard link to source, copying into it would change the source
+    if os.path.lexists(path):
+        os.remove(path)
+
+    if link:
+        try:
+            os.link(file_path, path)
+            return filename
+        except OSError as err:
+            if err.errno not in (errno.EXDEV, errno.EPERM):
+                raise
+
+    copy(file_path, path)
+    return filename
+
+
+def stage_files(files, link=False, home=None, workers=8):
+    """
+    Copies (or hard links) many files to upload hierarchy in parallel
+    :param files: list of (path to file, name of file in hierarchy or None)
+    :param link: create hard links instead of copies
+    :param home: project home directory, default is config.project["home"]
+    :param workers: number of threads
+    :return: list of filenames in the same order as files
+    """
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(lambda f: stage_file(f[0], f[1], link, home), files))
@@ -0,0 +1,251 @@
+#!/usr/bin/python3
+"""
+Bulk loading of test data (fc_package, BOINC host, fc_host, fc_host_activity, workunit, fc_job)
+One row of every table is created by service functions and used as template, other rows are
+copies of template inserted by executemany with explicit ids and values from seeded random
+
+usage:
+    python3 bulk_fixtures.py [--packages 0] [--hosts 100000] [--jobs 100000] [--seed 42]
+                             [--package ID]
+"""
+import argparse
+import random
+import time
+
+from sqlalchemy import func, inspect
+
+from database.models import WorkUnit
+from database.service import session, add_host, add_job, add_package, add_workunit, \
+    ensure_test_package
+from fc_test_library import AttackModes, AttackModesShort, PackageStatus
+from src.database.models import FcHost, FcHostActivity, FcJob, FcPackage, Host
+
+package_names = ["test", "office", "wifi", "archive", "leaked"]
+# statuses not processed by generator
+package_statuses = [PackageStatus.ready, PackageStatus.finished, PackageStatus.exhausted,
+                    PackageStatus.malformed, PackageStatus.timeout]
+host_names = ["test", "green rabbit", "node", "worker", "cracker"]
+os_names = ["Linux", "Microsoft Windows 10", "Darwin"]
+p_models = ["Intel(R) Core(TM) i7-7700K CPU @ 4.20GHz", "AMD Ryzen 7 2700X Eight-Core Processor",
+            "Intel(R) Xeon(R) CPU E5-2680 v4 @ 2.40GHz"]
+
+
+def row_template(obj):
+    """
+    :param obj: ORM object
+    :return: dictionary column name -> value of obj, without primary key
+    """
+    mapper = inspect(obj).mapper
+    table = mapper.local_table
+    row = {}
+    for attr in mapper.column_attrs:
+        column = attr.columns[0]
+        if column.table is table and not column.primary_key:
+            row[column.key] = getattr(obj, attr.key)
+    return row
+
+
+def fill(template, row_id, **values):
+    """
+    :param template: row template, see row_template
+    :param row_id: primary key of new row
+    :param values: values of columns, columns missing in template are skipped
+    :return: new row
+    """
+    row = dict(template, id=row_id)
+    for column, value in values.items():
+        if column in template:
+            row[column] = value
+    return row
+
+
+class BulkLoader:
+    """
+    Inserts coherent rows in bulk, values are deterministic for given seed
+    """
+
+    def __init__(self, seed=42, chunk_size=10000):
+        self.random = random.Random(seed)
+        self.chunk_size = chunk_size
+        self.templates = {}
+
+    @staticmethod
+    def next_id(model):
+        """
+        :return: first free id of table
+        """
+        return (session.query(func.max(inspect(model).primary_key[0])).scalar() or 0) + 1
+
+    def insert(self, model, rows):
+        """
+        Inserts rows by executemany in chunks
+        :param model: ORM model
+        :param rows: list of dictionaries column name -> value
+        :return: number of inserted rows
+        """
+        table = inspect(model).local_table
+        for i in range(0, len(rows), self.chunk_size):
+            session.execute(table.insert(), rows[i:i + self.chunk_size])
+        return len(rows)
+
+    def package_template(self):
+        """
+        :return: template of fc_package
+        """
+        if "package" not in self.templates:
+            self.templates["package"] = row_template(add_package(name="bulk package template"))
+        return self.templates["package"]
+
+    def host_templates(self, package_id):
+        """
+        :return: templates of BOINC host, fc_host and fc_host_activity
+        """
+        if "host" not in self.templates:
+            fc_host = add_host(package_id)
+            boinc_host = session.query(Host).filter(Host.id == fc_host.boinc_host_id).one()
+            activity = session.query(FcHostActivity). \
+                filter(FcHostActivity.boinc_host_id == boinc_host.id).first()
+            activity = row_template(activity) if activity is not None else {"boinc_host_id": None}
+            self.templates["host"] = (row_template(boinc_host), row_template(fc_host), activity)
+        return self.templates["host"]
+
+    def job_templates(self, package_id):
+        """
+        :return: templates of workunit and fc_job
+        """
+        if "job" not in self.templates:
+            wu = add_workunit()
+            job = add_job(package_id, wu.id)
+            self.templates["job"] = (row_template(wu), row_template(job))
+        return self.templates["job"]
+
+    def load_packages(self, count):
+        """
+        Creates packages with various names, statuses and attack modes, which generator ignores
+        :param count: number of packages
+        :return: list of ids of new packages
+        """
+        if count <= 0:
+            return []
+
+        template = self.package_template()
+        package_id = self.next_id(FcPackage)
+
+        rows = []
+        for i in range(count):
+            attack_mode = self.random.choice(list(AttackModes))
+            rows.append(fill(template, package_id + i,
+                             name="{} {}".format(self.random.choice(package_names),
+                                                 package_id + i),
+                             status=self.random.choice(package_statuses).value,
+                             attack_mode=attack_mode.value,
+                             attack=AttackModesShort(attack_mode.value).name))
+
+        self.insert(FcPackage, rows)
+        session.commit()
+        session.expire_all()
+        return [row["id"] for row in rows]
+
+    def load_hosts(self, package_id, count, active_ratio=0.5):
+        """
+        Creates BOINC hosts with fc_host in package, part of them is active (has fc_host_activity)
+        :param package_id: id of package
+        :param count: number of hosts
+        :param active_ratio: probability of host being active
+        :return: list of ids of new fc_host rows
+        """
+        if count <= 0:
+            return []
+
+        boinc_template, fc_template, activity_template = self.host_templates(package_id)
+        boinc_id = self.next_id(Host)
+        fc_id = self.next_id(FcHost)
+        activity_id = self.next_id(FcHostActivity)
+
+        boinc_rows, fc_rows, activity_rows = [], [], []
+        for i in range(count):
+            boinc_rows.append(fill(boinc_template, boinc_id + i,
+                                   domain_name="{} {}".format(self.random.choice(host_names),
+                                                              boinc_id + i),
+                                   os_name=self.random.choice(os_names),
+                                   p_model=self.random.choice(p_models)))
+            fc_rows.append(fill(fc_template, fc_id + i, boinc_host_id=boinc_id + i,
+                                package_id=package_id,
+                                power=self.random.randint(1000000, 10000000000)))
+            if self.random.random() < active_ratio:
+                activity_rows.append(fill(activity_template, activity_id + len(activity_rows),
+                                          boinc_host_id=boinc_id + i, package_id=package_id))
+
+        self.insert(Host, boinc_rows)
+        self.insert(FcHost, fc_rows)
+        self.insert(FcHostActivity, activity_rows)
+        session.commit()
+        session.expire_all()
+        return [row["id"] for row in fc_rows]
+
+    def load_jobs(self, package_id, count, host_ids, max_keyspace=100000):
+        """
+        Creates workunits and jobs following each other in keyspace of package
+        :param package_id: id of package
+        :param count: number of jobs
+        :param host_ids: ids of fc_host rows, jobs are assigned round-robin
+        :param max_keyspace: maximum hc_keyspace of one job
+        :return: list of ids of new jobs
+        """
+        if count <= 0 or not host_ids:
+            return []
+
+        wu_template, job_template = self.job_templates(package_id)
+        hosts = {h.id: h.boinc_host_id for h in
+                 session.query(FcHost.id, FcHost.boinc_host_id).filter(FcHost.id.in_(host_ids))}
+        wu_id = self.next_id(WorkUnit)
+        job_id = self.next_id(FcJob)
+
+        wu_rows, job_rows = [], []
+        start_index = 0
+        for i in range(count):
+            host_id = host_ids[i % len(host_ids)]
+            hc_keyspace = self.random.randint(1, max_keyspace)
+            wu_rows.append(fill(wu_template, wu_id + i,
+                                name="bulk_{}_{}".format(package_id, wu_id + i)))
+            job_rows.append(fill(job_template, job_id + i, package_id=package_id,
+                                 workunit_id=wu_id + i, host_id=host_id,
+                                 boinc_host_id=hosts[host_id], start_index=start_index,
+                                 hc_keyspace=hc_keyspace))
+            start_index += hc_keyspace
+
+        self.insert(WorkUnit, wu_rows)
+        self.insert(FcJob, job_rows)
+        session.commit()
+        session.expire_all()
+        return [row["id"] for row in job_rows]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk loading of test data")
+    parser.add_argument("--packages", type=int, default=0, help="number of packages")
+    parser.add_argument("--hosts", type=int, default=100000, help="number of hosts")
+    parser.add_argument("--jobs", type=int, default=100000, help="number of jobs")
+    parser.add_argument("--seed", type=int, default=42, help="seed of random values")
+    parser.add_argument("--package", type=int, default=None,
+                        help="id of package, default is test package")
+    args = parser.parse_args()
+
+    package_id = args.package or ensure_test_package().id
+    loader = BulkLoader(args.seed)
+
+    start = time.perf_counter()
+    package_ids = loader.load_packages(args.packages)
+    print("{} packages in {:.2f}s".format(len(package_ids), time.perf_counter() - start))
+
+    start = time.perf_counter()
+    host_ids = loader.load_hosts(package_id, args.hosts)
+    print("{} hosts in {:.2f}s".format(len(host_ids), time.perf_counter() - start))
+
+    start = time.perf_counter()
+    job_ids = loader.load_jobs(package_id, args.jobs, host_ids)
+    print("{} jobs in {:.2f}s".format(len(job_ids), time.perf_counter() - start))
+
+
+if __name__ == '__main__':
+    main()
@@ -67,9 +67,12 @@ runner = {
     "bin": "runner217.bin",
     "hashcat": "hashcat64.bin",
     "command_log": "runner_command.txt",
+    "engine_report": "engine_report.json",
     "stderr": "stderr.txt",
     "local.conf": "local.conf",
+    "tlv_config": "config",
     "test_hash": "4ac1b63dca561d274c6055ebf3ed97db",
+    "mock_socket": "/tmp/hashcat_mock.sock",
 }
 
 charsets = {
@@ -89,4 +92,58 @@ dictionaries = {
     }
 }
 
+# isolation of tested server module
+#   mode "freeze" pauses other daemons (SIGSTOP) and resumes them (SIGCONT) after tests
+#   mode "kill" kills other daemons and starts them again with bin/start
+#   restart_cost is duration of bin/start in seconds used in report, None for measured value
+#   measure_restart kills and starts all daemons once before first isolation to measure it
+#   idle_timeout is maximum waiting time in seconds for daemon to finish its pass before it is
+#   paused, paused daemon keeps its database locks, use mode "kill" if tests wait for locks
+#   paused daemons are resumed before bin/start and bin/stop
+isolation = {
+    "mode": "freeze",
+    "restart_cost": None,
+    "measure_restart": False,
+    "idle_timeout": 2.0,
+}
+
 logs_path = project["home"] + "log_fitcrack-dev/"
+
+# SQL statements of tests (query_profiler.py)
+#   enabled profiles every test of classes with QueryBudgetMixin, report prints statements per
+#   helper and slowest statements, budget is maximum number of statements of one test
+query_profiler = {
+    "enabled": False,
+    "report": True,
+    "slowest": 5,
+    "budget": None,
+}
+
+# cache of reference rows in expected models of API tests (ref_cache.py)
+#   maxsize is maximum number of rows of one table, report prints hits and misses after tests
+ref_cache = {
+    "enabled": True,
+    "maxsize": 1024,
+    "report": True,
+}
+
+# HTTP client of API tests (api_client.py)
+#   pool_size is number of kept-alive connections to API server, workers is number of threads
+#   sending independent requests concurrently, timeout is in seconds
+api_client = {
+    "pool_connections": 1,
+    "pool_size": 16,
+    "workers": 16,
+    "retries": 0,
+    "timeout": 60,
+}
+
+# parameter grids of API tests (sweep.py)
+#   mode "exhaustive" tests full Cartesian product, "covering" tests t-wise covering array,
+#   which covers every combination of values of any strength parameters
+#   every sweep test runs once for every mode in modes and prints duration of each run,
+#   sizes of grids of both modes are compared by covering_array.py
+sweep = {
+    "modes": ["covering"],
+    "strength": 2,
+}
@@ -0,0 +1,171 @@
+#!/usr/bin/python3
+"""
+t-wise covering arrays of parameter grids (IPOG: in-parameter-order generation)
+Every combination of values of any t parameters occurs in at least one row, so that faults
+caused by interaction of at most t parameters are found with much smaller number of requests
+than full Cartesian product
+
+usage:
+    python3 covering_array.py [--strength 2]
+"""
+import argparse
+import itertools
+import time
+from collections import OrderedDict
+
+import api_params
+
+
+def uncovered_tuples(sizes, order, i, t):
+    """
+    :return: set of t-tuples ((parameter, value index), ...) with parameter i and t - 1
+    parameters before it in order
+    """
+    tuples = set()
+    for others in itertools.combinations(order[:i], t - 1):
+        for values in itertools.product(*(range(sizes[p]) for p in others)):
+            for value in range(sizes[order[i]]):
+                tuples.add(tuple(zip(others, values)) + ((order[i], value),))
+    return tuples
+
+
+def covered_by(row, p, value, order, i, t):
+    """
+    :return: t-tuples covered by row, if value of parameter p is set
+    """
+    for others in itertools.combinations(order[:i], t - 1):
+        if all(row[o] is not None for o in others):
+            yield tuple((o, row[o]) for o in others) + ((p, value),)
+
+
+def covering_indexes(sizes, t=2):
+    """
+    :param sizes: number of values of every parameter
+    :param t: strength of covering array
+    :return: list of rows, row is list of value indexes in order of parameters
+    """
+    n = len(sizes)
+    if n == 0:
+        # same as Cartesian product, one empty combination
+        return [[]]
+    if 0 in sizes:
+        return []
+    if t >= n:
+        return [list(row) for row in itertools.product(*(range(s) for s in sizes))]
+
+    # parameters with most values first, it makes array smaller
+    order = sorted(range(n), key=lambda p: sizes[p], reverse=True)
+    rows = []
+    for values in itertools.product(*(range(sizes[p]) for p in order[:t])):
+        row = [None] * n
+        for p, value in zip(order[:t], values):
+            row[p] = value
+        rows.append(row)
+
+    for i in range(t, n):
+        p = order[i]
+        uncovered = uncovered_tuples(sizes, order, i, t)
+
+        # horizontal growth: value of new parameter covering most uncovered tuples
+        for row in rows:
+            best, best_tuples = 0, []
+            for value in range(sizes[p]):
+                tuples = [c for c in covered_by(row, p, value, order, i, t) if c in uncovered]
+                if len(tuples) > len(best_tuples):
+                    best, best_tuples = value, tuples
+            row[p] = best
+            uncovered.difference_update(best_tuples)
+
+        # vertical growth: rows with free parameters are reused, otherwise new row is added
+        for missing in sorted(uncovered):
+            if missing not in uncovered:
+                continue
+            for row in rows:
+                if all(row[q] is None or row[q] == value for q, value in missing):
+                    break
+            else:
+                row = [None] * n
+                rows.append(row)
+            for q, value in missing:
+                row[q] = value
+            uncovered.difference_update(covered_by(row, p, row[p], order, i, t))
+
+    # don't care values
+    for k, row in enumerate(rows):
+        for p in range(n):
+            if row[p] is None:
+                row[p] = k % sizes[p]
+    return rows
+
+
+def covering_array(t=2, **params):
+    """
+    :param t: strength, every combination of values of t parameters is covered
+    :param params: name of parameter -> list of values
+    :return: list of dictionaries name -> value
+    """
+    names = list(params)
+    values = [list(v) for v in params.values()]
+    rows = covering_indexes([len(v) for v in values], t)
+    return [OrderedDict((name, values[p][row[p]]) for p, name in enumerate(names))
+            for row in rows]
+
+
+def is_covering(combinations, t=2, **params):
+    """
+    :return: True if combinations cover every t-tuple of parameter values, repeated values of
+    parameter are one value
+    """
+    if not grid_size(**params):
+        # parameter without values, grid has no combinations
+        return True
+    names = list(params)
+    for chosen in itertools.combinations(names, min(t, len(names))):
+        needed = set(itertools.product(*(params[name] for name in chosen)))
+        for combination in combinations:
+            needed.discard(tuple(combination[name] for name in chosen))
+        if needed:
+            return False
+    return True
+
+
+def grid_size(**params):
+    size = 1
+    for values in params.values():
+        size *= len(values)
+    return size
+
+
+def reduction_report(title, params, strengths=(1, 2, 3)):
+    """
+    :param title: name of grid in report
+    :param params: dictionary name of parameter -> list of values
+    :param strengths: strengths of compared covering arrays
+    :return: string with number of combinations and generation time of exhaustive grid and
+    covering arrays of given strengths
+    """
+    full = grid_size(**params)
+    lines = ["{}: exhaustive {} combinations".format(title, full)]
+    for t in strengths:
+        start = time.perf_counter()
+        rows = covering_array(t, **params)
+        duration = time.perf_counter() - start
+        lines.append("    {}-wise {:>6} combinations {:6.1%} of grid {:8.3f}s".format(
+            t, len(rows), len(rows) / full, duration))
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sizes of covering arrays of API test grids")
+    parser.add_argument("--strength", type=int, nargs="+", default=[1, 2, 3],
+                        help="strengths of covering arrays")
+    args = parser.parse_args()
+
+    grids = OrderedDict([("hosts", api_params.hosts), ("packages", api_params.packages),
+                         ("package hosts", api_params.package_hosts)])
+    for name, params in grids.items():
+        print(reduction_report(name, params, args.strength))
+
+
+if __name__ == '__main__':
+    main()
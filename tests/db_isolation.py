@@ -0,0 +1,203 @@
+"""
+Per-test database isolation by snapshot and rollback instead of deleting rows
+    savepoint: test runs inside SAVEPOINT, which is rolled back after test; changes are visible
+               only to session of tests, not to daemons or API server
+    snapshot:  tables are copied to shadow tables (<table>_snapshot) before first test, later
+               only tables changed since last restore are copied again; after test only tables
+               which checksum changed are copied back; works with daemons and API server,
+               because data are committed
+"""
+import time
+
+from sqlalchemy import event, inspect, text
+
+from database.models import Result, WorkUnit
+from database.service import session
+from src.database.models import FcHashcache, FcHost, FcHostActivity, FcJob, FcPackage, \
+    FcPackageGraph
+
+# tables changed by server modules and tests
+default_models = (FcPackage, FcHost, FcHostActivity, FcJob, FcPackageGraph, FcHashcache,
+                  WorkUnit, Result)
+snapshot_suffix = "_snapshot"
+
+
+def table_name(model):
+    return inspect(model).local_table.name
+
+
+class SavepointIsolation:
+    """
+    Rolls back everything done through session since start
+    Session is bound to connection with outer transaction, commits of service functions only
+    release savepoint, which is started again; outer transaction is rolled back after test
+    """
+
+    def __init__(self):
+        self.engine = None
+        self.connection = None
+        self.transaction = None
+
+    def restart_savepoint(self, sess, transaction):
+        # SQLAlchemy < 2.0 doesn't support join_transaction_mode, savepoint is restarted
+        parent = transaction.parent if hasattr(transaction, "parent") else transaction._parent
+        if transaction.nested and parent is not None and not parent.nested:
+            sess.expire_all()
+            sess.begin_nested()
+
+    def start(self):
+        session.commit()
+        session.close()
+        self.engine = session.get_bind()
+        self.connection = self.engine.connect()
+        self.transaction = self.connection.begin()
+        session.bind = self.connection
+        if hasattr(session, "join_transaction_mode"):
+            session.join_transaction_mode = "create_savepoint"
+        else:
+            session.begin_nested()
+            event.listen(session, "after_transaction_end", self.restart_savepoint)
+
+    def restore(self):
+        """
+        :return: list of restored tables (all tables for savepoint)
+        """
+        if not hasattr(session, "join_transaction_mode"):
+            event.remove(session, "after_transaction_end", self.restart_savepoint)
+        session.close()
+        self.transaction.rollback()
+        self.connection.close()
+        session.bind = self.engine
+        if hasattr(session, "join_transaction_mode"):
+            session.join_transaction_mode = "conservative_savepoint"
+        return ["*"]
+
+    def close(self):
+        pass
+
+
+class SnapshotIsolation:
+    """
+    Copies tables to shadow tables and restores them after test
+    """
+
+    def __init__(self, models=default_models):
+        self.tables = [table_name(model) for model in models]
+        self.checksums = {}
+        self.created = False
+
+    def execute(self, statement):
+        return session.execute(text(statement))
+
+    def checksum(self):
+        rows = self.execute("CHECKSUM TABLE " + ", ".join(self.tables)).fetchall()
+        # result contains database.table names
+        return {name.split(".")[-1]: value for name, value in rows}
+
+    def start(self):
+        session.commit()
+        if not self.created:
+            for table in self.tables:
+                snapshot = table + snapshot_suffix
+                self.execute("DROP TABLE IF EXISTS " + snapshot)
+                self.execute("CREATE TABLE {} LIKE {}".format(snapshot, table))
+            current = {}
+        else:
+            current = self.checksum()
+
+        # after restore shadow tables are equal to tables, only tables changed outside of
+        # isolated tests need new copy
+        for table in self.tables:
+            if table not in current or current[table] != self.checksums[table]:
+                snapshot = table + snapshot_suffix
+                self.execute("DELETE FROM " + snapshot)
+                self.execute("INSERT INTO {} SELECT * FROM {}".format(snapshot, table))
+
+        self.created = True
+        self.checksums = self.checksum()
+        session.commit()
+
+    def restore(self):
+        """
+        :return: list of restored tables
+        """
+        session.rollback()
+        current = self.checksum()
+        session.commit()
+        changed = [table for table in self.tables if current[table] != self.checksums[table]]
+        if changed:
+            # FOREIGN_KEY_CHECKS is variable of connection, own connection makes sure it is set
+            # back on the connection, which changed it, before it returns to pool
+            with session.get_bind().connect() as connection:
+                transaction = connection.begin()
+                connection.execute(text("SET FOREIGN_KEY_CHECKS=0"))
+                try:
+                    for table in changed:
+                        connection.execute(text("DELETE FROM " + table))
+                        connection.execute(text("INSERT INTO {} SELECT * FROM {}".format(
+                            table, table + snapshot_suffix)))
+                    connection.execute(text("SET FOREIGN_KEY_CHECKS=1"))
+                    transaction.commit()
+                except Exception:
+                    transaction.rollback()
+                    connection.execute(text("SET FOREIGN_KEY_CHECKS=1"))
+                    raise
+
+        session.expire_all()
+        return changed
+
+    def close(self):
+        """
+        Drops shadow tables
+        """
+        if self.created:
+            for table in self.tables:
+                self.execute("DROP TABLE IF EXISTS " + table + snapshot_suffix)
+            session.commit()
+            self.created = False
+
+
+def create_isolation(mode, models=default_models):
+    """
+    :param mode: "savepoint" or "snapshot"
+    :param models: models of tables saved by snapshot
+    :return: SavepointIsolation or SnapshotIsolation
+    """
+    if mode == "savepoint":
+        return SavepointIsolation()
+    if mode == "snapshot":
+        return SnapshotIsolation(models)
+    raise ValueError("unknown isolation mode: " + str(mode))
+
+
+class IsolatedTestMixin:
+    """
+    Mixin for unittest.TestCase (class Test(IsolatedTestMixin, unittest.TestCase)), database is
+    restored after every test
+    Class attributes isolation_mode and isolated_models configure isolation
+    """
+    isolation_mode = "snapshot"
+    isolated_models = default_models
+    isolation = None
+    restore_times = []
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.isolation = create_isolation(cls.isolation_mode, cls.isolated_models)
+        cls.restore_times = []
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.isolation.close()
+        super().tearDownClass()
+
+    def setUp(self):
+        super().setUp()
+        self.isolation.start()
+
+    def tearDown(self):
+        start = time.perf_counter()
+        self.isolation.restore()
+        self.restore_times.append(time.perf_counter() - start)
+        super().tearDown()
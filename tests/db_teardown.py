@@ -0,0 +1,126 @@
+"""
+Fast cleaning of database after tests
+Rows are deleted by set-based DELETE (or TRUNCATE) statements in foreign-key order, without
+loading ORM objects
+"""
+import time
+
+from sqlalchemy import func, inspect, text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.schema import sort_tables
+
+from database.models import Result, WorkUnit
+from database.service import session
+from src.database.models import FcHashcache, FcHost, FcHostActivity, FcJob, FcPackage, \
+    FcPackageGraph
+
+
+class TeardownReport:
+    """
+    Number of deleted rows and duration for every table
+    """
+
+    def __init__(self):
+        self.tables = []
+
+    def add(self, table, rows, duration, method):
+        self.tables.append((table, rows, duration, method))
+
+    @property
+    def rows(self):
+        return sum(rows for _, rows, _, _ in self.tables)
+
+    @property
+    def duration(self):
+        return sum(duration for _, _, duration, _ in self.tables)
+
+    def __str__(self):
+        lines = ["teardown: {} rows in {:.3f}s".format(self.rows, self.duration)]
+        for table, rows, duration, method in self.tables:
+            lines.append("    {:<24} {:>8} rows {:8.3f}s {}".format(table, rows, duration, method))
+        return "\n".join(lines)
+
+
+def fk_order(steps):
+    """
+    :param steps: list of (model, criterion)
+    :return: steps ordered so that referencing tables are before referenced ones, steps
+    without foreign keys between them keep their order
+    """
+    by_table = {}
+    for model, criterion in steps:
+        by_table.setdefault(inspect(model).local_table, []).append((model, criterion))
+
+    # sort_tables puts referenced tables first, input is reversed to keep order after reversing
+    tables = sort_tables(list(reversed(list(by_table.keys()))))
+    return [step for table in reversed(tables) for step in by_table[table]]
+
+
+def is_referenced(table, tables):
+    """
+    :return: True if some of known tables has foreign key to table
+    """
+    return any(fk.column.table is table for other in tables for fk in other.foreign_keys)
+
+
+def truncate(table):
+    """
+    Truncates table, truncate commits transaction implicitly
+    :return: number of rows before truncation
+    """
+    rows = session.query(func.count()).select_from(table).scalar()
+    session.execute(text("TRUNCATE TABLE " + table.name))
+    session.commit()
+    return rows
+
+
+def delete_rows(*steps, allow_truncate=False):
+    """
+    Deletes rows from tables in foreign-key order and commits
+    :param steps: models or tuples (model, criterion), only rows matching criterion are deleted
+    :param allow_truncate: use TRUNCATE for whole tables, which are not referenced by other
+    known tables, DELETE is used when truncation fails
+    :return: TeardownReport
+    """
+    steps = [step if isinstance(step, tuple) else (step, None) for step in steps]
+    steps = fk_order(steps)
+    known_tables = [inspect(model).local_table for model, _ in steps]
+
+    report = TeardownReport()
+    for model, criterion in steps:
+        table = inspect(model).local_table
+        start = time.perf_counter()
+        if allow_truncate and criterion is None and not is_referenced(table, known_tables):
+            try:
+                rows = truncate(table)
+                report.add(table.name, rows, time.perf_counter() - start, "truncate")
+                continue
+            except SQLAlchemyError:
+                session.rollback()
+
+        query = session.query(model)
+        if criterion is not None:
+            query = query.filter(criterion)
+        rows = query.delete(synchronize_session=False)
+        report.add(table.name, rows, time.perf_counter() - start, "delete")
+
+    session.commit()
+    session.expire_all()
+    return report
+
+
+def delete_generator_data():
+    """
+    Deletes everything created by generator tests, package 1 (benchmark of all hosts) stays
+    :return: TeardownReport
+    """
+    return delete_rows(FcPackageGraph, FcJob, FcHostActivity, FcHost,
+                       (FcPackage, FcPackage.id != 1))
+
+
+def delete_assimilator_data():
+    """
+    Deletes workunits, results and everything created by assimilator tests
+    :return: TeardownReport
+    """
+    return delete_rows(FcJob, FcHost, FcPackageGraph, FcHashcache, Result, WorkUnit)
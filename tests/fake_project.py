@@ -0,0 +1,55 @@
+"""
+Fake BOINC project home directory for exercising project status helpers without BOINC server
+bin/start and bin/stop only enable and disable project, bin/status reports it
+"""
+import os
+
+status_script = """#!/bin/sh
+if [ -e "$(dirname "$0")/../stop_daemons" ]; then
+    echo "BOINC is DISABLED"
+else
+    echo "BOINC is ENABLED"
+fi
+"""
+
+start_script = """#!/bin/sh
+rm -f "$(dirname "$0")/../stop_daemons"
+"""
+
+stop_script = """#!/bin/sh
+touch "$(dirname "$0")/../stop_daemons"
+"""
+
+
+def create_fake_project(home, enabled=True):
+    """
+    Creates project home directory with bin/start, bin/stop and bin/status scripts
+    :param home: path to project home directory
+    :param enabled: project is enabled (there is no stop_daemons file)
+    :return: path to project home directory with trailing slash
+    """
+    home = os.path.join(os.path.abspath(home), "")
+    os.makedirs(os.path.join(home, "bin"), exist_ok=True)
+    for name, script in (("status", status_script), ("start", start_script),
+                         ("stop", stop_script)):
+        path = os.path.join(home, "bin", name)
+        with open(path, "w") as f:
+            f.write(script)
+        os.chmod(path, 0o755)
+
+    set_fake_project_enabled(home, enabled)
+    return home
+
+
+def set_fake_project_enabled(home, enabled):
+    """
+    Enables or disables fake project same way as bin/start and bin/stop
+    :param home: path to project home directory
+    :param enabled: True for enabled project
+    """
+    stop_daemons = os.path.join(home, "stop_daemons")
+    if enabled:
+        if os.path.exists(stop_daemons):
+            os.remove(stop_daemons)
+    else:
+        open(stop_daemons, "w").close()
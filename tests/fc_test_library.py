@@ -1,6 +1,10 @@
+import atexit
+import mmap
+import os
 import platform
 import re
 import subprocess
+import time
 import unittest
 from decimal import Decimal
 from enum import Enum
@@ -9,6 +13,7 @@ from subprocess import call
 import psutil
 
 import config
+from tlv_codec import config_schema, decode, decode_value, iter_records
 
 unittest.TestLoader.sortTestMethodsUsing = None
 
@@ -67,19 +72,122 @@ def get_subsystem_value_list():
     return [s.value for s in ServerSubsystems]
 
 
+class ProcessSnapshot:
+    """
+    Process table taken by one pass of psutil.process_iter, processes are indexed by name and pid
+    """
+
+    def __init__(self):
+        self.time = time.monotonic()
+        self.by_name = {}
+        self.by_pid = {}
+        for proc in psutil.process_iter(attrs=["name"]):
+            self.by_pid[proc.pid] = proc
+            self.by_name.setdefault(proc.info["name"], []).append(proc)
+
+    @property
+    def age(self):
+        """
+        :return: seconds from taking snapshot
+        """
+        return time.monotonic() - self.time
+
+    def processes(self, name):
+        """
+        :param name: process name
+        :return: list of psutil.Process objects with name
+        """
+        return self.by_name.get(name, [])
+
+    def is_running(self, name):
+        """
+        :param name: process name
+        :return: True if process with name was running when snapshot was taken
+        """
+        return name in self.by_name
+
+
+# snapshot shared by all helpers, it is retaken when it is older than process_snapshot_ttl
+# or after daemons are started, killed or frozen
+process_snapshot_ttl = 0.5
+_process_snapshot = None
+
+
+def get_process_snapshot(max_age=None):
+    """
+    :param max_age: maximum age of shared snapshot in seconds, default is process_snapshot_ttl
+    :return: ProcessSnapshot
+    """
+    global _process_snapshot
+    if max_age is None:
+        max_age = process_snapshot_ttl
+
+    if _process_snapshot is None or _process_snapshot.age > max_age:
+        _process_snapshot = ProcessSnapshot()
+
+    return _process_snapshot
+
+
+def invalidate_process_snapshot():
+    """
+    Forces new snapshot on next call of get_process_snapshot, called after starting or killing
+    processes
+    """
+    global _process_snapshot
+    _process_snapshot = None
+
+
 def make_run_only(tested_module):
     """
     Starts all daemons if project is running, if not starts whole project
-    kills all subsystems except tested  module
+    kills (or freezes, see config.isolation) all subsystems except tested  module
     :param tested_module: string with name of server module
     :return:
     """
-    if is_project_running():
-        start_daemons()
+    freeze = config.isolation["mode"] == "freeze"
+    if freeze and config.isolation["measure_restart"] and not restart_times:
+        measure_restart_cost()
+
+    start = time.perf_counter()
+    if not freeze or not set(get_subsystem_name_list()) <= set(get_running_modules()):
+        if is_project_running():
+            start_daemons()
+        else:
+            start_project()
+
+    if freeze:
+        freeze_all_modules_except(tested_module)
     else:
+        kill_all_modules_except(tested_module)
+
+    isolation_stats.add(time.perf_counter() - start)
+
+
+def measure_restart_cost():
+    """
+    Kills and starts all daemons once, so that time saved by freezing can be reported
+    (opt-in by config.isolation["measure_restart"])
+    Duration is appended to restart_times
+    :return:
+    """
+    if not is_project_running():
         start_project()
+    kill_all_modules_except()
+    start_daemons()
 
-    kill_all_modules_except(tested_module)
+
+def restore_daemons():
+    """
+    Brings all daemons back after tests, frozen daemons are resumed, killed daemons are started
+    :return:
+    """
+    start = time.perf_counter()
+    if config.isolation["mode"] == "freeze":
+        thaw_all_modules()
+    else:
+        start_daemons()
+
+    isolation_stats.add(time.perf_counter() - start)
 
 
 def is_running(module):
@@ -87,11 +195,11 @@ def is_running(module):
     :param module: string with subsystem name
     :return: True if subsystem is running
     """
-    running = get_running_modules()
-    if module in running:
-        return True
+    if not is_project_running():
+        return False
 
-    return False
+    # module may crash within TTL of shared snapshot, only its pids are checked again
+    return any(psutil.pid_exists(proc.pid) for proc in get_process_snapshot().processes(module))
 
 
 def get_running_modules():
@@ -102,19 +210,67 @@ def get_running_modules():
     if not is_project_running():
         return result
 
-    for proc in psutil.process_iter():
-        if proc.name() in get_subsystem_name_list():
-            result.append(proc.name())
+    snapshot = get_process_snapshot()
+    for name in get_subsystem_name_list():
+        result += [name] * len(snapshot.processes(name))
 
     return result
 
 
+class ProjectStatus:
+    """
+    State of BOINC project read directly from project home directory
+    Project is disabled by file stop_daemons (bin/stop), same file is checked by bin/status
+    Running daemons are found by process snapshot, not by pid files
+    """
+
+    def __init__(self, home):
+        self.home = home
+        self.enabled = not os.path.exists(os.path.join(home, "stop_daemons"))
+
+
+# status is cached until project or daemons are started or stopped by helpers
+_project_status = None
+
+
+def get_project_status(home=None):
+    """
+    :param home: project home directory, default is config.project["home"]
+    :return: cached ProjectStatus
+    """
+    global _project_status
+    if home is None:
+        home = config.project["home"]
+
+    if _project_status is None or _project_status.home != home:
+        _project_status = ProjectStatus(home)
+
+    return _project_status
+
+
+def invalidate_project_status():
+    """
+    Forces reading of project status on next call of get_project_status
+    """
+    global _project_status
+    _project_status = None
+
+
 def is_project_running():
+    """
+    Reads state of project from project home directory
+    :return: True if project is running
+    """
+    return get_project_status().enabled
+
+
+def is_project_running_bin_status(home=None):
     """
     Calls boinc utility status and reads output
+    :param home: project home directory, default is config.project["home"]
     :return: True if project is running
     """
-    out = subprocess.check_output("bin/status", cwd=config.project["home"],
+    out = subprocess.check_output("bin/status", cwd=home or config.project["home"],
                                   stderr=subprocess.STDOUT, universal_newlines=True, shell=True,
                                   timeout=15)
     pattern = re.compile("BOINC is ENABLED")
@@ -134,11 +290,131 @@ def kill_all_modules_except(*args):
     for arg in args:
         print(arg)
 
-    for proc in psutil.process_iter():
-        if proc.name() in get_subsystem_name_list():
-            if proc.name() not in args:
-                print("Killing: " + proc.name())
+    snapshot = get_process_snapshot()
+    for name in get_subsystem_name_list():
+        if name in args:
+            continue
+        for proc in snapshot.processes(name):
+            print("Killing: " + name)
+            try:
                 proc.kill()
+            except psutil.NoSuchProcess:
+                pass
+            _frozen_modules.pop(proc.pid, None)
+
+    invalidate_process_snapshot()
+
+
+# daemons paused by freeze_all_modules_except {pid: psutil.Process}
+_frozen_modules = {}
+
+
+def wait_until_idle(proc, timeout):
+    """
+    Waits until process is not on CPU, daemons sleep between passes and they don't hold
+    database transaction while sleeping
+    :param proc: psutil.Process
+    :param timeout: maximum waiting time in seconds
+    :return: True if process is idle
+    """
+    deadline = time.perf_counter() + timeout
+    while proc.status() == psutil.STATUS_RUNNING:
+        if time.perf_counter() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def freeze_all_modules_except(*args):
+    """
+    Pauses (SIGSTOP) all modules except those that were sent as arguments
+    Frozen modules from arguments are resumed
+    Daemon paused inside database transaction would hold its locks until it is resumed, so
+    daemon is paused only when it is idle (see wait_until_idle, config.isolation)
+    :param args: module names
+    :return:
+    """
+    if not _frozen_modules:
+        # daemons should not stay paused when tests are interrupted
+        atexit.register(thaw_all_modules)
+
+    snapshot = get_process_snapshot()
+    for name in get_subsystem_name_list():
+        for proc in snapshot.processes(name):
+            try:
+                if name in args:
+                    if proc.pid in _frozen_modules:
+                        proc.resume()
+                        del _frozen_modules[proc.pid]
+                elif proc.pid not in _frozen_modules:
+                    if not wait_until_idle(proc, config.isolation["idle_timeout"]):
+                        print("Freezing busy module: " + name)
+                    else:
+                        print("Freezing: " + name)
+                    proc.suspend()
+                    _frozen_modules[proc.pid] = proc
+            except psutil.NoSuchProcess:
+                _frozen_modules.pop(proc.pid, None)
+
+    invalidate_process_snapshot()
+
+
+def thaw_all_modules():
+    """
+    Resumes (SIGCONT) all modules paused by freeze_all_modules_except
+    :return:
+    """
+    for pid, proc in list(_frozen_modules.items()):
+        try:
+            proc.resume()
+        except psutil.NoSuchProcess:
+            pass
+        del _frozen_modules[pid]
+
+    invalidate_process_snapshot()
+
+
+class IsolationStats:
+    """
+    Wall-clock time spent by isolating tested module and restoring daemons
+    """
+
+    def __init__(self):
+        self.switches = 0
+        self.seconds = 0.0
+
+    def add(self, seconds):
+        self.switches += 1
+        self.seconds += seconds
+
+    def report(self, name):
+        """
+        Prints time spent by isolation and time saved by freezing compared to restarting
+        daemons, then resets statistics
+        :param name: name of test class
+        """
+        restart_cost = config.isolation["restart_cost"]
+        if restart_cost is None and restart_times:
+            restart_cost = sorted(restart_times)[len(restart_times) // 2]
+
+        line = "{}: isolation {} switches, {:.2f}s".format(name, self.switches, self.seconds)
+        if config.isolation["mode"] == "freeze":
+            if restart_cost is None:
+                line += ", restart cost unknown (set restart_cost or measure_restart in " \
+                        "config.isolation)"
+            else:
+                saved = self.switches * restart_cost - self.seconds
+                line += ", saved {:.2f}s compared to restarting daemons ({:.2f}s per " \
+                        "restart)".format(saved, restart_cost)
+        print(line)
+
+        self.switches = 0
+        self.seconds = 0.0
+
+
+isolation_stats = IsolationStats()
+# measured durations of bin/start -c -v
+restart_times = []
 
 
 def get_server_info():
@@ -154,10 +430,10 @@ def get_server_info():
         "transitioner": False
     }
 
-    for proc in psutil.process_iter():
-        for subsystem in ServerSubsystems:
-            if proc.name() == subsystem.name:
-                server_info[subsystem.value] = True
+    snapshot = get_process_snapshot()
+    for subsystem in ServerSubsystems:
+        if snapshot.is_running(subsystem.name):
+            server_info[subsystem.value] = True
 
     info = {
         "subsystems": server_info,
@@ -176,7 +452,13 @@ def start_daemons():
     :return:
     """
     print("starting daemons and running tasks")
+    # bin/start signals running daemons, paused daemons would not handle it
+    thaw_all_modules()
+    start = time.perf_counter()
     call([config.project["home"] + "bin/start", "-c", "-v"])
+    restart_times.append(time.perf_counter() - start)
+    invalidate_process_snapshot()
+    invalidate_project_status()
 
 
 def start_project():
@@ -185,7 +467,10 @@ def start_project():
     :return:
     """
     print("Starting project")
+    thaw_all_modules()
     call([config.project["home"] + "bin/start"])
+    invalidate_process_snapshot()
+    invalidate_project_status()
 
 
 def stop_project():
@@ -194,13 +479,34 @@ def stop_project():
     :return:
     """
     print("Stopping project")
+    # bin/stop waits for daemons to exit after SIGHUP, paused daemons would never exit
+    thaw_all_modules()
     call([config.project["home"] + "bin/stop"])
+    invalidate_process_snapshot()
+    invalidate_project_status()
 
 
 class FitcrackTLVConfig:
     """
     Class for manipulation with Fitcrack TLV config files
+    Known fields are described by tlv_codec.config_schema, other fields are kept in extra
     """
+    __slots__ = config_schema.names + ("extra",)
+
+    def __init__(self):
+        for name in config_schema.names:
+            setattr(self, name, None)
+        # fields not in schema: {name: (type name, value)}
+        self.extra = {}
+
+    def __getattr__(self, name):
+        # called only for names which are not in __slots__
+        if name == "extra":
+            raise AttributeError(name)
+        try:
+            return self.extra[name][1]
+        except KeyError:
+            raise AttributeError(name) from None
 
     @classmethod
     def create(cls, mode=None, attack_mode=None, hash_type=None, name=None,
@@ -239,58 +545,59 @@ class FitcrackTLVConfig:
         :param string:
         :return: FitcrackTLVConfig
         """
+        return cls.from_records(decode(string))
+
+    @classmethod
+    def from_bytes(cls, buffer):
+        """
+        FitcrackTLVConfig constructor
+        :param buffer: bytes-like object (bytes, mmap, memoryview) with TLV config
+        :return: FitcrackTLVConfig
+        """
+        return cls.from_records((name, type_name, decode_value(type_name, value))
+                                for name, type_name, value in iter_records(buffer))
+
+    @classmethod
+    def from_file(cls, filename):
+        """
+        FitcrackTLVConfig constructor
+        :param filename: path to TLV config file
+        :return: FitcrackTLVConfig
+        """
+        with open(filename, "rb") as file:
+            if os.fstat(file.fileno()).st_size == 0:
+                # empty file can't be mapped
+                return cls()
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as m:
+                return cls.from_bytes(m)
+
+    @classmethod
+    def from_records(cls, records):
+        """
+        FitcrackTLVConfig constructor
+        :param records: iterable of tuples (name, type name, decoded value)
+        :return: FitcrackTLVConfig
+        """
         o = cls()
-        for line in string.split("\n"):
-            if len(line) == 0:
-                continue
-
-            stripped_line = line.strip("|||")
-            values = stripped_line.split("|")
-            if len(values) != 4:
-                raise ValueError("Config line malformed: " + line)
-            name = values[0]
-            _ = values[1]   # type
-            length = int(values[2])
-            val = values[3]
-            if len(val) != length:
-                raise ValueError("value length is wrong:" + line)
-            if hasattr(o, name):
-                print(o)
-                raise ValueError(values[0] + " is already present in this object")
-            if isint(val):
-                setattr(o, name, int(val))
+        index = config_schema.index
+        extra = o.extra
+        for name, type_name, value in records:
+            if name in index:
+                if getattr(o, name) is not None:
+                    raise ValueError(name + " is already present in this object")
+                setattr(o, name, value)
+            elif name in extra:
+                raise ValueError(name + " is already present in this object")
             else:
-                setattr(o, name, val)
+                extra[name] = (type_name, value)
 
-        print("from_string:", o)
         return o
 
     def __str__(self):
         """
         :return: string representation of FitcrackTLVConfig
         """
-        res = ""
-        if hasattr(self, "mode") and self.mode is not None:
-            res = "|||mode|String|1|" + self.mode + "|||\n"
-        if hasattr(self, "attack") and self.attack is not None:
-            res += "|||attack|String|" + str(len(self.attack)) + "|" + self.attack + "|||\n"
-        if hasattr(self, "attack_mode") and self.attack_mode is not None:
-            res += "|||attack_mode|UInt|1|" + str(self.attack_mode) + "|||\n"
-        if hasattr(self, "hash_type") and self.hash_type is not None:
-            res += "|||hash_type|UInt|" + str(len(str(self.hash_type))) + "|" + str(
-                self.hash_type) + "|||\n"
-        if hasattr(self, "name") and self.name is not None:
-            res += "|||name|String|" + str(len(self.name)) + "|" + str(self.name) + "|||\n"
-        if hasattr(self, "mask") and self.mask is not None:
-            res += "|||mask|String|" + str(len(self.mask)) + "|" + str(self.mask) + "|||\n"
-        if hasattr(self, "hc_keyspace") and self.hc_keyspace is not None:
-            res += "|||hc_keyspace|BigUInt|" + str(len(str(self.hc_keyspace))) + "|" + str(
-                self.hc_keyspace) + "|||\n"
-        if hasattr(self, "start_index") and self.start_index is not None:
-            res += "|||start_index|BigUInt|" + str(len(str(self.start_index))) + "|" + str(
-                self.start_index) + "|||\n"
-
-        return res
+        return config_schema.encode(self, self.extra)
 
     def to_file(self, filename):
         with open(filename, "w") as file:
@@ -0,0 +1,351 @@
+"""
+Simulated cracking engine for hashcat mock
+Walks assigned part of keyspace of mask, dictionary or combination attack and decides
+if password planted at target index was found, cracking time is computed by speed model
+
+Task is given in units of hashcat keyspace (--keyspace, -s, -l), which excludes amplifier:
+    mask:        first positions of mask are amplifier (see MaskKeyspace.amplifier_length)
+    dictionary:  words (rules are not simulated)
+    combination: words of left dictionary, right dictionary is amplifier
+Candidate index is base index * amplifier + amplifier index. Order of candidates is order of
+hashcat with --markov-disable, leftmost position changes fastest
+"""
+import string
+
+from fc_test_library import AttackModes
+
+# slices with at most this number of candidates are walked candidate by candidate by default
+walk_limit = 10 ** 6
+
+# hashcat built-in charsets
+charsets = {
+    "l": string.ascii_lowercase,
+    "u": string.ascii_uppercase,
+    "d": string.digits,
+    "h": string.digits + "abcdef",
+    "H": string.digits + "ABCDEF",
+    "s": " " + string.punctuation,
+    "a": string.ascii_lowercase + string.ascii_uppercase + string.digits + " " +
+         string.punctuation,
+    "b": "".join(chr(i) for i in range(256)),
+}
+
+
+class MaskKeyspace:
+    """
+    Keyspace of mask attack, leftmost position of amplifier and of base changes fastest
+    """
+
+    def __init__(self, mask, custom_charsets=None):
+        """
+        :param mask: hashcat mask, for example ?l?l?d
+        :param custom_charsets: dictionary with custom charsets {"1": "?l?d", ...}
+        """
+        self.positions = self.parse_mask(mask, custom_charsets or {})
+        self.size = 1
+        for position in self.positions:
+            self.size *= len(position)
+
+        r = self.amplifier_length(self.positions)
+        self.amplifier_positions = self.positions[:r]
+        self.base_positions = self.positions[r:]
+        self.amplifier = 1
+        for position in self.amplifier_positions:
+            self.amplifier *= len(position)
+
+    @staticmethod
+    def amplifier_length(positions):
+        """
+        Number of positions at the beginning of mask, which are generated in kernel
+        Same split as hashcat uses for fast hashes (mpsp.c), UTF-16 hash types are not
+        distinguished
+        :param positions: positions of mask
+        :return: number of amplifier positions
+        """
+        if len(positions) < 6:
+            return min(1, len(positions))
+        if len(positions) == 6:
+            return 2
+        return 3 if len(positions[0]) * len(positions[1]) > 256 else 4
+
+    @staticmethod
+    def expand_charset(charset, custom_charsets):
+        """
+        :param charset: charset definition which could contain built-in charsets
+        :param custom_charsets: dictionary with custom charsets
+        :return: string with all characters of charset
+        """
+        result = ""
+        i = 0
+        while i < len(charset):
+            if charset[i] == "?" and i + 1 < len(charset):
+                name = charset[i + 1]
+                if name in charsets:
+                    result += charsets[name]
+                elif name in custom_charsets:
+                    result += MaskKeyspace.expand_charset(custom_charsets[name], {})
+                elif name == "?":
+                    result += "?"
+                else:
+                    raise ValueError("Unknown charset ?" + name)
+                i += 2
+            else:
+                result += charset[i]
+                i += 1
+
+        # duplicated characters are tried only once
+        return "".join(dict.fromkeys(result))
+
+    @staticmethod
+    def parse_mask(mask, custom_charsets):
+        """
+        :param mask: hashcat mask
+        :param custom_charsets: dictionary with custom charsets
+        :return: list with string of characters for every position of mask
+        """
+        positions = []
+        i = 0
+        while i < len(mask):
+            if mask[i] == "?":
+                if i + 1 == len(mask):
+                    raise ValueError("Mask can't end with ?: " + mask)
+                positions.append(MaskKeyspace.expand_charset(mask[i:i + 2], custom_charsets))
+                i += 2
+            else:
+                positions.append(mask[i])
+                i += 1
+
+        return positions
+
+    def __len__(self):
+        return self.size
+
+    @staticmethod
+    def decode(index, positions):
+        chars = []
+        for position in positions:
+            index, i = divmod(index, len(position))
+            chars.append(position[i])
+        return "".join(chars)
+
+    def candidate(self, index):
+        """
+        :param index: index of candidate in keyspace
+        :return: password candidate
+        """
+        base, amplifier = divmod(index, self.amplifier)
+        return self.decode(amplifier, self.amplifier_positions) + \
+            self.decode(base, self.base_positions)
+
+
+class DictionaryKeyspace:
+    """
+    Keyspace of dictionary attack
+    """
+
+    amplifier = 1
+
+    def __init__(self, words):
+        """
+        :param words: list of words from dictionary
+        """
+        self.words = words
+
+    @classmethod
+    def from_file(cls, path):
+        """
+        :param path: path to dictionary file
+        :return: DictionaryKeyspace
+        """
+        with open(path, "r", errors="replace") as f:
+            return cls(f.read().splitlines())
+
+    def __len__(self):
+        return len(self.words)
+
+    def candidate(self, index):
+        return self.words[index]
+
+
+class CombinationKeyspace:
+    """
+    Keyspace of combination attack, word from right dictionary changes fastest
+    """
+
+    def __init__(self, left, right):
+        """
+        :param left: DictionaryKeyspace of left dictionary
+        :param right: DictionaryKeyspace of right dictionary
+        """
+        self.left = left
+        self.right = right
+
+    @property
+    def amplifier(self):
+        return max(1, len(self.right))
+
+    def __len__(self):
+        return len(self.left) * len(self.right)
+
+    def candidate(self, index):
+        i, j = divmod(index, len(self.right))
+        return self.left.candidate(i) + self.right.candidate(j)
+
+
+class SpeedModel:
+    """
+    Cracking time of task with constant hash rate and initialization time of device
+    """
+
+    def __init__(self, hash_rate, startup_time=0.0):
+        """
+        :param hash_rate: hashes per second
+        :param startup_time: seconds before first candidate is tried
+        """
+        if hash_rate <= 0:
+            raise ValueError("hash_rate needs to be greater than 0")
+
+        self.hash_rate = hash_rate
+        self.startup_time = startup_time
+
+    def cracking_time(self, candidates):
+        """
+        :param candidates: number of tried candidates
+        :return: seconds needed for trying candidates
+        """
+        return self.startup_time + candidates / self.hash_rate
+
+
+def hc_keyspace_size(keyspace):
+    """
+    :return: keyspace as reported by hashcat --keyspace (without amplifier)
+    """
+    return len(keyspace) // keyspace.amplifier
+
+
+class CrackingResult:
+    """
+    Result of simulated task, indexes are in units of hashcat keyspace
+    """
+
+    def __init__(self, found, password, cracking_time, start_index, hc_keyspace,
+                 exhausted_index, keyspace, candidates=0, walked=False):
+        self.found = found
+        self.password = password
+        self.cracking_time = cracking_time
+        self.start_index = start_index
+        self.hc_keyspace = hc_keyspace
+        self.exhausted_index = exhausted_index
+        self.keyspace = keyspace
+        self.candidates = candidates
+        self.walked = walked
+
+    def to_dict(self):
+        return dict(self.__dict__)
+
+
+class CrackingEngine:
+    """
+    Simulates hashcat task on part of keyspace
+    """
+
+    def __init__(self, keyspace, speed_model, target_index=None):
+        """
+        :param keyspace: MaskKeyspace, DictionaryKeyspace or CombinationKeyspace
+        :param speed_model: SpeedModel
+        :param target_index: candidate index of planted password (including amplifier), None
+        if password is not in keyspace
+        """
+        self.keyspace = keyspace
+        self.speed_model = speed_model
+        self.target_index = target_index
+
+    @property
+    def target_password(self):
+        """
+        :return: planted password or None
+        """
+        if self.target_index is None or not 0 <= self.target_index < len(self.keyspace):
+            return None
+
+        return self.keyspace.candidate(self.target_index)
+
+    def candidates(self, start_index, hc_keyspace):
+        """
+        Walks part of keyspace
+        :param start_index: first index of hashcat keyspace
+        :param hc_keyspace: number of units of hashcat keyspace
+        :return: generator of tuples (candidate index, candidate)
+        """
+        amplifier = self.keyspace.amplifier
+        end = min(start_index + hc_keyspace, hc_keyspace_size(self.keyspace))
+        for index in range(start_index * amplifier, max(start_index, end) * amplifier):
+            yield index, self.keyspace.candidate(index)
+
+    def crack(self, start_index, hc_keyspace, walk=None):
+        """
+        Runs task on part of keyspace
+        :param start_index: first index of task in hashcat keyspace (-s)
+        :param hc_keyspace: size of task in hashcat keyspace (-l)
+        :param walk: compare every candidate with planted password instead of comparing indexes,
+        default is walking for slices with at most walk_limit candidates
+        :return: CrackingResult
+        """
+        if start_index < 0 or hc_keyspace < 0:
+            raise ValueError("start_index and hc_keyspace can't be negative")
+
+        amplifier = self.keyspace.amplifier
+        end = max(start_index, min(start_index + hc_keyspace, hc_keyspace_size(self.keyspace)))
+        if walk is None:
+            walk = (end - start_index) * amplifier <= walk_limit
+
+        found_index = None
+        if walk:
+            password = self.target_password
+            if password is not None:
+                for index, candidate in self.candidates(start_index, hc_keyspace):
+                    if candidate == password:
+                        found_index = index
+                        break
+        elif self.target_index is not None and \
+                start_index * amplifier <= self.target_index < end * amplifier:
+            found_index = self.target_index
+
+        if found_index is None:
+            exhausted_index = end
+            password = None
+            tried = (end - start_index) * amplifier
+        else:
+            exhausted_index = found_index // amplifier + 1
+            password = self.keyspace.candidate(found_index)
+            tried = found_index - start_index * amplifier + 1
+
+        return CrackingResult(found=found_index is not None, password=password,
+                              cracking_time=self.speed_model.cracking_time(tried),
+                              start_index=start_index, hc_keyspace=hc_keyspace,
+                              exhausted_index=exhausted_index,
+                              keyspace=hc_keyspace_size(self.keyspace), candidates=tried,
+                              walked=walk)
+
+
+def keyspace_for_task(attack_mode, task):
+    """
+    Creates keyspace of task from hashcat arguments
+    :param attack_mode: value of AttackModes
+    :param task: namespace object from hashcat_parsers.parse_task
+    :return: keyspace object
+    """
+    if attack_mode == AttackModes.mask.value:
+        custom = {}
+        for i in range(1, 5):
+            charset = getattr(task, "charset" + str(i))
+            if charset is not None:
+                custom[str(i)] = charset
+        return MaskKeyspace(task.mask, custom)
+    elif attack_mode == AttackModes.dictionary.value:
+        return DictionaryKeyspace.from_file(task.dict1)
+    elif attack_mode == AttackModes.combination.value:
+        return CombinationKeyspace(DictionaryKeyspace.from_file(task.dict1),
+                                   DictionaryKeyspace.from_file(task.dict2))
+
+    raise ValueError("Unknown attack mode: " + str(attack_mode))
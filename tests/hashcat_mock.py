@@ -3,6 +3,7 @@
 Application which imitates hashcat
 uses hashcat parser for parsing arguments
 Depending on arguments prints to stdout and log file whole content of one file
+With --engine output is created from result of simulated task (status lines, cracked hash)
 
 usage:
     Copy to same folder as runner and rename to hashcat binary name
@@ -10,83 +11,224 @@ usage:
     Depends on runner expectations
     Example unix command:
     cp hashcat_mock.py hashcat64.bin
+
+    For faster invocations the mock can be preloaded in hashcat_mock_server.py
+    and runner calls only launcher shim hashcat_mock_shim.py (see its docstring)
 """
+import io
+import json
+import os
 import sys
 
 import config
-from hashcat_parsers import get_initial_parser
-from fc_test_library import AttackModes
-
-try:
-    args = get_initial_parser().parse_known_args()
-except:
-    # TODO:
-    args = None
-    exit(-42)
-
-known = args[0]
-file_out = None
-if known.b:
-    if known.error:
-        file_out = open(config.in_files["runner"]["hc_error"])
-    elif known.warning:
-        file_out = open(config.in_files["runner"]["hc_bench_out_warning"])
-    else:
-        file_out = open(config.in_files["runner"]["hc_bench_out"])
-elif known.a is None:
-    print("ERROR!!!")
-    file_out = open(config.in_files["runner"]["hc_error"])
-
-elif known.a == AttackModes.mask.value:
-    if known.error:
-        file_out = open(config.in_files["runner"]["hc_error"])
-    elif known.found:
-        file_out = open(config.in_files["runner"]["hc_mask_out_found"])
-    else:
-        file_out = open(config.in_files["runner"]["hc_mask_out_not_found"])
+from hashcat_engine import CrackingEngine, SpeedModel, keyspace_for_task
+from hashcat_parsers import get_initial_parser, get_status_parser, parse_task
+from hashcat_status import StatusStream, default_status_timer
+from fc_test_library import AttackModes, FitcrackTLVConfig
 
-elif known.a == AttackModes.dictionary.value:
-    if known.error:
-        file_out = open(config.in_files["runner"]["hc_error"])
-    elif known.found:
-        file_out = open(config.in_files["runner"]["hc_dict_out_found"])
-    else:
-        file_out = open(config.in_files["runner"]["hc_dict_out_not_found"])
 
-elif known.a == AttackModes.combination.value:
-    if known.error:
-        file_out = open(config.in_files["runner"]["hc_error"])
-    elif known.found:
-        file_out = open(config.in_files["runner"]["hc_comb_out_found"])
-    else:
-        file_out = open(config.in_files["runner"]["hc_comb_out_not_found"])
+def get_output_path(known):
+    """
+    Chooses file which content is printed as hashcat output
+    :param known: namespace object with known arguments
+    :return: path to file with hashcat output
+    """
+    if known.b:
+        if known.error:
+            return config.in_files["runner"]["hc_error"]
+        elif known.warning:
+            return config.in_files["runner"]["hc_bench_out_warning"]
+        else:
+            return config.in_files["runner"]["hc_bench_out"]
+
+    elif known.a == AttackModes.mask.value:
+        if known.error:
+            return config.in_files["runner"]["hc_error"]
+        elif known.found:
+            return config.in_files["runner"]["hc_mask_out_found"]
+        else:
+            return config.in_files["runner"]["hc_mask_out_not_found"]
+
+    elif known.a == AttackModes.dictionary.value:
+        if known.error:
+            return config.in_files["runner"]["hc_error"]
+        elif known.found:
+            return config.in_files["runner"]["hc_dict_out_found"]
+        else:
+            return config.in_files["runner"]["hc_dict_out_not_found"]
+
+    elif known.a == AttackModes.combination.value:
+        if known.error:
+            return config.in_files["runner"]["hc_error"]
+        elif known.found:
+            return config.in_files["runner"]["hc_comb_out_found"]
+        else:
+            return config.in_files["runner"]["hc_comb_out_not_found"]
+
+    return None
+
+
+def read_tlv_config():
+    """
+    :return: FitcrackTLVConfig of task from runner
+    """
+    with open(config.runner["tlv_config"]) as f:
+        return FitcrackTLVConfig.from_string(f.read())
+
+
+def run_engine(known, args, tlv):
+    """
+    Simulates cracking of task and writes report of simulation
+    Part of keyspace is taken from -s and -l arguments, or from TLV config if runner did not
+    specify them
+    :param known: namespace object with known arguments
+    :param args: list of arguments not parsed by initial parser
+    :param tlv: FitcrackTLVConfig of task
+    :return: CrackingResult
+    """
+    task = parse_task(args, known.a)
+    keyspace = keyspace_for_task(known.a, task)
+
+    start_index = task.skip
+    if start_index is None:
+        start_index = getattr(tlv, "start_index", None) or 0
+    hc_keyspace = task.limit
+    if hc_keyspace is None:
+        hc_keyspace = getattr(tlv, "hc_keyspace", None)
+    if hc_keyspace is None:
+        hc_keyspace = max(0, len(keyspace) - start_index)
+
+    engine = CrackingEngine(keyspace, SpeedModel(known.hash_rate, known.startup_time),
+                            target_index=known.target_index)
+    result = engine.crack(start_index, hc_keyspace)
+    result.hash = read_hash(task.data)
+
+    with open(config.runner["engine_report"], "w") as report:
+        json.dump(result.to_dict(), report)
 
-else:
-    print("ERROR!!!")
-    file_out = open(config.in_files["runner"]["hc_error"])
+    return result
 
-# log whole content of file_out to log
-to_print = file_out.read()
-with open("stub_log", "w") as stub_out:
-    stub_out.write(to_print)
 
-# same content of file_out prints to stdout for runner
-print(to_print)
-file_out.close()
+def read_hash(data):
+    """
+    :param data: hash file or hash from hashcat arguments
+    :return: first hash of task
+    """
+    if os.path.isfile(data):
+        with open(data, errors="replace") as f:
+            return f.readline().strip()
+    return data
 
-# TODO: time in hashcat benchmark
 
-# make file for test_runner file with arguments
-command_log = open(config.runner["command_log"], "w")
-command_log.write(" ".join(sys.argv))
-command_log.close()
+def emit_engine_output(known, argv, out, result):
+    """
+    Writes output of simulated task: status lines with cracking time of engine and cracked
+    hash in hashcat format (hash:password) before final status
+    :param known: namespace object with known arguments
+    :param argv: list of arguments without program name
+    :param out: text stream
+    :param result: CrackingResult of engine
+    :return: number of written status lines
+    """
+    status_timer = get_status_parser().parse_known_args(argv)[0].status_timer
+    stream = StatusStream(start_index=result.start_index, hc_keyspace=result.hc_keyspace,
+                          hash_rate=known.hash_rate,
+                          status_timer=status_timer or default_status_timer,
+                          stop_index=result.exhausted_index, found=result.found,
+                          cracking_time=result.cracking_time)
+    cracked = result.hash + ":" + result.password + "\n" if result.found else None
+    return stream.emit(out, time_scale=known.time_scale, before_final=cracked)
+
+
+def emit_status_stream(known, argv, out, tlv):
+    """
+    Writes status lines of task from TLV config
+    :param known: namespace object with known arguments
+    :param argv: list of arguments without program name
+    :param out: text stream
+    :param tlv: FitcrackTLVConfig of task
+    :return: number of written lines
+    """
+    status_timer = get_status_parser().parse_known_args(argv)[0].status_timer
+    stream = StatusStream(start_index=getattr(tlv, "start_index", None) or 0,
+                          hc_keyspace=getattr(tlv, "hc_keyspace", None) or 0,
+                          hash_rate=known.hash_rate,
+                          status_timer=status_timer or default_status_timer,
+                          found=known.found)
+    return stream.emit(out, time_scale=known.time_scale)
+
+
+def run(argv, out):
+    """
+    Imitates one hashcat invocation
+    Log files are created in current working directory
+    :param argv: list of arguments including program name (same as sys.argv)
+    :param out: text stream to which hashcat output is written
+    :return: exit code of hashcat
+    """
+    try:
+        args = get_initial_parser().parse_known_args(argv[1:])
+    except:
+        # TODO:
+        return -42
+
+    known = args[0]
+    normal_task = not known.b and not known.error and known.a in [m.value for m in AttackModes]
+    tlv = None
+    result = None
+    if normal_task and (known.engine or known.status_stream):
+        tlv = read_tlv_config()
+    if normal_task and known.engine:
+        # found flag from local.conf is replaced by result of simulation
+        result = run_engine(known, args[1], tlv)
+        known.found = result.found
+
+    path = get_output_path(known)
+    if path is None:
+        out.write("ERROR!!!\n")
+        path = config.in_files["runner"]["hc_error"]
+
+    elif result is not None:
+        # output of engine replaces content of file
+        emit_engine_output(known, argv[1:], out, result)
+        out.flush()
+        log = io.StringIO()
+        known.time_scale = 0
+        emit_engine_output(known, argv[1:], log, result)
+        with open("stub_log", "w") as stub_out:
+            stub_out.write(log.getvalue())
+        path = None
+
+    elif normal_task and known.status_stream:
+        emit_status_stream(known, argv[1:], out, tlv)
+
+    if path is not None:
+        # log whole content of file_out to log
+        with open(path) as file_out:
+            to_print = file_out.read()
+        with open("stub_log", "w") as stub_out:
+            stub_out.write(to_print)
+
+        # same content of file_out prints to stdout for runner
+        out.write(to_print + "\n")
+        out.flush()
+
+    # TODO: time in hashcat benchmark
+
+    # make file for test_runner file with arguments
+    with open(config.runner["command_log"], "w") as command_log:
+        command_log.write(" ".join(argv))
+
+    # hashcat exits with value other than 0 and 1 when error occurred
+    if known.error:
+        return -1
+
+    # hashcat exits with 0 only if password was found, 1 when password was not found
+    if not known.found:
+        return 1
 
-# hashcat exits with value other than 0 and 1 when error occurred
-if known.error:
-    exit(-1)
+    return 0
 
-# hashcat exits with 0 only if password was found, 1 when password was not found
-if not known.found:
-    exit(1)
-    
 
+if __name__ == '__main__':
+    exit(run(sys.argv, sys.stdout))
@@ -0,0 +1,91 @@
+#!/usr/bin/python3
+"""
+Preloaded daemon for hashcat mock
+All modules needed by hashcat_mock.py are imported only once, every invocation of hashcat
+is then handled in forked child process, which changes directory to working directory of caller
+
+usage:
+    python3 hashcat_mock_server.py [--socket path]
+    cp hashcat_mock_shim.py hashcat64.bin
+
+Protocol:
+    request is working directory and arguments separated by null bytes, terminated by end of stream
+    response is sequence of frames (4 bytes big endian length + utf-8 data) with stdout of hashcat,
+    terminated by frame with zero length followed by 4 bytes signed exit code
+"""
+import argparse
+import os
+import socketserver
+import struct
+
+import config
+import hashcat_mock
+
+frame_header = struct.Struct("!I")
+exit_code_struct = struct.Struct("!i")
+
+
+class FrameWriter:
+    """
+    Text stream which sends everything written to it as frames to the shim
+    """
+
+    def __init__(self, wfile):
+        self.wfile = wfile
+
+    def write(self, text):
+        data = text.encode()
+        if len(data) == 0:
+            return 0
+        self.wfile.write(frame_header.pack(len(data)) + data)
+        return len(text)
+
+    def flush(self):
+        self.wfile.flush()
+
+    def close(self, exit_code):
+        """
+        Sends terminating frame with exit code
+        :param exit_code: exit code of hashcat
+        """
+        self.wfile.write(frame_header.pack(0) + exit_code_struct.pack(exit_code))
+        self.wfile.flush()
+
+
+class HashcatMockHandler(socketserver.StreamRequestHandler):
+    """
+    Handles one hashcat invocation, runs in forked child process
+    """
+
+    def handle(self):
+        request = self.rfile.read().decode().split("\0")
+        os.chdir(request[0])
+
+        out = FrameWriter(self.wfile)
+        exit_code = hashcat_mock.run(request[1:], out)
+        out.close(exit_code)
+
+
+class HashcatMockServer(socketserver.ForkingMixIn, socketserver.UnixStreamServer):
+    pass
+
+
+def serve(socket_path=config.runner["mock_socket"]):
+    """
+    Starts hashcat mock server, removes old socket if exists
+    :param socket_path: path to unix socket
+    """
+    if os.path.exists(socket_path):
+        os.remove(socket_path)
+
+    with HashcatMockServer(socket_path, HashcatMockHandler) as server:
+        try:
+            server.serve_forever()
+        finally:
+            os.remove(socket_path)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Preloaded hashcat mock server")
+    parser.add_argument("--socket", default=config.runner["mock_socket"])
+    serve(parser.parse_args().socket)
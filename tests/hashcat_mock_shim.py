@@ -0,0 +1,61 @@
+#!/usr/bin/python3 -S
+"""
+Launcher shim for preloaded hashcat mock (hashcat_mock_server.py)
+Imports only builtin modules, sends arguments to server and prints its response
+If server is not running, falls back to hashcat_mock.py
+
+usage:
+    Copy to same folder as runner and rename to hashcat binary name
+    Example unix command:
+    cp hashcat_mock_shim.py hashcat64.bin
+"""
+import _socket
+import os
+import sys
+
+import config
+
+
+def read_exactly(sock, size):
+    """
+    :param sock: connected socket
+    :param size: number of bytes
+    :return: bytes with exactly size length
+    """
+    data = b""
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError("hashcat mock server closed connection")
+        data += chunk
+
+    return data
+
+
+def main():
+    sock = _socket.socket(_socket.AF_UNIX, _socket.SOCK_STREAM)
+    try:
+        sock.connect(config.runner["mock_socket"])
+    except OSError:
+        mock = os.path.join(os.path.dirname(os.path.realpath(__file__)), "hashcat_mock.py")
+        os.execv(sys.executable, [sys.executable, mock] + sys.argv[1:])
+
+    sock.sendall("\0".join([os.getcwd()] + sys.argv).encode())
+    sock.shutdown(_socket.SHUT_WR)
+
+    stdout = sys.stdout.buffer
+    while True:
+        size = int.from_bytes(read_exactly(sock, 4), "big")
+        if size == 0:
+            break
+        stdout.write(read_exactly(sock, size))
+        stdout.flush()
+
+    exit_code = int.from_bytes(read_exactly(sock, 4), "big", signed=True)
+    sock.close()
+
+    return exit_code
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -26,10 +26,31 @@ def get_initial_parser():
     bench_parser.add_argument("--error", action="store_true")
     bench_parser.add_argument("--warning", action="store_true")
     bench_parser.add_argument("--found", action="store_true")
+    # hashcat mock options for simulating running task (see hashcat_status.py)
+    bench_parser.add_argument("--status-stream", action="store_true")
+    bench_parser.add_argument("--hash-rate", type=int, default=1000000)
+    bench_parser.add_argument("--time-scale", type=float, default=0)
+    # hashcat mock options for simulated cracking engine (see hashcat_engine.py)
+    bench_parser.add_argument("--engine", action="store_true")
+    bench_parser.add_argument("--target-index", type=int)
+    bench_parser.add_argument("--startup-time", type=float, default=0)
 
     return bench_parser
 
 
+def get_status_parser():
+    """
+    Sets attributes for parsing status options of normal task
+    :return: status parser
+    """
+    status_parser = Parser(description='Hashcat stub status', add_help=False)
+    status_parser.add_argument("--status", action="store_true")
+    status_parser.add_argument("--status-timer", type=int)
+    status_parser.add_argument("--machine-readable", action="store_true")
+
+    return status_parser
+
+
 def get_normal_parser():
     """
     Sets attributes for normal task parser
@@ -97,3 +118,33 @@ def parse_comb_attack(args):
     parser.add_argument("dict2", type=os.path.isfile)
 
     return parser.parse_args(args)
+
+
+def parse_task(args, attack_mode):
+    """
+    Parses arguments of normal task for hashcat mock engine
+    unlike other parsers keeps paths to files as strings
+    :param args: list of arguments not parsed by initial parser
+    :param attack_mode: attack mode (-a)
+    :return: namespace object with arguments
+    """
+    parser = Parser(description='Hashcat stub task', add_help=False)
+    parser.add_argument("--status-timer", type=int)
+    parser.add_argument("--outfile-format", type=int)
+    parser.add_argument("-s", "--skip", type=int)
+    parser.add_argument("-l", "--limit", type=int)
+    parser.add_argument("-r", "--rules-file")
+    parser.add_argument("-j", "--rule-left")
+    parser.add_argument("-k", "--rule-right")
+    for i in range(1, 5):
+        parser.add_argument("-" + str(i), "--custom-charset" + str(i), dest="charset" + str(i))
+    parser.add_argument("data", type=str)
+    if attack_mode == 3:
+        parser.add_argument("mask", type=str)
+    elif attack_mode == 0:
+        parser.add_argument("dict1", type=str)
+    elif attack_mode == 1:
+        parser.add_argument("dict1", type=str)
+        parser.add_argument("dict2", type=str)
+
+    return parser.parse_known_args(args)[0]
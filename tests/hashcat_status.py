@@ -0,0 +1,127 @@
+"""
+Generator of hashcat machine readable status lines (--status --machine-readable)
+Used by hashcat mock to simulate running hashcat task
+"""
+import math
+import time
+
+# hashcat status codes
+STATUS_RUNNING = 3
+STATUS_EXHAUSTED = 5
+STATUS_CRACKED = 6
+
+# hashcat prints status every 10 seconds if --status-timer is not specified
+default_status_timer = 10
+
+
+def status_line(status, speed, runtime, current_index, progress, total, recovered=0,
+                util=100):
+    """
+    Creates one machine readable status line
+    :param status: hashcat status code
+    :param speed: hashes per second
+    :param runtime: seconds from start of cracking
+    :param current_index: current keyspace unit
+    :param progress: number of processed candidates
+    :param total: number of all candidates
+    :param recovered: number of recovered hashes
+    :param util: device utilization in percent
+    :return: status line terminated with newline
+    """
+    return "STATUS\t{}\tSPEED\t{}\t1000\tEXEC_RUNTIME\t{:.6f}\tCURKU\t{}\tPROGRESS\t{}\t{}" \
+           "\tRECHASH\t{}\t1\tRECSALT\t{}\t1\tREJECTED\t0\tUTIL\t{}\n" \
+        .format(status, speed, runtime, current_index, progress, total, recovered, recovered,
+                util)
+
+
+class StatusStream:
+    """
+    Stream of status lines of hashcat task, which processes hc_keyspace candidates from
+    start_index with constant hash rate
+    """
+
+    def __init__(self, start_index, hc_keyspace, hash_rate, status_timer=default_status_timer,
+                 stop_index=None, found=False, cracking_time=None):
+        """
+        :param start_index: first index of task (-s)
+        :param hc_keyspace: number of candidates in task (-l)
+        :param hash_rate: simulated hashes per second
+        :param status_timer: seconds between two status lines
+        :param stop_index: index where cracking stops, None for end of task
+        :param found: password was found at stop_index
+        :param cracking_time: runtime of final status, default is computed from hash_rate
+        """
+        if hash_rate <= 0:
+            raise ValueError("hash_rate needs to be greater than 0")
+        if status_timer <= 0:
+            raise ValueError("status_timer needs to be greater than 0")
+
+        self.start_index = start_index
+        self.hc_keyspace = hc_keyspace
+        self.hash_rate = hash_rate
+        self.status_timer = status_timer
+        self.stop_index = start_index + hc_keyspace if stop_index is None else stop_index
+        self.found = found
+        self.cracking_time = cracking_time
+
+    @property
+    def runtime(self):
+        """
+        :return: simulated seconds needed to reach stop_index
+        """
+        if self.cracking_time is not None:
+            return self.cracking_time
+        return (self.stop_index - self.start_index) / self.hash_rate
+
+    @property
+    def line_count(self):
+        """
+        :return: number of status lines in stream including final status
+        """
+        return max(1, int(math.ceil(self.runtime / self.status_timer)))
+
+    def lines(self):
+        """
+        Generates status lines, last one is final status of task
+        :return: generator of tuples (simulated runtime, status line)
+        """
+        processed_max = self.stop_index - self.start_index
+        total = self.hc_keyspace
+        count = self.line_count
+        for i in range(1, count + 1):
+            if i == count:
+                runtime = self.runtime
+                processed = processed_max
+                status = STATUS_CRACKED if self.found else STATUS_EXHAUSTED
+            else:
+                runtime = i * self.status_timer
+                processed = min(processed_max, int(processed_max * runtime / self.runtime))
+                status = STATUS_RUNNING
+
+            yield runtime, status_line(status, self.hash_rate, runtime,
+                                       self.start_index + processed, processed, total,
+                                       recovered=1 if status == STATUS_CRACKED else 0)
+
+    def emit(self, out, time_scale=0, before_final=None):
+        """
+        Writes status lines to out
+        :param out: text stream
+        :param time_scale: simulated seconds per one real second, 0 writes all lines immediately
+        :param before_final: text written before final status line (cracked hash)
+        :return: number of written lines
+        """
+        start = time.monotonic()
+        count = 0
+        final = self.line_count
+        for runtime, line in self.lines():
+            if time_scale > 0:
+                delay = start + runtime / time_scale - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+            if count + 1 == final and before_final:
+                out.write(before_final)
+            out.write(line)
+            out.flush()
+            count += 1
+
+        return count
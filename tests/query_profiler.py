@@ -0,0 +1,185 @@
+"""
+Counting and timing of SQL statements issued through shared session
+Every statement is recorded with its duration, helper which issued it (first function outside
+of SQLAlchemy and database package) and test, which called the helper
+"""
+import os
+import sys
+import time
+
+import sqlalchemy
+from sqlalchemy import event
+
+import config
+from database.service import session
+
+# frames from SQLAlchemy, database package and this module are skipped when looking for caller
+sqlalchemy_path = os.path.dirname(sqlalchemy.__file__)
+skipped_paths = (__file__, os.sep + "database" + os.sep)
+test_prefixes = ("test", "setUp", "tearDown")
+
+
+class QueryRecord:
+    """
+    One executed statement
+    """
+    __slots__ = ("statement", "duration", "helper", "test")
+
+    def __init__(self, statement, duration, helper, test):
+        self.statement = statement
+        self.duration = duration
+        self.helper = helper
+        self.test = test
+
+
+def find_callers():
+    """
+    :return: name of helper, which issued statement, and name of test, which called it
+    """
+    helper = None
+    frame = sys._getframe(2)
+    while frame is not None:
+        code = frame.f_code
+        if helper is None and not code.co_filename.startswith(sqlalchemy_path) and \
+                not any(path in code.co_filename for path in skipped_paths):
+            helper = os.path.splitext(os.path.basename(code.co_filename))[0] + "." + code.co_name
+        if helper is not None and code.co_name.startswith(test_prefixes):
+            return helper, code.co_name
+        frame = frame.f_back
+    return helper, None
+
+
+class QueryProfiler:
+    """
+    Records statements executed by engine of session, use as context manager or start/stop
+    """
+
+    def __init__(self, engine=None):
+        self.engine = engine
+        self.records = []
+        self.running = False
+
+    def before_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    def after_execute(self, conn, cursor, statement, parameters, context, executemany):
+        duration = time.perf_counter() - conn.info["query_start"].pop()
+        helper, test = find_callers()
+        self.records.append(QueryRecord(statement, duration, helper, test))
+
+    def start(self):
+        if self.engine is None:
+            self.engine = session.get_bind()
+        event.listen(self.engine, "before_cursor_execute", self.before_execute)
+        event.listen(self.engine, "after_cursor_execute", self.after_execute)
+        self.running = True
+        return self
+
+    def stop(self):
+        if self.running:
+            event.remove(self.engine, "before_cursor_execute", self.before_execute)
+            event.remove(self.engine, "after_cursor_execute", self.after_execute)
+            self.running = False
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    @property
+    def count(self):
+        return len(self.records)
+
+    @property
+    def duration(self):
+        return sum(r.duration for r in self.records)
+
+    def by_helper(self):
+        """
+        :return: dictionary helper -> (number of statements, total duration)
+        """
+        helpers = {}
+        for record in self.records:
+            count, duration = helpers.get(record.helper, (0, 0))
+            helpers[record.helper] = (count + 1, duration + record.duration)
+        return helpers
+
+    def report(self, name, slowest=5):
+        """
+        :param name: name of test
+        :param slowest: number of slowest statements in report
+        :return: string with query count, statements per helper and slowest statements
+        """
+        lines = ["{}: {} queries in {:.3f}s".format(name, self.count, self.duration)]
+        helpers = sorted(self.by_helper().items(), key=lambda h: h[1][0], reverse=True)
+        for helper, (count, duration) in helpers:
+            lines.append("    {:<50} {:>6} queries {:8.3f}s".format(str(helper), count,
+                                                                    duration))
+        for record in sorted(self.records, key=lambda r: r.duration, reverse=True)[:slowest]:
+            lines.append("    {:8.3f}s {} {}".format(record.duration, record.helper,
+                                                     " ".join(record.statement.split())[:120]))
+        return "\n".join(lines)
+
+
+class QueryBudgetMixin:
+    """
+    Mixin for unittest.TestCase, profiles statements of every test (config.query_profiler)
+    Test fails if it executes more statements than query_budget
+    """
+    query_budget = None
+    profiler = None
+
+    def run(self, result=None):
+        enabled = config.query_profiler["enabled"] or self.query_budget is not None or \
+            config.query_profiler["budget"] is not None
+        if not enabled:
+            return super().run(result)
+
+        self.profiler = QueryProfiler().start()
+        self.addCleanup(self.check_query_budget)
+        try:
+            return super().run(result)
+        finally:
+            self.profiler.stop()
+
+    def check_query_budget(self):
+        self.profiler.stop()
+        if config.query_profiler["enabled"] and config.query_profiler["report"]:
+            print(self.profiler.report(self.id(), config.query_profiler["slowest"]))
+
+        budget = self.query_budget
+        if budget is None:
+            budget = config.query_profiler["budget"]
+        if budget is not None and self.profiler.count > budget:
+            self.fail("{} queries, budget is {}\n{}".format(
+                self.profiler.count, budget,
+                self.profiler.report(self.id(), config.query_profiler["slowest"])))
+
+    def assertMaxQueries(self, budget):
+        """
+        :param budget: maximum number of statements in with block
+        :return: context manager
+        """
+        return MaxQueries(self, budget)
+
+
+class MaxQueries:
+    """
+    Context manager failing test when block executes more statements than budget
+    """
+
+    def __init__(self, test_case, budget):
+        self.test_case = test_case
+        self.budget = budget
+        self.profiler = QueryProfiler()
+
+    def __enter__(self):
+        self.profiler.start()
+        return self.profiler
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.profiler.stop()
+        if exc_type is None and self.profiler.count > self.budget:
+            self.test_case.fail("{} queries, budget is {}\n{}".format(
+                self.profiler.count, self.budget, self.profiler.report("block")))
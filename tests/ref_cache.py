@@ -0,0 +1,161 @@
+"""
+Read-through cache of reference rows (charsets, dictionaries, users, BOINC hosts) used by
+expected models of API tests
+Rows are cached as detached snapshots of column values, so expiration of session after commit
+doesn't cause reload. Entries are invalidated when session flushes change of cached table
+(set_attr, add_charset, add_test_dict, delete_record, ...), after bulk update/delete and after
+rollback
+Changes made by API server are not seen by session, test_api invalidates all entries after
+every changing request (api_client.change_listeners)
+"""
+from collections import OrderedDict
+from types import SimpleNamespace
+
+from sqlalchemy import event, inspect
+
+import config
+from database.service import session, get_boinc_host, get_charset, get_dict, get_user
+
+
+def snapshot(obj):
+    """
+    :param obj: ORM object or None
+    :return: object with values of column attributes of obj
+    """
+    if obj is None:
+        return None
+    mapper = inspect(obj).mapper
+    return SimpleNamespace(**{attr.key: getattr(obj, attr.key) for attr in mapper.column_attrs})
+
+
+class LRUCache:
+    """
+    Cache of rows by id with bounded size, least recently used entry is evicted
+    Missing rows are not cached (they may be inserted by server or Core statements), except
+    for id None, which is never in database
+    """
+
+    def __init__(self, name, loader, maxsize=1024):
+        """
+        :param name: name in report
+        :param loader: function id -> ORM object or None
+        :param maxsize: maximum number of entries
+        """
+        self.name = name
+        self.loader = loader
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key):
+        if key in self.entries:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return self.entries[key]
+
+        self.misses += 1
+        value = snapshot(self.loader(key))
+        if value is not None or key is None:
+            self.put(key, value)
+        return value
+
+    def put(self, key, value):
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key=None):
+        """
+        :param key: id of row, all entries are removed if key is None
+        """
+        if key is None:
+            self.invalidations += len(self.entries)
+            self.entries.clear()
+        elif self.entries.pop(key, None) is not None:
+            self.invalidations += 1
+
+    @property
+    def hit_ratio(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0
+
+    def __str__(self):
+        return "{:<12} {:>8} hits {:>8} misses {:6.1%} hit ratio {:>6} entries {:>6} evicted " \
+               "{:>6} invalidated".format(self.name, self.hits, self.misses, self.hit_ratio,
+                                          len(self.entries), self.evictions, self.invalidations)
+
+
+# table name -> cache of its rows
+caches = OrderedDict((table, LRUCache(name, loader, config.ref_cache["maxsize"]))
+                     for table, name, loader in (("fc_charset", "charset", get_charset),
+                                                 ("fc_dictionary", "dictionary", get_dict),
+                                                 ("user", "user", get_user),
+                                                 ("host", "boinc_host", get_boinc_host)))
+
+
+def lookup(table, key):
+    """
+    :param table: name of cached table
+    :param key: id of row
+    :return: snapshot of row or None
+    """
+    if not config.ref_cache["enabled"]:
+        return caches[table].loader(key)
+    return caches[table].get(key)
+
+
+def charset(charset_id):
+    return lookup("fc_charset", charset_id)
+
+
+def dictionary(dict_id):
+    return lookup("fc_dictionary", dict_id)
+
+
+def user(user_id):
+    return lookup("user", user_id)
+
+
+def boinc_host(boinc_host_id):
+    return lookup("host", boinc_host_id)
+
+
+def invalidate_all():
+    for cache in caches.values():
+        cache.invalidate()
+
+
+def report():
+    """
+    :return: string with hits and misses of all caches
+    """
+    lines = ["reference cache:"]
+    lines += ["    " + str(cache) for cache in caches.values()]
+    return "\n".join(lines)
+
+
+@event.listens_for(session, "after_flush")
+def invalidate_flushed(sess, flush_context):
+    # new rows don't need invalidation, missing rows are not cached
+    for obj in list(sess.dirty) + list(sess.deleted):
+        state = inspect(obj)
+        cache = caches.get(state.mapper.local_table.name)
+        if cache is not None and state.identity:
+            cache.invalidate(state.identity[0])
+
+
+@event.listens_for(session, "after_bulk_update")
+@event.listens_for(session, "after_bulk_delete")
+def invalidate_bulk(update_context):
+    invalidate_all()
+
+
+@event.listens_for(session, "after_rollback")
+def invalidate_rollback(sess):
+    # rows read inside rolled back transaction may not exist any more
+    invalidate_all()
@@ -0,0 +1,79 @@
+"""
+Rendering of result xml_doc_in from output template (config.template["app_out"])
+Template is parsed only once, filename is then inserted between precomputed byte segments
+"""
+from functools import lru_cache
+from xml.etree import ElementTree
+from xml.sax.saxutils import escape
+
+import config
+
+# placeholder replaced by filename, it can't occur in template
+sentinel = "@@FITCRACK_RESULT_FILENAME@@"
+
+
+class ResultXmlRenderer:
+    """
+    Renders xml_doc_in of result with uploaded output file
+    """
+
+    def __init__(self, template_path, url):
+        """
+        :param template_path: path to output template of application
+        :param url: url of file upload handler
+        """
+        root = ElementTree.parse(template_path).getroot()
+
+        file_info = root.find("file_info")
+        self.set_text(file_info.find("name"), sentinel)
+        self.set_text(file_info.find("url"), url)
+        self.set_text(root.find("result").find("file_ref").find("file_name"), sentinel)
+
+        # same serialization as ElementTree.write with default encoding
+        self.segments = ElementTree.tostring(root).split(sentinel.encode())
+
+    @staticmethod
+    def set_text(element, text):
+        for child in list(element):
+            element.remove(child)
+        element.text = text
+
+    @staticmethod
+    def encode_filename(filename):
+        return escape(filename).encode("ascii", "xmlcharrefreplace")
+
+    def render(self, filename):
+        """
+        :param filename: name of output file in upload hierarchy
+        :return: xml_doc_in as bytes
+        """
+        return self.encode_filename(filename).join(self.segments)
+
+    def render_many(self, filenames):
+        """
+        :param filenames: names of output files in upload hierarchy
+        :return: list of xml_doc_in as bytes
+        """
+        join = bytes.join
+        segments = self.segments
+        return [join(self.encode_filename(filename), segments) for filename in filenames]
+
+
+@lru_cache(maxsize=None)
+def get_renderer(template_path=None, url=None):
+    """
+    :param template_path: path to output template, default is config.template["app_out"]
+    :param url: url of upload handler, default is file_upload_handler on config.server_ip
+    :return: cached ResultXmlRenderer
+    """
+    return ResultXmlRenderer(template_path or config.template["app_out"],
+                             url or "http://" + config.server_ip +
+                             "/fitcrack_cgi/file_upload_handler")
+
+
+def render_result_xml(filename):
+    """
+    :param filename: name of output file in upload hierarchy
+    :return: xml_doc_in as bytes
+    """
+    return get_renderer().render(filename)
@@ -0,0 +1,187 @@
+"""
+Bulk loader of runner output files into NumPy columns
+Columns have one row per file, missing values are -1 (integers) or NaN (floats)
+Passwords and exit info are stored in side tables {row: value}
+Files with mode other than "b" and "n" keep only mode and status code (same as RunnerOutput),
+files which can't be parsed are collected in errors
+Requires NumPy (pip3 install numpy)
+"""
+import os
+
+import numpy as np
+
+
+class RunnerOutputColumns:
+    """
+    Columnar representation of many runner output files (see fc_test_library.RunnerOutput)
+    """
+
+    def __init__(self, paths, mode, status_code, power, cracking_time, exit_code, passwords,
+                 exit_info, keys=None, errors=None):
+        self.paths = paths
+        self.mode = mode
+        self.status_code = status_code
+        self.power = power
+        self.cracking_time = cracking_time
+        self.exit_code = exit_code
+        self.passwords = passwords
+        self.exit_info = exit_info
+        self.keys = keys
+        # list of tuples (path, message) with files which can't be parsed
+        self.errors = errors or []
+
+    def __len__(self):
+        return len(self.paths)
+
+    @classmethod
+    def from_files(cls, paths, key=None):
+        """
+        Parses runner output files
+        :param paths: iterable of paths to files
+        :param key: function, which returns group key (for example package id) from path
+        :return: RunnerOutputColumns
+        """
+        parsed_paths = []
+        mode = []
+        status_code = []
+        power = []
+        cracking_time = []
+        exit_code = []
+        passwords = {}
+        exit_info = {}
+        keys = [] if key is not None else None
+        errors = []
+
+        for path in paths:
+            try:
+                with open(path, "r") as f:
+                    row = parse_runner_output(f.read())
+            except (ValueError, IndexError, OSError, UnicodeDecodeError) as err:
+                errors.append((path, str(err)))
+                continue
+
+            i = len(parsed_paths)
+            parsed_paths.append(path)
+            mode.append(row[0])
+            status_code.append(row[1])
+            power.append(row[2])
+            cracking_time.append(row[3])
+            exit_code.append(row[4])
+            if row[5] is not None:
+                passwords[i] = row[5]
+            if row[6] is not None:
+                exit_info[i] = row[6]
+            if key is not None:
+                keys.append(key(path))
+
+        return cls(paths=parsed_paths,
+                   mode=np.array(mode, dtype=str),
+                   status_code=np.array(status_code, dtype=np.int32),
+                   power=np.array(power, dtype=np.int64),
+                   cracking_time=np.array(cracking_time, dtype=np.float64),
+                   exit_code=np.array(exit_code, dtype=np.int32),
+                   passwords=passwords, exit_info=exit_info,
+                   keys=None if keys is None else np.array(keys),
+                   errors=errors)
+
+    @classmethod
+    def from_directory(cls, root, key=None):
+        """
+        Parses all runner output files in directory tree (for example BOINC upload hierarchy)
+        :param root: path to directory
+        :param key: function, which returns group key (for example package id) from path
+        :return: RunnerOutputColumns
+        """
+        return cls.from_files(iter_files(root), key=key)
+
+    def select(self, mode=None, status_code=None):
+        """
+        :param mode: runner mode ("b", "n", ...) or None for all
+        :param status_code: status code or None for all
+        :return: boolean mask of rows
+        """
+        mask = np.ones(len(self), dtype=bool)
+        if mode is not None:
+            mask &= self.mode == mode
+        if status_code is not None:
+            mask &= self.status_code == status_code
+
+        return mask
+
+    def total_cracking_time(self, mask=None):
+        """
+        :param mask: boolean mask of rows or None for all rows
+        :return: sum of cracking time
+        """
+        times = self.cracking_time if mask is None else self.cracking_time[mask]
+        return float(np.nansum(times))
+
+    def cracking_time_by_key(self):
+        """
+        Sums cracking time for every group key
+        :return: dictionary {key: sum of cracking time}
+        """
+        if self.keys is None:
+            raise ValueError("RunnerOutputColumns were loaded without key function")
+
+        unique, inverse = np.unique(self.keys, return_inverse=True)
+        sums = np.bincount(inverse, weights=np.nan_to_num(self.cracking_time),
+                           minlength=len(unique))
+
+        return {k.item(): float(s) for k, s in zip(unique, sums)}
+
+    def power_distribution(self, bins=10):
+        """
+        Histogram of power of successful benchmarks
+        :param bins: number of bins or list of bin edges
+        :return: tuple (counts, bin edges)
+        """
+        power = self.power[self.select(mode="b", status_code=0)]
+        return np.histogram(power, bins=bins)
+
+
+def parse_runner_output(string):
+    """
+    Parses runner output the same way as fc_test_library.RunnerOutput
+    :param string: content of runner output file
+    :return: tuple (mode, status code, power, cracking time, exit code, password, exit info)
+    """
+    lines = string.split("\n")
+    mode = lines[0]
+    status_code = int(lines[1])
+    power = -1
+    cracking_time = np.nan
+    exit_code = -1
+    password = None
+    exit_info = None
+
+    if mode == "b":
+        if status_code == 0:
+            power = int(lines[2])
+            cracking_time = float(lines[3])
+        else:
+            exit_code = int(lines[2])
+            exit_info = lines[3]
+    elif mode == "n":
+        if status_code == 0:
+            password = lines[2]
+            cracking_time = float(lines[3])
+        elif status_code == 1:
+            cracking_time = float(lines[2])
+        else:
+            exit_code = int(lines[2])
+            exit_info = lines[3]
+
+    return mode, status_code, power, cracking_time, exit_code, password, exit_info
+
+
+def iter_files(root):
+    """
+    :param root: path to directory
+    :return: generator of paths to all files in directory tree
+    """
+    for entry in os.scandir(root):
+        if entry.is_dir(follow_symlinks=False):
+            yield from iter_files(entry.path)
+        elif entry.is_file():
+            yield entry.path
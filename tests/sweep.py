@@ -0,0 +1,358 @@
+"""
+Concurrent sweeps over grids of API parameters
+Requests of all combinations are sent by thread pool, responses are verified in main thread
+in order of completion, every combination is subtest and mismatches are printed immediately
+Combinations are full grid (exhaustive mode) or t-wise covering array of it (covering mode),
+run_sweeps runs sweep once for every mode of config.sweep
+Expected items come from CachedListing: rows of listing are loaded by one query per ordering,
+filters and pagination are applied in memory
+Order of rows with equal value of order_by column isn't defined by ORDER BY ... LIMIT of API,
+items of such tie group are compared regardless of order
+"""
+import itertools
+import sys
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+
+import api_client
+import config
+from api_response_models import ModelPrefetch, db_item_from_package, db_items_from_boinc_hosts
+from covering_array import covering_array, grid_size
+from database.service import session
+from fc_test_library import PackageStatus
+from src.database.models import FcHost, FcHostActivity, FcPackage, Host
+
+
+def grid(**params):
+    """
+    :param params: name of parameter -> list of values
+    :return: list of all combinations as dictionaries
+    """
+    names = list(params)
+    return [OrderedDict(zip(names, values)) for values in itertools.product(*params.values())]
+
+
+class Combinations(list):
+    """
+    List of combinations with mode, which created it, and size of full grid
+    """
+
+    def __init__(self, rows, mode, full_size, duration):
+        super().__init__(rows)
+        self.mode = mode
+        self.full_size = full_size
+        self.duration = duration
+
+    def __str__(self):
+        return "{} {} of {} combinations ({:.1%}) generated in {:.3f}s".format(
+            self.mode, len(self), self.full_size, len(self) / self.full_size if self.full_size
+            else 0, self.duration)
+
+
+def combinations(mode=None, strength=None, **params):
+    """
+    :param mode: "exhaustive" or "covering", default is first of config.sweep["modes"]
+    :param strength: strength of covering array, default is config.sweep["strength"]
+    :param params: name of parameter -> list of values
+    :return: Combinations
+    """
+    mode = mode or config.sweep["modes"][0]
+    start = time.perf_counter()
+    if mode == "exhaustive":
+        rows = grid(**params)
+    elif mode == "covering":
+        strength = strength or config.sweep["strength"]
+        rows = covering_array(strength, **params)
+        mode = "{}-wise".format(strength)
+    else:
+        raise ValueError("unknown sweep mode: " + str(mode))
+    return Combinations(rows, mode, grid_size(**params), time.perf_counter() - start)
+
+
+def like(value, pattern):
+    """
+    :return: True if value matches LIKE '%pattern%' in case insensitive collation
+    """
+    return value is not None and pattern.lower() in value.lower()
+
+
+def tie_value(value):
+    """
+    :return: value compared like by ORDER BY in case insensitive collation
+    """
+    return value.lower() if isinstance(value, str) else value
+
+
+class SweepResult:
+    """
+    Number of combinations, failed combinations and duration of sweep
+    """
+
+    def __init__(self, name, plan=None):
+        self.name = name
+        self.plan = plan
+        self.combinations = 0
+        self.failures = 0
+        self.errors = 0
+        self.duration = 0
+
+    def __str__(self):
+        result = "{}: {} combinations, {} failures, {} errors in {:.2f}s".format(
+            self.name, self.combinations, self.failures, self.errors, self.duration)
+        if self.plan is not None:
+            result += "\n    " + str(self.plan)
+        return result
+
+
+def run_sweep(test_case, combinations, exercise, verify, workers=None, name=None):
+    """
+    :param test_case: unittest.TestCase, every combination is its subtest
+    :param combinations: list of dictionaries with parameters or Combinations
+    :param exercise: function params -> response, called concurrently
+    :param verify: function (response, params), asserts expected response in main thread
+    :param workers: number of threads, default is config.api_client["workers"]
+    :param name: name in printed mismatches and result, default is id of test
+    :return: SweepResult
+    """
+    result = SweepResult(name or test_case.id(),
+                         combinations if isinstance(combinations, Combinations) else None)
+    workers = workers or config.api_client["workers"]
+    start = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(exercise, **params): params for params in combinations}
+        for future in as_completed(futures):
+            params = futures[future]
+            result.combinations += 1
+            with test_case.subTest(**params):
+                try:
+                    verify(future.result(), **params)
+                except AssertionError as e:
+                    result.failures += 1
+                    report_mismatch(result.name, params, e)
+                    raise
+                except Exception as e:
+                    result.errors += 1
+                    report_mismatch(result.name, params, e)
+                    raise
+
+    result.duration = time.perf_counter() - start
+    return result
+
+
+def run_sweeps(test_case, params, exercise, verify, modes=None):
+    """
+    Runs sweep of parameter grid once for every mode, every mode is subtest
+    :param params: dictionary name of parameter -> list of values
+    :param modes: list of modes, default is config.sweep["modes"]
+    :return: list of SweepResult, one for every mode
+    """
+    results = []
+    for mode in modes or config.sweep["modes"]:
+        with test_case.subTest(mode=mode):
+            plan = combinations(mode, **params)
+            results.append(run_sweep(test_case, plan, exercise, verify,
+                                     name="{} {}".format(test_case.id(), plan.mode)))
+    return results
+
+
+def report_mismatch(name, params, error):
+    message = str(error).splitlines()[0] if str(error) else type(error).__name__
+    print("{} {}: {}".format(name, dict(params), message[:200]), file=sys.stderr, flush=True)
+
+
+class CachedListing(ABC):
+    """
+    Expected content of paginated listing, rows are loaded once for every ordering and expected
+    items are built once for every row
+    Subclasses define entity, default_order and build_items, optionally base_query and matches
+    """
+    entity = None
+    default_order = None
+
+    def __init__(self):
+        self.orders = {}
+        self.items = {}
+
+    def base_query(self):
+        return session.query(self.entity)
+
+    def matches(self, row, **filters):
+        return True
+
+    @abstractmethod
+    def build_items(self, rows):
+        """
+        :param rows: rows without built items
+        :return: list of expected items in order of rows
+        """
+
+    def ordered(self, order_by="", descending=None):
+        """
+        :return: all rows in order of listing, None for unknown order_by
+        """
+        key = (order_by, bool(descending))
+        if key not in self.orders:
+            if order_by == "":
+                order = self.default_order
+            else:
+                order = getattr(self.entity, order_by, None)
+                if order is not None and descending:
+                    order = order.desc()
+            self.orders[key] = None if order is None else \
+                self.base_query().order_by(order).all()
+        return self.orders[key]
+
+    def filtered(self, order_by="", descending=None, **filters):
+        """
+        :return: rows matching filters in order of listing, None for unknown order_by
+        """
+        rows = self.ordered(order_by, descending)
+        if rows is None:
+            return None
+        return [row for row in rows if self.matches(row, **filters)]
+
+    def items_of(self, rows):
+        """
+        :return: expected items of rows, items are built only for rows without them
+        """
+        missing = [row for row in rows if row.id not in self.items]
+        if missing:
+            self.items.update(zip([row.id for row in missing], self.build_items(missing)))
+        return [self.items[row.id] for row in rows]
+
+    def page(self, page=1, per_page=25, order_by="", descending=None, **filters):
+        """
+        :return: (status code, expected items), items are None for error status
+        """
+        rows = self.filtered(order_by, descending, **filters)
+        if rows is None:
+            return 400, None
+
+        if len(rows) < (page - 1) * per_page:
+            return 404, None
+
+        return requests.codes.ok, self.items_of(rows[per_page * (page - 1):per_page * page])
+
+    def tie_groups(self, page=1, per_page=25, order_by="", descending=None, **filters):
+        """
+        Rows with equal value of order_by column (tie group) may be in any order on page and
+        group at boundary of page may be split between pages in any way
+        :return: list of (number of items of group on page, expected items of whole group) in
+        order of page, None when order is unique (default or id) or order_by is unknown
+        """
+        if order_by in ("", "id"):
+            return None
+        rows = self.filtered(order_by, descending, **filters)
+        if rows is None:
+            return None
+
+        start, stop = per_page * (page - 1), per_page * page
+        groups = []
+        position = 0
+        for _, group in itertools.groupby(rows, key=lambda row: tie_value(getattr(row, order_by))):
+            group = list(group)
+            on_page = min(position + len(group), stop) - max(position, start)
+            if on_page > 0:
+                groups.append((on_page, self.items_of(group)))
+            position += len(group)
+        return groups
+
+
+class HostListing(CachedListing):
+    """
+    /hosts/ and /jobs/<id>/host listings
+    """
+    entity = Host
+    default_order = Host.id.desc()
+
+    def __init__(self, package_id=None):
+        super().__init__()
+        self.package_id = package_id
+        self.prefetch = ModelPrefetch()
+        self.active = {i for (i,) in session.query(FcHostActivity.boinc_host_id).distinct()}
+
+    def base_query(self):
+        q = session.query(Host)
+        if self.package_id is not None:
+            q = q.filter(Host.id.in_(session.query(FcHost.boinc_host_id).filter(
+                FcHost.package_id == self.package_id)))
+        return q
+
+    def matches(self, row, name="", status=""):
+        if name != "" and not like(row.domain_name, name):
+            return False
+        if status == "active":
+            return row.id in self.active
+        if status == "inactive":
+            return row.id not in self.active
+        return True
+
+    def build_items(self, rows):
+        return db_items_from_boinc_hosts(rows, self.prefetch)
+
+
+class PackageListing(CachedListing):
+    """
+    /jobs/ listing
+    """
+    entity = FcPackage
+    default_order = FcPackage.id.desc()
+
+    def matches(self, row, name="", status="", attack_mode=""):
+        if name != "" and not like(row.name, name):
+            return False
+        if status != "" and row.status != PackageStatus[status].value:
+            return False
+        if attack_mode != "" and (row.attack or "").lower() != attack_mode.lower():
+            return False
+        return True
+
+    def build_items(self, rows):
+        return [db_item_from_package(row) for row in rows]
+
+
+def verify_page(test_case, api_r, listing, page=1, per_page=25, **params):
+    """
+    Asserts response of paginated listing against CachedListing
+    :param params: order_by, descending and filters of listing
+    """
+    if per_page == 0:
+        per_page = 25
+    if page == 0:
+        page = 1
+
+    api_r = api_client.check(api_r)
+    status, db_items = listing.page(page, per_page, **params)
+    test_case.assertEqual(status, api_r.status_code, api_r.text)
+    if db_items is None:
+        return
+
+    api_json = api_r.json()
+    test_case.assertEqual(api_json["per_page"], per_page)
+    test_case.assertEqual(api_json["page"], page)
+    api_items = api_json["items"]
+    test_case.assertLessEqual(len(api_items), per_page, "items count")
+    test_case.assertEqual(api_json["total"], len(api_items), "total count should be same as "
+                                                             "length of item list")
+
+    groups = listing.tie_groups(page, per_page, **params)
+    if groups is None:
+        test_case.assertEqual(db_items, api_items, "db items:\n" + str(db_items) +
+                              "\napi items:" + str(api_items))
+        return
+
+    test_case.assertEqual(len(db_items), len(api_items), "items count")
+    position = 0
+    for count, group_items in groups:
+        page_items = api_items[position:position + count]
+        for item in page_items:
+            test_case.assertIn(item, group_items, "item not in its tie group:\n" + str(item) +
+                               "\ndb items of group:\n" + str(group_items))
+        ids = [item["id"] for item in page_items]
+        test_case.assertEqual(len(ids), len(set(ids)), "repeated items: " + str(ids))
+        position += count
@@ -7,28 +7,36 @@ import unittest
 import requests
 from sqlalchemy import func
 
+import api_client
+import api_params
 import config
+import ref_cache
 from api_response_models import charset_model, rule_model, dict_model, package_model, \
-    db_item_from_boinc_host, db_item_from_package, json_from_collection_item, job_model, \
-    json_from_status
+    db_item_from_package, json_from_collection_item, json_from_status, \
+    db_item_from_boinc_host, db_items_from_boinc_hosts, job_model, job_models, package_models, \
+    ModelPrefetch
+from bulk_fixtures import BulkLoader
 from database.service import is_host_active, session, get_hosts_count, add_host, \
     get_bench_all_package, get_test_package, get_all_boinc_hosts, \
     get_all_charsets, ensure_test_package, add_charset, get_test_charset, get_all_rules, \
     get_test_rule, add_rule, get_all_dictionaries, get_test_dict, add_test_dict, get_all_packages, \
     get_package, set_attr, \
     delete_package, ensure_user, add_boinc_host, assign_host_to_package, get_active_boinc_hosts, \
-    get_jobs, add_job, get_rule_by_name, delete_record, get_charset_by_name, get_dict_by_name
+    get_jobs, add_job, get_rule_by_name, delete_record, get_charset_by_name, get_dict_by_name, \
+    add_package
 from fc_test_library import get_server_info, kill_all_modules_except, PackageStatus
+from query_profiler import QueryBudgetMixin
 from src.database.models import Host, FcHostActivity, FcPackage, FcHost
+from sweep import run_sweeps, verify_page, HostListing, PackageListing
 
 
-class TestAPIHashcat(unittest.TestCase):
+class TestAPIHashcat(QueryBudgetMixin, unittest.TestCase):
     def test_hc_attack_modes(self):
         file = open(config.in_files["API"]["attack_modes"])
         exp_attack_modes = json.loads(file.read())
         file.close()
 
-        api_r = requests.get(config.API['base'] + "/hashcat/attackModes")
+        api_r = api_client.get(config.API['base'] + "/hashcat/attackModes")
 
         self.assertEqual(requests.codes.ok, api_r.status_code)
         self.assertEqual(exp_attack_modes, api_r.json())
@@ -38,7 +46,7 @@ class TestAPIHashcat(unittest.TestCase):
         exp_hash_types = json.loads(file.read())
         file.close()
 
-        api_r = requests.get(config.API['base'] + "/hashcat/hashTypes")
+        api_r = api_client.get(config.API['base'] + "/hashcat/hashTypes")
         self.assertEqual(requests.codes.ok, api_r.status_code, api_r.text)
         self.assertEqual(exp_hash_types, api_r.json())
 
@@ -46,13 +54,13 @@ class TestAPIHashcat(unittest.TestCase):
 wasSuccessful = True
 
 
-class TestAPIHosts(unittest.TestCase):
-    name_list = ["", "test", "green rabbit"]
-    page_list = [1, 2]
-    status_list = ["", "active", "inactive"]
-    order_list = ["", "domain_name", "os_name", "p_model", "time", "status"]
-    desc_list = [None, False, True]
-    per_page_list = [0, 10, 25, 50, 100]
+class TestAPIHosts(QueryBudgetMixin, unittest.TestCase):
+    name_list = api_params.hosts["name"]
+    page_list = api_params.hosts["page"]
+    status_list = api_params.hosts["status"]
+    order_list = api_params.hosts["order_by"]
+    desc_list = api_params.hosts["descending"]
+    per_page_list = api_params.hosts["per_page"]
 
     @classmethod
     def setUpClass(cls):
@@ -61,24 +69,16 @@ class TestAPIHosts(unittest.TestCase):
         to_add = 120 - count
         test_package = ensure_test_package()
         bench_package = get_bench_all_package()
-        add_host(test_package.id, count=int(to_add / 2))
-        add_host(bench_package.id, count=int(to_add / 2))
+        loader = BulkLoader(seed=42)
+        loader.load_hosts(test_package.id, int(to_add / 2))
+        loader.load_hosts(bench_package.id, int(to_add / 2))
 
-    @unittest.skipUnless(False, "Every other test case in class passed")
     def test_x_hosts_all_params(self):
-        for page in self.page_list:
-            for status in self.status_list:
-                for order_by in self.order_list:
-                    for desc in self.desc_list:
-                        for per_page in self.per_page_list:
-                            for name in self.name_list:
-                                with self.subTest(page=page, status=status, per_page=per_page,
-                                                  name=name, order_by=order_by, descending=desc):
-                                    api_r = self.exercise_hosts(page, status, per_page=per_page,
-                                                                name=name, order_by=order_by,
-                                                                descending=desc)
-                                    self.verify_hosts(api_r, page, status, per_page=per_page,
-                                                      name=name, order_by=order_by, descending=desc)
+        listing = HostListing()
+        for result in run_sweeps(self, api_params.hosts, self.exercise_hosts,
+                                 lambda api_r, **params: verify_page(self, api_r, listing,
+                                                                     **params)):
+            print(result)
 
     def test_hosts_page(self):
         for page in self.page_list:
@@ -124,17 +124,17 @@ class TestAPIHosts(unittest.TestCase):
             "inactiveHosts": inactive_hosts
         }
 
-        api_r = requests.get(config.API['base'] + "/hosts/info")
+        api_r = api_client.get(config.API['base'] + "/hosts/info")
         self.assertEqual(requests.codes.ok, api_r.status_code, api_r.text)
         self.assertEqual(expected_json, api_r.json())
 
     def test_hosts(self):
         hosts = get_all_boinc_hosts()
-        for host in hosts:
+        responses = api_client.fetch_all(config.API["base"] + "/hosts/" + str(host.id)
+                                         for host in hosts)
+        for host, expected_json, api_r in zip(hosts, db_items_from_boinc_hosts(hosts), responses):
             with self.subTest(host_id=host.id):
-                expected_json = db_item_from_boinc_host(host)
-
-                api_r = requests.get(config.API["base"] + "/hosts/" + str(host.id))
+                api_r = api_client.check(api_r)
 
                 self.assertEqual(requests.codes.ok, api_r.status_code, api_r.text)
                 self.assertEqual(expected_json, api_r.json())
@@ -163,7 +163,7 @@ class TestAPIHosts(unittest.TestCase):
                 return
 
             if descending:
-                order_by.desc()
+                order_by = order_by.desc()
 
             q = q.order_by(order_by)
         else:
@@ -176,8 +176,7 @@ class TestAPIHosts(unittest.TestCase):
         hosts = q.offset(per_page * (page - 1)).limit(per_page).all()
         self.assertEqual(requests.codes.ok, api_r.status_code, api_r.text)
 
-        for host in hosts:
-            db_items.append(db_item_from_boinc_host(host))
+        db_items += db_items_from_boinc_hosts(hosts)
 
         api_json = api_r.json()
         self.assertEqual(api_json["per_page"], per_page)
@@ -211,14 +210,14 @@ class TestAPIHosts(unittest.TestCase):
         if descending is not None:
             params["descending"] = descending
 
-        api_r = requests.get(config.API["base"] + "/hosts/", params=params)
+        api_r = api_client.get(config.API["base"] + "/hosts/", params=params)
 
         return api_r
 
 
-class TestAPIServerInfo(unittest.TestCase):
+class TestAPIServerInfo(QueryBudgetMixin, unittest.TestCase):
     def test_server_info(self):
-        api_r = requests.get(config.API['base'] + "/serverInfo/info")
+        api_r = api_client.get(config.API['base'] + "/serverInfo/info")
         self.assertEqual(requests.codes.ok, api_r.status_code, api_r.text)
 
         info = get_server_info()
@@ -230,28 +229,28 @@ class TestAPIServerInfo(unittest.TestCase):
         # TODO: better controls tests
         kill_all_modules_except()
 
-        api_r = requests.get(config.API['base'] + "/serverInfo/control?operation=start")
+        api_r = api_client.get(config.API['base'] + "/serverInfo/control?operation=start")
         self.assertEqual(requests.codes.ok, api_r.status_code, api_r.text)
         info = get_server_info()
         for subsystems in info["subsystems"]:
             for name in iter(subsystems):
                 self.assertTrue(subsystems[name])
 
-        api_r = requests.get(config.API['base'] + "/serverInfo/control?operation=restart")
+        api_r = api_client.get(config.API['base'] + "/serverInfo/control?operation=restart")
         self.assertEqual(requests.codes.ok, api_r.status_code, api_r.text)
         info = get_server_info()
         for subsystems in info["subsystems"]:
             for name in iter(subsystems):
                 self.assertTrue(subsystems[name])
 
-        api_r = requests.get(config.API['base'] + "/serverInfo/control?operation=stop")
+        api_r = api_client.get(config.API['base'] + "/serverInfo/control?operation=stop")
         self.assertEqual(requests.codes.ok, api_r.status_code, api_r.text)
         info = get_server_info()
         for subsystems in info["subsystems"]:
             for name in iter(subsystems):
                 self.assertFalse(subsystems[name])
 
-        api_r = requests.get(config.API['base'] + "/serverInfo/control?operation=restart")
+        api_r = api_client.get(config.API['base'] + "/serverInfo/control?operation=restart")
         self.assertEqual(requests.codes.ok, api_r.status_code, api_r.text)
         info = get_server_info()
         for subsystems in info["subsystems"]:
@@ -259,7 +258,7 @@ class TestAPIServerInfo(unittest.TestCase):
                 self.assertTrue(subsystems[name])
 
 
-class TestAPICharsets(unittest.TestCase):
+class TestAPICharsets(QueryBudgetMixin, unittest.TestCase):
     def setUp(self):
         charset = get_test_charset()
         if charset is None:
@@ -284,7 +283,7 @@ class TestAPICharsets(unittest.TestCase):
 
         db_items = sorted(db_items, key=lambda item: item["id"])
 
-        api_r = requests.get(config.API["base"] + "/charset")
+        api_r = api_client.get(config.API["base"] + "/charset")
         self.assertEqual(requests.codes.ok, api_r.status_code, api_r.text)
 
         api_items = api_r.json()["items"]
@@ -294,9 +293,11 @@ class TestAPICharsets(unittest.TestCase):
 
     def test_charset(self):
         charsets = get_all_charsets()
-        for charset in charsets:
+        responses = api_client.fetch_all(config.API["base"] + "/charset/" + str(charset.id)
+                                         for charset in charsets)
+        for charset, api_r in zip(charsets, responses):
             with self.subTest(charset_id=charset.id):
-                api_r = requests.get(config.API["base"] + "/charset/" + str(charset.id))
+                api_r = api_client.check(api_r)
                 self.assertEqual(requests.codes.ok, api_r.status_code, api_r.text)
                 self.assertEqual(api_r.json(), charset_model(charset))
 
@@ -307,15 +308,15 @@ class TestAPICharsets(unittest.TestCase):
         new_data = old_data + "?l?l"
         json_charset["data"] = new_data
 
-        api_r = requests.post(config.API["base"] + "/charset/" + str(json_charset["id"]) +
-                              "/update", {"newCharset": new_data})
+        api_r = api_client.post(config.API["base"] + "/charset/" + str(json_charset["id"]) +
+                                "/update", {"newCharset": new_data})
         self.assertEqual(requests.codes.ok, api_r.status_code, api_r.text)
         self.assertEqual(True, api_r.json()["status"])
 
     def test_download_charset(self):
         test_charset = get_test_charset()
         json_charset = charset_model(test_charset)
-        api_r = requests.get(config.API["base"] + "/charset/" + str(test_charset.id) + "download")
+        api_r = api_client.get(config.API["base"] + "/charset/" + str(test_charset.id) + "download")
         self.assertEqual(requests.codes.ok, api_r.status_code, api_r.text)
         self.assertEqual(json_charset, api_r.json())
 
@@ -334,13 +335,13 @@ class TestAPICharsets(unittest.TestCase):
             f.write("?a?a?a")
 
         f = open(name, "rb")
-        api_r = requests.post(config.API["base"] + "/charset", files={"file": f})
+        api_r = api_client.post(config.API["base"] + "/charset", files={"file": f})
         f.close()
         self.assertEqual(requests.codes.ok, api_r.status_code, api_r.text)
         self.assertTrue(api_r.json()["status"])
 
 
-class TestAPIRules(unittest.TestCase):
+class TestAPIRules(QueryBudgetMixin, unittest.TestCase):
     url = config.API["base"] + "/rule/"
 
     def setUp(self):
@@ -367,7 +368,7 @@ class TestAPIRules(unittest.TestCase):
 
         db_items = sorted(db_items, key=lambda item: item["id"])
 
-        api_r = requests.get(config.API["base"] + "/rule")
+        api_r = api_client.get(config.API["base"] + "/rule")
         self.assertEqual(requests.codes.ok, api_r.status_code, api_r.text)
 
         api_items = api_r.json()["items"]
@@ -377,10 +378,12 @@ class TestAPIRules(unittest.TestCase):
 
     def test_rule(self):
         rules = get_all_rules()
-        for rule in rules:
+        responses = api_client.fetch_all(config.API["base"] + "/rule/" + str(rule.id)
+                                         for rule in rules)
+        for rule, api_r in zip(rules, responses):
             with self.subTest(rule_id=rule.id):
                 model = rule_model(rule)
-                api_r = requests.get(config.API["base"] + "/rule/" + str(rule.id))
+                api_r = api_client.check(api_r)
                 self.assertEqual(requests.codes.ok, api_r.status_code, api_r.text)
                 self.assertEqual(model, api_r.json(), "model:" + str(model) +
                                  "\napi:" + str(api_r.json()))
@@ -399,7 +402,7 @@ class TestAPIRules(unittest.TestCase):
             f.write("c")
 
         f = open(name, "rb")
-        api_r = requests.post(self.url, files={"file": f})
+        api_r = api_client.post(self.url, files={"file": f})
         f.close()
         self.assertEqual(requests.codes.ok, api_r.status_code, api_r.text)
         self.assertTrue(api_r.json()["status"])
@@ -410,20 +413,20 @@ class TestAPIRules(unittest.TestCase):
         new_data = "c"
         json_rule["data"] = new_data
 
-        api_r = requests.post(config.API["base"] + "/rule/" + str(json_rule["id"]) +
-                              "/update", {"newRule": new_data})
+        api_r = api_client.post(config.API["base"] + "/rule/" + str(json_rule["id"]) +
+                                "/update", {"newRule": new_data})
         self.assertEqual(requests.codes.ok, api_r.status_code, api_r.text)
         self.assertEqual(True, api_r.json()["status"])
 
     def test_download_rule(self):
         test_rule = get_test_rule()
         json_rule = rule_model(test_rule)
-        api_r = requests.get(config.API["base"] + "/rule/" + str(test_rule.id) + "download")
+        api_r = api_client.get(config.API["base"] + "/rule/" + str(test_rule.id) + "download")
         self.assertEqual(requests.codes.ok, api_r.status_code, api_r.text)
         self.assertEqual(json_rule, api_r.json())
 
 
-class TestAPIDictionary(unittest.TestCase):
+class TestAPIDictionary(QueryBudgetMixin, unittest.TestCase):
     url = config.API["base"] + "/dictionary/"
 
     def setUp(self):
@@ -439,7 +442,7 @@ class TestAPIDictionary(unittest.TestCase):
 
         db_items = sorted(db_items, key=lambda item: item["id"])
 
-        api_r = requests.get(self.url)
+        api_r = api_client.get(self.url)
         self.assertEqual(requests.codes.ok, api_r.status_code, api_r.text)
 
         api_items = api_r.json()["items"]
@@ -451,7 +454,7 @@ class TestAPIDictionary(unittest.TestCase):
         test_dict = get_test_dict()
         expected_json = dict_model(test_dict)
 
-        api_r = requests.get(self.url + str(test_dict.id))
+        api_r = api_client.get(self.url + str(test_dict.id))
         self.assertEqual(requests.codes.ok, api_r.status_code, api_r.text)
         self.assertEqual(expected_json, api_r.json())
 
@@ -469,26 +472,26 @@ class TestAPIDictionary(unittest.TestCase):
             f.write("c")
 
         f = open(name, "rb")
-        api_r = requests.post(self.url, files={"file": f})
+        api_r = api_client.post(self.url, files={"file": f})
         f.close()
         self.assertEqual(requests.codes.ok, api_r.status_code, api_r.text)
         self.assertTrue(api_r.json()["status"])
 
 
-class TestAPIPackage(unittest.TestCase):
+class TestAPIPackage(QueryBudgetMixin, unittest.TestCase):
     url = config.API["base"] + "/jobs/"
 
     maxDiff = None
 
-    package_status_list = [s.name for s in PackageStatus]
+    package_status_list = api_params.package_status_list
     # package_status_list.append("yellow")
-    host_status_list = ["", "active", "inactive", "something"]
-    order_list = ["", "name", "time", "progress", "attack_mode", "status", "weight_of_sun"]
-    attack_mode_list = ["", "dict", "brute", "biggest"]
-    name_list = ["", "Test", "blue_bear"]
-    page_list = [1, 2]
-    per_page_list = [10, 25, 50, 100]
-    desc_list = [None, False, True]
+    host_status_list = api_params.package_hosts["status"]
+    order_list = api_params.packages["order_by"]
+    attack_mode_list = api_params.packages["attack_mode"]
+    name_list = api_params.packages["name"]
+    page_list = api_params.packages["page"]
+    per_page_list = api_params.packages["per_page"]
+    desc_list = api_params.packages["descending"]
 
     def setUp(self):
         ensure_test_package()
@@ -508,11 +511,10 @@ class TestAPIPackage(unittest.TestCase):
 
     def test_package(self):
         packages = get_all_packages()
-        for p in packages:
+        responses = api_client.fetch_all(self.url + str(p.id) for p in packages)
+        for p, expected_json, api_r in zip(packages, package_models(packages), responses):
             with self.subTest(package_id=p.id):
-                expected_json = package_model(p)
-
-                api_r = requests.get(self.url + str(p.id))
+                api_r = api_client.check(api_r)
 
                 self.assertEqual(requests.codes.ok, api_r.status_code, api_r.text)
                 self.assertEqual(expected_json, api_r.json(), "expected:" + str(expected_json) +
@@ -566,7 +568,7 @@ class TestAPIPackage(unittest.TestCase):
         json_package["seconds_per_job"] = int(json_package["seconds_per_job"])
         json_package["comment"] = "test comment"
 
-        api_r = requests.post(self.url, json=json_package)
+        api_r = api_client.post(self.url, json=json_package)
         self.assertEqual(requests.codes.ok, api_r.status_code, api_r.text)
 
     def test_package_info(self):
@@ -576,7 +578,7 @@ class TestAPIPackage(unittest.TestCase):
         for status in statuses:
             expected.append(json_from_status(status))
 
-        api_r = requests.get(self.url + "info")
+        api_r = api_client.get(self.url + "info")
         self.assertEqual(requests.codes.ok, api_r.status_code, api_r.text)
         self.assertEqual(expected, api_r.json())
 
@@ -586,7 +588,7 @@ class TestAPIPackage(unittest.TestCase):
             "hash": h,
             "hashtype": 0
         }
-        api_r = requests.get(self.url + "verifyHash", params=params)
+        api_r = api_client.get(self.url + "verifyHash", params=params)
         self.assertEqual(requests.codes.ok, api_r.status_code, api_r.text)
         self.assertEqual(h, api_r.json()["hash"])
         self.assertTrue(api_r.json()["result"])
@@ -597,7 +599,7 @@ class TestAPIPackage(unittest.TestCase):
             "hash": h,
             "hashtype": 49000
         }
-        api_r = requests.get(self.url + "verifyHash", params=params)
+        api_r = api_client.get(self.url + "verifyHash", params=params)
         self.assertEqual(requests.codes.ok, api_r.status_code, api_r.text)
         self.assertEqual(h, api_r.json()["hash"])
         self.assertFalse(api_r.json()["result"])
@@ -606,7 +608,7 @@ class TestAPIPackage(unittest.TestCase):
         test_package = ensure_test_package()
         test_package_id = test_package.id
 
-        api_r = requests.delete(self.url + str(test_package_id))
+        api_r = api_client.delete(self.url + str(test_package_id))
         self.assertEqual(204, api_r.status_code, api_r.text)
         session.expire(test_package)
         package = get_package(test_package_id)
@@ -622,7 +624,7 @@ class TestAPIPackage(unittest.TestCase):
             package_id += 1
             package = get_package(package_id)
 
-        api_r = requests.delete(self.url + str(package_id))
+        api_r = api_client.delete(self.url + str(package_id))
         self.assertEqual(404, api_r.status_code, api_r.text)
         count = len(get_all_packages())
         self.assertEqual(old_count, count)
@@ -630,7 +632,8 @@ class TestAPIPackage(unittest.TestCase):
     def test_package_start(self):
         package = ensure_test_package()
         set_attr(package, "status", 0)
-        api_r = requests.get(self.url + str(package.id) + "/action", params={"operation": "start"})
+        api_r = api_client.get(self.url + str(package.id) + "/action",
+                               params={"operation": "start"})
         self.assertEqual(requests.codes.ok, api_r.status_code, api_r.text)
         session.expire(package)
         self.assertEqual(10, package.status)
@@ -638,7 +641,7 @@ class TestAPIPackage(unittest.TestCase):
     def test_package_stop(self):
         package = ensure_test_package()
         set_attr(package, "status", 10)
-        api_r = requests.get(self.url + str(package.id) + "/action", params={"operation": "stop"})
+        api_r = api_client.get(self.url + str(package.id) + "/action", params={"operation": "stop"})
         self.assertEqual(requests.codes.ok, api_r.status_code, api_r.text)
         session.expire(package)
         self.assertEqual(0, package.status)
@@ -650,7 +653,7 @@ class TestAPIPackage(unittest.TestCase):
             "operation": "restart"
         }
 
-        api_r = requests.get(self.url + str(package.id) + "/action", params=params)
+        api_r = api_client.get(self.url + str(package.id) + "/action", params=params)
         self.assertEqual(requests.codes.ok, api_r.status_code, api_r.text)
         session.expire(package)
         self.assertEqual(10, package.status)
@@ -660,16 +663,23 @@ class TestAPIPackage(unittest.TestCase):
         api_r = self.exercise_package_hosts(package_id)
         self.verify_package_hosts(api_r, package_id)
 
-    def test_package_hosts_page(self):
-        package_id = get_test_package().id
-        # 3 pages(per page default is 25):
-        #           -> 1 full,
-        #           -> 1 half full
-        #           -> 1 empty
+    @staticmethod
+    def add_page_hosts(package_id):
+        """
+        Adds 28 hosts to package, one of them is active
+        3 pages (per page default is 25):
+            -> 1 full,
+            -> 1 half full
+            -> 1 empty
+        """
         for i in range(0, 27):
             add_host(package_id)
         host = add_host(package_id)
         assign_host_to_package(host.boinc_host_id, package_id)
+
+    def test_package_hosts_page(self):
+        package_id = get_test_package().id
+        self.add_page_hosts(package_id)
         for page in self.page_list:
             with self.subTest(page=page):
                 api_r = self.exercise_package_hosts(package_id, page=page)
@@ -747,7 +757,7 @@ class TestAPIPackage(unittest.TestCase):
         new_hosts_ids = [b_host1.id, b_host2.id]
         params = {"newHost_ids": new_hosts_ids}
 
-        api_r = requests.post(self.url + str(package.id) + "/host", json=params)
+        api_r = api_client.post(self.url + str(package.id) + "/host", json=params)
         self.assertEqual(requests.codes.ok, api_r.status_code, api_r.text)
         self.assertEqual(True, api_r.json()["status"])
 
@@ -767,6 +777,25 @@ class TestAPIPackage(unittest.TestCase):
                     api_r = self.exercise_package_jobs(package.id, page=page, per_page=per_page)
                     self.verify_package_jobs(api_r, package.id, page=page, per_page=per_page)
 
+    def test_x_packages_all_params(self):
+        listing = PackageListing()
+        for result in run_sweeps(self, api_params.packages, self.exercise_packages,
+                                 lambda api_r, **params: verify_page(self, api_r, listing,
+                                                                     **params)):
+            print(result)
+
+    def test_x_package_hosts_all_params(self):
+        package_id = get_test_package().id
+        self.add_page_hosts(package_id)
+
+        listing = HostListing(package_id)
+        for result in run_sweeps(self, api_params.package_hosts,
+                                 lambda **params: self.exercise_package_hosts(package_id,
+                                                                              **params),
+                                 lambda api_r, **params: verify_page(self, api_r, listing,
+                                                                     **params)):
+            print(result)
+
     def exercise_packages(self, page, per_page=25, status="", order_by="", name="",
                           attack_mode="", descending=None):
         params = {
@@ -791,7 +820,7 @@ class TestAPIPackage(unittest.TestCase):
         if descending is not None:
             params["descending"] = descending
 
-        api_r = requests.get(self.url, params=params)
+        api_r = api_client.get(self.url, params=params)
 
         return api_r
 
@@ -861,7 +890,7 @@ class TestAPIPackage(unittest.TestCase):
         if per_page != 0:
             params["per_page"] = per_page
 
-        api_r = requests.get(self.url + str(package_id) + "/job", params)
+        api_r = api_client.get(self.url + str(package_id) + "/job", params)
 
         return api_r
 
@@ -872,7 +901,7 @@ class TestAPIPackage(unittest.TestCase):
             per_page = 25
 
         jobs = get_jobs(package_id)
-        db_items = [job_model(job) for job in jobs]
+        db_items = job_models(jobs)
 
         if len(db_items) < per_page * (page - 1):
             self.assertEqual(404, api_r.status_code, api_r.text)
@@ -911,7 +940,7 @@ class TestAPIPackage(unittest.TestCase):
         if descending is not None:
             params["descending"] = descending
 
-        api_r = requests.get(self.url + str(package_id) + "/host", params=params)
+        api_r = api_client.get(self.url + str(package_id) + "/host", params=params)
         return api_r
 
     def verify_package_hosts(self, api_r, package_id, page=1, per_page=25, name="", status="",
@@ -939,7 +968,7 @@ class TestAPIPackage(unittest.TestCase):
                 return
 
             if descending:
-                order_by.desc()
+                order_by = order_by.desc()
 
             q = q.order_by(order_by)
         else:
@@ -952,8 +981,7 @@ class TestAPIPackage(unittest.TestCase):
         hosts = q.offset(per_page * (page - 1)).limit(per_page).all()
         self.assertEqual(requests.codes.ok, api_r.status_code, api_r.text)
 
-        for host in hosts:
-            db_items.append(db_item_from_boinc_host(host))
+        db_items += db_items_from_boinc_hosts(hosts)
 
         api_json = api_r.json()
         self.assertEqual(api_json["per_page"], per_page)
@@ -968,6 +996,183 @@ class TestAPIPackage(unittest.TestCase):
                          str([i for i in db_items]) + "\napi items:" + str([i for i in api_items]))
 
 
+class TestAPIResponseModels(unittest.TestCase):
+    """
+    Batch builders of expected models give same dictionaries as single item builders
+    """
+    maxDiff = None
+
+    def setUp(self):
+        user = ensure_user()
+        self.package = add_package(name="response models with hosts")
+        self.empty_package = add_package(name="response models without hosts")
+        # active host, inactive host with fc_host and host without fc_host
+        self.boinc_hosts = [add_boinc_host(user.id) for _ in range(3)]
+        for boinc_host in self.boinc_hosts[:2]:
+            host = add_host(self.package.id)
+            set_attr(host, "boinc_host_id", boinc_host.id)
+        assign_host_to_package(self.boinc_hosts[0].id, self.package.id)
+
+        add_job(self.package.id)
+        for job in get_jobs(self.package.id):
+            set_attr(job, "boinc_host_id", self.boinc_hosts[0].id)
+
+    def tearDown(self):
+        for package in (self.package, self.empty_package):
+            delete_package(package.id)
+        for boinc_host in self.boinc_hosts:
+            session.delete(boinc_host)
+        session.commit()
+
+    def test_boinc_hosts(self):
+        hosts = get_all_boinc_hosts()
+        prefetch = ModelPrefetch()
+        self.assertEqual([db_item_from_boinc_host(h) for h in hosts],
+                         db_items_from_boinc_hosts(hosts, prefetch))
+
+        active = [is_host_active(h.id) for h in hosts]
+        self.assertIn(True, active)
+        self.assertIn(False, active)
+        self.assertEqual(active, [h.id in prefetch.active for h in hosts])
+
+    def test_packages(self):
+        packages = [self.package, self.empty_package] + get_all_packages()
+        expected = [package_model(p) for p in packages]
+        self.assertNotEqual([], expected[0]["hosts"])
+        self.assertEqual([], expected[1]["hosts"])
+        self.assertEqual(expected, package_models(packages))
+        self.assertEqual([h.id for h in get_active_boinc_hosts(self.package.id)],
+                         [h.id for h in ModelPrefetch().load_package_hosts(
+                             [self.package.id])[self.package.id]])
+
+    def test_jobs(self):
+        jobs = get_jobs(self.package.id)
+        self.assertNotEqual([], jobs)
+        self.assertEqual([job_model(j) for j in jobs], job_models(jobs))
+
+
+class TestRefCache(unittest.TestCase):
+    """
+    Cache of reference rows used by expected models
+    """
+
+    def setUp(self):
+        self.loaded = []
+        self.cache = ref_cache.LRUCache("test", self.load, maxsize=2)
+
+    def load(self, key):
+        # stub of get_boinc_host, only positive ids exist
+        self.loaded.append(key)
+        if key is None or key <= 0:
+            return None
+        return Host(id=key, domain_name="host " + str(key))
+
+    def test_eviction_order(self):
+        for key in (1, 2, 1, 3):
+            self.cache.get(key)
+
+        # 2 is least recently used, 1 was used again before 3 came
+        self.assertEqual([1, 3], list(self.cache.entries))
+        self.assertEqual(1, self.cache.evictions)
+        self.assertEqual("host 2", self.cache.get(2).domain_name)
+        self.assertEqual([1, 2, 3, 2], self.loaded)
+        self.assertEqual([3, 2], list(self.cache.entries))
+
+    def test_hits_misses(self):
+        self.assertEqual("host 1", self.cache.get(1).domain_name)
+        self.assertEqual("host 1", self.cache.get(1).domain_name)
+        # missing rows are loaded every time, None is cached
+        self.assertIsNone(self.cache.get(-1))
+        self.assertIsNone(self.cache.get(-1))
+        self.assertIsNone(self.cache.get(None))
+        self.assertIsNone(self.cache.get(None))
+
+        self.assertEqual(2, self.cache.hits)
+        self.assertEqual(4, self.cache.misses)
+        self.assertAlmostEqual(2 / 6, self.cache.hit_ratio)
+        self.assertEqual([1, -1, -1, None], self.loaded)
+
+    def test_invalidate(self):
+        self.cache.get(1)
+        self.cache.get(2)
+        self.cache.invalidate(1)
+        self.cache.invalidate(42)
+        self.assertEqual([2], list(self.cache.entries))
+        self.cache.invalidate()
+        self.assertEqual([], list(self.cache.entries))
+        self.assertEqual(2, self.cache.invalidations)
+
+    def test_invalidate_on_flush(self):
+        cache = ref_cache.caches["host"]
+        boinc_host = add_boinc_host(ensure_user().id)
+        boinc_host_id = boinc_host.id
+        try:
+            cache.get(boinc_host_id)
+            self.assertIn(boinc_host_id, cache.entries)
+
+            set_attr(boinc_host, "domain_name", "ref cache renamed")
+            self.assertNotIn(boinc_host_id, cache.entries)
+            self.assertEqual("ref cache renamed", cache.get(boinc_host_id).domain_name)
+        finally:
+            session.delete(boinc_host)
+            session.commit()
+        self.assertNotIn(boinc_host_id, cache.entries)
+
+    def test_invalidate_on_rollback(self):
+        cache = ref_cache.caches["host"]
+        boinc_host = add_boinc_host(ensure_user().id)
+        try:
+            cache.get(boinc_host.id)
+            self.assertIn(boinc_host.id, cache.entries)
+            session.rollback()
+            self.assertEqual([], list(cache.entries))
+        finally:
+            session.delete(boinc_host)
+            session.commit()
+
+
+class TestQueryBudget(QueryBudgetMixin, unittest.TestCase):
+    """
+    Query budgets fail tests, which execute more statements
+    """
+
+    def test_max_queries(self):
+        with self.assertMaxQueries(1):
+            get_all_charsets()
+
+    def test_max_queries_exceeded(self):
+        with self.assertRaises(self.failureException) as cm:
+            with self.assertMaxQueries(1):
+                get_all_charsets()
+                get_all_charsets()
+        self.assertIn("2 queries, budget is 1", str(cm.exception))
+
+    def test_query_budget_exceeded(self):
+        class OverBudget(QueryBudgetMixin, unittest.TestCase):
+            query_budget = 0
+
+            def test_query(self):
+                get_all_charsets()
+
+        result = unittest.TestResult()
+        OverBudget("test_query").run(result)
+        self.assertEqual([], result.errors)
+        self.assertEqual(1, len(result.failures))
+        self.assertIn("1 queries, budget is 0", result.failures[0][1])
+
+
+def setUpModule():
+    # server changes charsets, dictionaries, hosts and users without session of tests
+    api_client.change_listeners.append(ref_cache.invalidate_all)
+
+
+def tearDownModule():
+    api_client.change_listeners.remove(ref_cache.invalidate_all)
+    api_client.close()
+    if config.ref_cache["enabled"] and config.ref_cache["report"]:
+        print(ref_cache.report())
+
+
 # runs all tests in this file if file is run as normal python script
 if __name__ == '__main__':
     sys.stdout = open('API_tests_output.txt', 'w')
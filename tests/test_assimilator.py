@@ -1,20 +1,23 @@
 #!/usr/bin/python3
-import os
-import subprocess
 import sys
 import unittest
-from shutil import copy
-from time import sleep
-from xml.etree import ElementTree as Et
 
+from bench_utils import print_latency_report
+from boinc_dir_hier import stage_file
 from database.service import *
-from fc_test_library import is_running, make_run_only, start_daemons, RunnerOutput
+from db_isolation import IsolatedTestMixin
+from db_teardown import delete_assimilator_data
+from fc_test_library import is_running, make_run_only, restore_daemons, isolation_stats, \
+    RunnerOutput
+from result_xml import render_result_xml
 from src.database.models import FcHashcache
+from waiting import fresh, wait_stats, wait_until
 
 
-class TestAssimilator(unittest.TestCase):
+class TestAssimilator(IsolatedTestMixin, unittest.TestCase):
     """
     Class for testing assimilator
+    Tables changed by tests and assimilator are restored from snapshot after every test
     """
     package_id = 0
     tested_module = "sample_assimilator"
@@ -24,6 +27,7 @@ class TestAssimilator(unittest.TestCase):
 
     @classmethod
     def setUpClass(cls):
+        super().setUpClass()
         cls.delete_all()
         delete_all_packages_except_bench_all()
 
@@ -40,9 +44,14 @@ class TestAssimilator(unittest.TestCase):
         # delete_all_packages_except_bench_all()
 
         # start all daemons after all tests are done
-        start_daemons()
+        restore_daemons()
+        isolation_stats.report(cls.__name__)
+        wait_stats.report(cls.__name__)
+        print_latency_report(cls.__name__ + " database restore", cls.restore_times)
+        super().tearDownClass()
 
     def setUp(self):
+        super().setUp()
         self.wu_id = add_workunit().id
         self.canonical_res = add_result(self.wu_id)
         make_run_only(self.tested_module)
@@ -53,8 +62,8 @@ class TestAssimilator(unittest.TestCase):
             self.package_id = add_package().id
 
     def tearDown(self):
-        pass
-        # self.delete_all()
+        # workunits, results and changes made by assimilator are rolled back
+        super().tearDown()
 
     def test_bench_all_exists(self):
         """
@@ -168,100 +177,29 @@ class TestAssimilator(unittest.TestCase):
     def delete_all(cls):
         """
         deletes all lines from workunit and result tables
+        :return: TeardownReport
         """
-        host = get_host(cls.package_id)
-        if host is not None:
-            session.delete(host)
-
-        wus = session.query(WorkUnit)
-        for wu in wus:
-            session.delete(wu)
-
-        results = session.query(Result)
-        for result in results:
-            session.delete(result)
-
-        jobs = session.query(FcJob)
-        for job in jobs:
-            session.delete(job)
-
-        hosts = session.query(FcHost)
-        for host in hosts:
-            session.delete(host)
-
-        graphs = session.query(FcPackageGraph)
-        for graph in graphs:
-            session.delete(graph)
-
-        caches = session.query(FcHashcache)
-        for cache in caches:
-            session.delete(cache)
-
-        session.commit()
+        return delete_assimilator_data()
 
     @staticmethod
     def xml_doc_in(filename):
         """
-        Create a xml file from template and modify it to contains path to
-        filename in boinc directory hierarchy
+        Creates xml_doc_in of result from template, it contains path to filename in boinc
+        directory hierarchy
         :param filename:
-        :return: binary string of newly created file
+        :return: binary string of xml document
         """
-        tree = Et.parse(config.template["app_out"])
-        root = tree.getroot()
-
-        file_info = root.find("file_info")
-        name_el = file_info.find("name")
-        for child in name_el:
-            name_el.remove(child)
-        name_el.text = filename
-
-        url_el = file_info.find("url")
-        for child in url_el:
-            url_el.remove(child)
-        url_el.text = "http://" + config.server_ip + "/fitcrack_cgi/file_upload_handler"
-
-        result = root.find("result")
-        file_ref = result.find("file_ref")
-        file_name_el = file_ref.find("file_name")
-        for child in file_name_el:
-            file_name_el.remove(child)
-        file_name_el.text = filename
-
-        tree.write("/home/boincadm/tests/in/result-xml_doc_in_test")
-        f = open("/home/boincadm/tests/in/result-xml_doc_in_test", "br")
-        result = f.read()
-        f.close()
-
-        return result
+        return render_result_xml(filename)
 
     @staticmethod
-    def move_file_to_boinc_dir(file_path):
+    def move_file_to_boinc_dir(file_path, filename=None):
         """
         Move file to boinc directory hierarchy
         :param file_path:
+        :param filename: name of file in boinc directory hierarchy, default is name of file_path
         :return: filename without path
         """
-        filename = os.path.basename(file_path)
-        # boinc utility to determining right directory in boinc directory hierarchy
-        process = subprocess.Popen(["/home/boincadm/boinc-src/tools/dir_hier_path", filename],
-                                   cwd=config.project["home"], stdout=subprocess.PIPE)
-
-        path, err = process.communicate()
-        path = path.decode("ascii")
-        path = path.strip()
-        # we need upload directory, not download
-        path = path.replace("download", "upload")
-
-        dir_path = os.path.dirname(path)
-        try:
-            os.stat(dir_path)
-        except FileNotFoundError:
-            os.mkdir(dir_path)
-
-        copy(file_path, path)
-
-        return filename
+        return stage_file(file_path, filename)
 
     def verify_bench_ok(self, output, old_package):
         """
@@ -468,25 +406,16 @@ class TestAssimilator(unittest.TestCase):
         set_wu_ready(self.wu_id, self.canonical_res.id, doc_in)
 
         settings = get_settings()
-        timeout = 10
-        dif = 0.5
 
         if settings.delete_finished_jobs:
-            job = session.query(FcJob).filter(FcJob.id == job_id).one_or_none()
-            while job is not None:
-                self.assertNotEqual(timeout, 0, "Timeout")
-                sleep(dif)
-                timeout -= dif
-                session.expire_all()
-                job = session.query(FcJob).filter(FcJob.id == job_id).one_or_none()
+            result = wait_until(fresh(lambda: session.query(FcJob).filter(FcJob.id == job_id)
+                                      .one_or_none() is None),
+                                description="job " + str(job_id) + " deleted")
         else:
-            wu = get_workunit(self.wu_id)
             # waits till assimilate handler exits
-            while wu.assimilate_state != 2:
-                self.assertNotEqual(timeout, 0, "Timeout")
-                sleep(dif)
-                timeout -= dif
-                session.expire(wu)
+            result = wait_until(fresh(lambda: get_workunit(self.wu_id).assimilate_state == 2),
+                                description="workunit " + str(self.wu_id) + " assimilated")
+        self.assertTrue(result, "Timeout: " + str(result))
 
         self.assertTrue(is_running(self.tested_module),
                         str(self.tested_module) + "not running anymore")
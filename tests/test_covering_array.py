@@ -0,0 +1,70 @@
+#!/usr/bin/python3
+"""
+Tests of covering arrays of API test grids, they don't need BOINC server or database
+"""
+import itertools
+import unittest
+from collections import OrderedDict
+
+import api_params
+from covering_array import covering_array, is_covering, grid_size
+
+
+class TestCoveringArray(unittest.TestCase):
+    """
+    Covering arrays used by sweeps of API parameters
+    """
+    shapes = [[2, 2, 2], [3, 3, 3, 3], [5, 1, 4, 2, 3], [2] * 10, [6, 4, 3, 3, 2, 2]]
+
+    @staticmethod
+    def params(sizes):
+        return {"p" + str(i): list(range(size)) for i, size in enumerate(sizes)}
+
+    @staticmethod
+    def grid(**params):
+        # same as sweep.grid, sweep needs database
+        names = list(params)
+        return [OrderedDict(zip(names, values)) for values in itertools.product(*params.values())]
+
+    def test_covering(self):
+        for sizes in self.shapes:
+            params = self.params(sizes)
+            for t in (1, 2, 3):
+                with self.subTest(sizes=sizes, t=t):
+                    rows = covering_array(t, **params)
+                    self.assertTrue(is_covering(rows, t, **params))
+                    self.assertLessEqual(len(rows), grid_size(**params))
+                    for row in rows:
+                        for name, value in row.items():
+                            self.assertIn(value, params[name])
+
+    def test_api_grids(self):
+        for params in (api_params.hosts, api_params.packages, api_params.package_hosts):
+            for t in (2, 3):
+                with self.subTest(params=list(params), t=t):
+                    rows = covering_array(t, **params)
+                    self.assertTrue(is_covering(rows, t, **params))
+                    self.assertLess(len(rows), grid_size(**params))
+
+    def test_strength_at_least_parameters(self):
+        params = self.params([3, 2])
+        for t in (2, 3):
+            with self.subTest(t=t):
+                self.assertEqual(self.grid(**params), covering_array(t, **params))
+
+    def test_empty(self):
+        self.assertEqual(self.grid(), covering_array(2))
+        self.assertTrue(is_covering(covering_array(2), 2))
+        params = {"a": [1, 2], "b": [], "c": [1, 2, 3]}
+        self.assertEqual([], covering_array(2, **params))
+        self.assertTrue(is_covering([], 2, **params))
+
+    def test_repeated_values(self):
+        params = {"a": ["x", "x", "y"], "b": [1, 2], "c": [None, False, True]}
+        rows = covering_array(2, **params)
+        self.assertTrue(is_covering(rows, 2, **params))
+        self.assertFalse(is_covering(rows[:1], 2, **params))
+
+
+if __name__ == '__main__':
+    unittest.main()
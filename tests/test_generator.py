@@ -1,12 +1,14 @@
 #!/usr/bin/python3
 import os
 import sys
-from time import sleep
-from xml.etree import ElementTree as ET
+import time
 
 from config import *
 from database.service import *
+from db_teardown import delete_generator_data
 from fc_test_library import *
+from waiting import DbChangeDetector, LogWatcher, fresh, wait_stats, wait_until
+from workunit_audit import audit_package, config_path_from_xml
 
 
 class TestGenerator(unittest.TestCase):
@@ -32,7 +34,9 @@ class TestGenerator(unittest.TestCase):
 
     @classmethod
     def tearDownClass(cls):
-        start_daemons()
+        restore_daemons()
+        isolation_stats.report(cls.__name__)
+        wait_stats.report(cls.__name__)
 
     def test_del_fin_host(self):
         """
@@ -87,7 +91,7 @@ class TestGenerator(unittest.TestCase):
         """
         package = add_package(time_start=None, status=PackageStatus.running)
 
-        self.wait_for_generator_sleep()
+        self.wait_for_generator_sleep(lambda: package.time_start is not None, "start time set")
 
         self.assertGreater(package.time_start.timestamp(), 0,
                            "Package should have the time set")
@@ -100,7 +104,10 @@ class TestGenerator(unittest.TestCase):
 
         assign_host_to_package(boinc_host.id, package.id)
 
-        self.wait_for_generator_sleep()
+        self.wait_for_generator_sleep(
+            lambda: session.query(FcJob).filter(FcJob.package_id == package.id)
+            .filter(FcJob.workunit_id != 0).count() > 0,
+            "benchmark job created")
 
         host = session.query(FcHost).filter(FcHost.boinc_host_id == boinc_host.id). \
             filter(FcHost.status == HostStatus.benchmark.value).order_by(FcHost.time.desc()).first()
@@ -142,7 +149,7 @@ class TestGenerator(unittest.TestCase):
 
         assign_host_to_package(boinc_host.id, package.id)
 
-        self.wait_for_generator_sleep()
+        self.wait_for_generator_sleep(lambda: get_host(package.id) is not None, "host added")
 
         host = get_host(package.id)
         self.assertIsNotNone(host)
@@ -179,7 +186,9 @@ class TestGenerator(unittest.TestCase):
 
         assign_host_to_package(boinc_host.id, package.id)
 
-        self.wait_for_generator_sleep()
+        self.wait_for_generator_sleep(
+            lambda: any(j.workunit_id != 0 for j in get_jobs(package.id)), "job created",
+            settle=True)
 
         jobs = get_jobs(package.id)
         self.assertIsNotNone(jobs)
@@ -195,6 +204,7 @@ class TestGenerator(unittest.TestCase):
 
         output = self.verify_workunit(job.workunit_id)
         self.verify_tlv_normal(output, attack_mode=AttackModes.dictionary, hash_type=0)
+        self.verify_package_workunits(package.id)
 
     def test_make_job_comb(self):
         """
@@ -209,7 +219,9 @@ class TestGenerator(unittest.TestCase):
 
         assign_host_to_package(boinc_host.id, package.id)
 
-        self.wait_for_generator_sleep()
+        self.wait_for_generator_sleep(
+            lambda: any(j.workunit_id != 0 for j in get_jobs(package.id)), "job created",
+            settle=True)
         set_package_status(package.id, PackageStatus.finished)
 
         jobs = get_jobs(package.id)
@@ -226,6 +238,7 @@ class TestGenerator(unittest.TestCase):
         output = self.verify_workunit(job.workunit_id)
 
         self.verify_tlv_normal(output, attack_mode=AttackModes.combination, hash_type=0)
+        self.verify_package_workunits(package.id)
 
     def test_make_job_mask(self):
         """
@@ -238,7 +251,9 @@ class TestGenerator(unittest.TestCase):
 
         assign_host_to_package(boinc_host.id, package.id)
 
-        self.wait_for_generator_sleep()
+        self.wait_for_generator_sleep(
+            lambda: any(j.workunit_id != 0 for j in get_jobs(package.id)), "job created",
+            settle=True)
 
         jobs = get_jobs(package.id)
         self.assertEqual(len(jobs), 1)
@@ -253,6 +268,7 @@ class TestGenerator(unittest.TestCase):
 
         output = self.verify_workunit(job.workunit_id)
         self.verify_tlv_normal(output, attack_mode=AttackModes.mask, hash_type=0)
+        self.verify_package_workunits(package.id)
 
     def test_make_job_error(self):
         """
@@ -264,7 +280,8 @@ class TestGenerator(unittest.TestCase):
 
         assign_host_to_package(boinc_host.id, package.id)
 
-        self.wait_for_generator_sleep()
+        self.wait_for_generator_sleep(lambda: package.status == PackageStatus.malformed.value,
+                                      "package malformed")
 
         self.assertEqual(package.status, PackageStatus.malformed.value)
         self.assertTrue(is_running(self.tested_module),
@@ -303,7 +320,7 @@ class TestGenerator(unittest.TestCase):
 
         assign_host_to_package(boinc_host.id, package.id)
 
-        self.wait_for_generator_sleep()
+        self.wait_for_generator_sleep(lambda: len(get_jobs(package.id)) >= 2, "job duplicated")
 
         new_job = self.find_duplicated_job(job)
 
@@ -323,7 +340,7 @@ class TestGenerator(unittest.TestCase):
 
         assign_host_to_package(boinc_host.id, package.id)
 
-        self.wait_for_generator_sleep()
+        self.wait_for_generator_sleep(lambda: len(get_jobs(package.id)) >= 2, "job duplicated")
 
         new_job = self.find_duplicated_job(job)
 
@@ -341,7 +358,7 @@ class TestGenerator(unittest.TestCase):
 
         assign_host_to_package(boinc_host.id, package.id)
 
-        self.wait_for_generator_sleep()
+        self.wait_for_generator_sleep(lambda: len(get_jobs(package.id)) >= 2, "job duplicated")
 
         new_job = self.find_duplicated_job(job)
 
@@ -391,98 +408,49 @@ class TestGenerator(unittest.TestCase):
         self.wait_for_generator_db(obj=package, attr="status",
                                    expected_val=PackageStatus.ready.value)
 
-    def wait_for_generator_sleep(self, wait=3):
-        sleep(wait)
-        self.assertTrue(is_running(self.tested_module), "Module not running")
-
-    def wait_for_generator_log(self, mod_time, timeout=10):
-        dif = 0.5
-        while os.path.getmtime(logs_path + self.tested_module + ".log") == mod_time:
-            self.assertNotEqual(timeout, 0, "Timeout")
-            sleep(dif)
-            timeout -= dif
+    def wait_for_generator_sleep(self, condition=None, description="generator", wait=3,
+                                 timeout=10, settle=False):
+        """
+        Waits till generator does its work
+        :param condition: function, which returns True when expected work is done; objects are
+        expired before every call; when None, waits for generator cycles in log
+        :param description: description of condition
+        :param wait: maximum waiting time for generator cycles, when condition is None
+        :param timeout: maximum waiting time for condition
+        :param settle: when True, waits another wait seconds after condition holds, so generator
+        can make also jobs, which it should not, before test checks exact number of jobs
+        """
+        if condition is None:
+            # nothing to observe in database, work is done after whole cycle, which started
+            # after changes made by test, new job ends waiting early
+            log_cycles = LogWatcher(logs_path + self.tested_module + ".log").cycle_condition(
+                cycles=2)
+            new_job = DbChangeDetector(FcJob.id)
+            wait_until(lambda: new_job.changed() or log_cycles(), timeout=wait, max_delay=0.1,
+                       description="generator cycles")
+        else:
+            result = wait_until(fresh(condition), timeout=timeout, description=description)
+            self.assertTrue(result, "Timeout: " + str(result))
+            if settle:
+                time.sleep(wait)
         self.assertTrue(is_running(self.tested_module), "Module not running")
 
     def wait_for_generator_db(self, expected_val, obj, attr, timeout=10):
         self.assertIsNotNone(obj)
-        dif = 0.5
-        while getattr(obj, attr) != expected_val:
-            self.assertNotEqual(timeout, 0, str(obj) + "." + attr + " is " +
-                                str(getattr(obj, attr)) + " not " + str(expected_val))
-            sleep(dif)
-            timeout -= dif
-            session.expire(obj)
+        result = wait_until(fresh(lambda: getattr(obj, attr) == expected_val), timeout=timeout,
+                            description=str(obj) + "." + attr + " == " + str(expected_val))
+        self.assertTrue(result, str(obj) + "." + attr + " is " + str(getattr(obj, attr)) +
+                        " not " + str(expected_val))
 
         self.assertTrue(is_running(self.tested_module), "Module not running")
 
     @staticmethod
     def find_file_from_xml(file):
-        file = file.decode("utf-8")
-
-        # root element needs to be added
-        new_file = file.replace("\n", "\n\t")
-        new_file = "<root>\n\t" + new_file
-        new_file = new_file + "\n</root>"
-
-        file_refs = []
-        root = ET.fromstring(new_file)
-        file_infos = root.findall("file_info")
-        # finds all names al urls from xml_doc
-        for info in file_infos:
-            name = info.find("name")
-            url = info.find("url")
-            ref = {"name": name.text, "url": url.text}
-            file_refs.append(ref)
-
-        # each file have additional info
-        # we need open_name value
-        wu = root.find("workunit")
-        file_infos = wu.findall("file_ref")
-        for info in file_infos:
-            name = info.find("file_name")
-            open_name = info.find("open_name")
-            for ref in file_refs:
-                if ref["name"] == name.text:
-                    ref["open_name"] = open_name.text
-                    break
-
-        # print("file references:", file_refs)
-
-        # in xml_doc could be references to multiple files
-        for ref in file_refs:
-            if ref["open_name"] == "config":
-                # ip address needs to be changed for project home directory
-                pattern = re.compile("^http://((25[0-5]|2[0-4][0-9]|[01]?[0-9][0-9]?)\.){3}"
-                                     "(25[0-5]|2[0-4][0-9]|[01]?[0-9][0-9]?)/test_fitcrack/")
-                m = re.match(pattern, ref["url"])
-                if m:
-                    return config.project["home"] + ref["url"][m.end():]
-                else:
-                    return ""
+        return config_path_from_xml(file)
 
     @staticmethod
     def delete_all():
-        graphs = session.query(FcPackageGraph)
-        for graph in graphs:
-            session.delete(graph)
-
-        hosts = session.query(FcHost)
-        for host in hosts:
-            session.delete(host)
-
-        activities = session.query(FcHostActivity)
-        for activity in activities:
-            session.delete(activity)
-
-        jobs = session.query(FcJob)
-        for job in jobs:
-            session.delete(job)
-
-        packages = session.query(FcPackage).filter(FcPackage.id != 1)
-        for package in packages:
-            session.delete(package)
-
-        session.commit()
+        return delete_generator_data()
 
     def verify_tlv_benchmark(self, output, hash_type=0):
         self.assertIsNotNone(output, "TLV is None")
@@ -512,18 +480,22 @@ class TestGenerator(unittest.TestCase):
         xml_doc = wu.xml_doc
         path = self.find_file_from_xml(xml_doc)
         self.assertNotEqual(path, "", "Couldn't found config file")
-        f = open(path)
-        self.assertIsNotNone(f, "Couldn't open config file")
-        file = f.read()
-        f.close()
-        self.assertNotEqual(0, len(file), "Config file is empty")
+        self.assertNotEqual(0, os.path.getsize(path), "Config file is empty")
         try:
-            output = FitcrackTLVConfig.from_string(file)
+            output = FitcrackTLVConfig.from_file(path)
         except ValueError as err:
             self.fail(err)
 
         return output
 
+    def verify_package_workunits(self, package_id):
+        """
+        Verifies configs of all workunits of package
+        :param package_id:
+        """
+        report = audit_package(package_id)
+        self.assertTrue(report.ok, str(report))
+
     def find_duplicated_job(self, job):
         jobs = get_jobs(job.package_id)
         self.assertIsNotNone(jobs, "Retry job should stay in db")
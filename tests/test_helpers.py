@@ -0,0 +1,57 @@
+#!/usr/bin/python3
+"""
+Tests of helper modules, which don't need BOINC server or database
+"""
+import tempfile
+import unittest
+
+import config
+from fake_project import create_fake_project, set_fake_project_enabled
+from fc_test_library import ProjectStatus, get_project_status, invalidate_project_status, \
+    is_project_running, is_project_running_bin_status, start_project, stop_project
+
+
+class TestProjectStatus(unittest.TestCase):
+    """
+    Project status probe on fake project home directory
+    """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.home = create_fake_project(self.directory.name)
+        self.configured_home = config.project["home"]
+        config.project["home"] = self.home
+        invalidate_project_status()
+
+    def tearDown(self):
+        config.project["home"] = self.configured_home
+        invalidate_project_status()
+        self.directory.cleanup()
+
+    def test_same_as_bin_status(self):
+        for enabled in (True, False, True):
+            with self.subTest(enabled=enabled):
+                set_fake_project_enabled(self.home, enabled)
+                self.assertEqual(enabled, ProjectStatus(self.home).enabled)
+                self.assertEqual(enabled, is_project_running_bin_status(self.home))
+
+    def test_cached_until_invalidated(self):
+        self.assertTrue(is_project_running())
+        set_fake_project_enabled(self.home, False)
+        self.assertIs(get_project_status(), get_project_status())
+        self.assertTrue(is_project_running(), "status should be cached")
+
+        invalidate_project_status()
+        self.assertFalse(is_project_running())
+
+    def test_start_stop_invalidate(self):
+        self.assertTrue(is_project_running())
+        stop_project()
+        self.assertFalse(is_project_running())
+        start_project()
+        self.assertTrue(is_project_running())
+
+
+# runs all tests in this file if file is run as normal python script
+if __name__ == '__main__':
+    unittest.main()
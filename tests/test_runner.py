@@ -1,13 +1,22 @@
 #!/usr/bin/python3
 import argparse
+import json
 import os
 import subprocess
 import sys
+import tempfile
 import unittest
 
 import config
 import hashcat_parsers
 from fc_test_library import AttackModes, FitcrackTLVConfig, RunnerOutput
+from tlv_codec import decode, decode_line, iter_records, scan_tree, verify_file
+
+try:
+    from runner_output_columns import RunnerOutputColumns
+except ImportError:
+    # NumPy is needed only by TestRunnerOutputColumns
+    RunnerOutputColumns = None
 
 
 class TestRunner(unittest.TestCase):
@@ -72,6 +81,9 @@ class TestRunner(unittest.TestCase):
         if os.path.isfile("runner_command"):
             os.remove("runner_command")
 
+        if os.path.isfile(config.runner["engine_report"]):
+            os.remove(config.runner["engine_report"])
+
     def test_benchmark_ok(self):
         self.setup_benchmark()
 
@@ -219,6 +231,48 @@ class TestRunner(unittest.TestCase):
         output = RunnerOutput(out)
         self.verify_output_normal(output, error=True)
 
+    def test_mask_status_stream(self):
+        # 10000 candidates at 100 H/s with default status timer (10 s) -> 10 status lines
+        self.setup_normal(AttackModes.mask, mask="?d?d?d?d", hc_keyspace=10 ** 4, start_index=42)
+        self.add_flags("--status-stream", "--hash-rate", "100")
+
+        ret = self.call_runner()
+        self.assertEqual(0, ret, "Runner return value")
+
+        runner_command, out = self.verify_output_files()
+        self.verify_parse_normal(runner_command, hash_type=0, mode=AttackModes.mask)
+
+        output = RunnerOutput(out)
+        self.verify_output_normal(output)
+
+    def test_mask_engine(self):
+        # ?d?d?d?d has hashcat keyspace 1000 with amplifier 10, so task covers candidates
+        # 1000 - 1499
+        start_index = 100
+        hc_keyspace = 50
+        for target_index, found in [(1200, True), (1500, False), (999, False)]:
+            with self.subTest(target_index=target_index):
+                self.setup_normal(AttackModes.mask, mask="?d?d?d?d", hc_keyspace=hc_keyspace,
+                                  start_index=start_index)
+                self.add_flags("--engine", "--target-index", str(target_index))
+
+                ret = self.call_runner()
+                self.assertEqual(0, ret, "Runner return value")
+
+                runner_command, out = self.verify_output_files()
+                self.verify_parse_normal(runner_command, hash_type=0, mode=AttackModes.mask)
+
+                report = self.read_engine_report()
+                self.assertEqual(start_index, report["start_index"], "Start index")
+                self.assertEqual(hc_keyspace, report["hc_keyspace"], "Keyspace")
+                self.assertEqual(found, report["found"])
+                self.assertTrue(report["walked"], "Small task should be walked")
+
+                output = RunnerOutput(out)
+                self.verify_output_normal(output, found=found)
+                if found:
+                    self.assertEqual(report["password"], output.password, "Password")
+
     @staticmethod
     def call_runner():
         ret = subprocess.call(config.runner["path"] + config.runner["bin"], stdout=sys.stdout)
@@ -245,6 +299,16 @@ class TestRunner(unittest.TestCase):
 
         return runner_command, out
 
+    def read_engine_report(self):
+        """
+        :return: dictionary with result of simulated cracking engine of hashcat stub
+        """
+        try:
+            with open(config.runner["engine_report"], "r") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            self.fail("Hashcat stub didn't create engine report")
+
     def verify_parse_benchmark(self, hashcat_args):
         """
         
@@ -321,7 +385,8 @@ class TestRunner(unittest.TestCase):
             TestRunner.add_warning_flag()
 
     @staticmethod
-    def setup_normal(attack, found=False, error=False, hash_type=0, mask=""):
+    def setup_normal(attack, found=False, error=False, hash_type=0, mask="", hc_keyspace=None,
+                     start_index=None):
         """
         Creates config file for normal task depenping on attack mode and hash type
         If set, raises one of error or found flag
@@ -330,10 +395,13 @@ class TestRunner(unittest.TestCase):
         :param found: password was found?
         :param error: error occurred?
         :param hash_type:
+        :param hc_keyspace: keyspace of task
+        :param start_index: first index of task
         :return:
         """
         conf = FitcrackTLVConfig.create(mode="n", attack_mode=attack, hash_type=hash_type,
-                                        mask=mask)
+                                        mask=mask, hc_keyspace=hc_keyspace,
+                                        start_index=start_index)
         conf.to_file("config")
 
         if found:
@@ -423,6 +491,261 @@ class TestRunner(unittest.TestCase):
         with open(config.runner["local.conf"], "w") as f:
             f.write("--found")
 
+    @staticmethod
+    def add_flags(*flags):
+        """
+        Writes to local.conf file arguments for stub hashcat
+        :param flags: arguments
+        :return:
+        """
+        with open(config.runner["local.conf"], "w") as f:
+            f.write(" ".join(flags))
+
+
+def legacy_config_string(c):
+    """
+    String builder of FitcrackTLVConfig before schema codec, reference for round-trip tests
+    """
+    res = ""
+    if c.mode is not None:
+        res = "|||mode|String|1|" + c.mode + "|||\n"
+    if c.attack is not None:
+        res += "|||attack|String|" + str(len(c.attack)) + "|" + c.attack + "|||\n"
+    if c.attack_mode is not None:
+        res += "|||attack_mode|UInt|1|" + str(c.attack_mode) + "|||\n"
+    if c.hash_type is not None:
+        res += "|||hash_type|UInt|" + str(len(str(c.hash_type))) + "|" + str(c.hash_type) + \
+               "|||\n"
+    if c.name is not None:
+        res += "|||name|String|" + str(len(c.name)) + "|" + str(c.name) + "|||\n"
+    if c.mask is not None:
+        res += "|||mask|String|" + str(len(c.mask)) + "|" + str(c.mask) + "|||\n"
+    if c.hc_keyspace is not None:
+        res += "|||hc_keyspace|BigUInt|" + str(len(str(c.hc_keyspace))) + "|" + \
+               str(c.hc_keyspace) + "|||\n"
+    if c.start_index is not None:
+        res += "|||start_index|BigUInt|" + str(len(str(c.start_index))) + "|" + \
+               str(c.start_index) + "|||\n"
+    return res
+
+
+class TestTLVCodec(unittest.TestCase):
+    """
+    Schema codec of TLV config, runner binary is not needed
+    """
+    configs = [
+        FitcrackTLVConfig.create(),
+        FitcrackTLVConfig.create(mode="b", hash_type=0),
+        FitcrackTLVConfig.create(mode="n", attack_mode=AttackModes.dictionary, hash_type=0,
+                                 name="dict job", hc_keyspace=129989, start_index=0),
+        FitcrackTLVConfig.create(mode="n", attack_mode=AttackModes.combination, hash_type=1400,
+                                 name="comb|job", hc_keyspace=10, start_index=5),
+        FitcrackTLVConfig.create(mode="n", attack_mode=AttackModes.mask, hash_type=22000,
+                                 name="", mask="?l?d?a", hc_keyspace=2 ** 64 - 1,
+                                 start_index=2 ** 63),
+    ]
+
+    def test_same_as_legacy_builder(self):
+        for c in self.configs:
+            with self.subTest(config=legacy_config_string(c)):
+                self.assertEqual(legacy_config_string(c), str(c))
+
+    def test_round_trip(self):
+        for c in self.configs:
+            with self.subTest(config=str(c)):
+                decoded = FitcrackTLVConfig.from_string(str(c))
+                for name in ("mode", "attack", "attack_mode", "hash_type", "name", "mask",
+                             "hc_keyspace", "start_index"):
+                    self.assertEqual(getattr(c, name), getattr(decoded, name), name)
+                self.assertEqual(str(c), str(decoded))
+
+    def test_string_keeps_digits(self):
+        c = FitcrackTLVConfig.from_string("|||name|String|3|042|||\n")
+        self.assertEqual("042", c.name)
+
+    def test_bool(self):
+        string = "|||mode|String|1|n|||\n|||enable_opencl|Bool|1|1|||\n"
+        c = FitcrackTLVConfig.from_string(string)
+        self.assertEqual(1, c.enable_opencl)
+        self.assertEqual({"enable_opencl": ("Bool", 1)}, c.extra)
+        self.assertEqual(string, str(c))
+        with self.assertRaises(ValueError):
+            FitcrackTLVConfig.from_string("|||enable_opencl|Bool|4|true|||\n")
+
+    def test_unknown_type(self):
+        c = FitcrackTLVConfig.from_string("|||charset1|Charset|3|abc|||\n")
+        self.assertEqual("abc", c.charset1)
+        self.assertEqual("|||charset1|Charset|3|abc|||\n", str(c))
+
+    def test_malformed(self):
+        lines = [
+            "|||mode|String|1|b",
+            "mode|String|1|b|||",
+            "|||mode|String|b|||",
+            "|||mode|String|2|b|||",
+            "|||mode|String|x|b|||",
+            "|||mode|String|\u00b2|bb|||",
+            "|||hash_type|UInt|1|\u00b2|||",
+            "|||hash_type|UInt|2|-1|||",
+            "|||hc_keyspace|BigUInt|1|a|||",
+        ]
+        for line in lines:
+            with self.subTest(line=line):
+                with self.assertRaises(ValueError):
+                    decode_line(line)
+                with self.assertRaises(ValueError):
+                    decode(line + "\n")
+                with self.assertRaises(ValueError):
+                    FitcrackTLVConfig.from_string("|||mode|String|1|n|||\n" + line + "\n")
+
+    def test_duplicate(self):
+        with self.assertRaises(ValueError):
+            FitcrackTLVConfig.from_string("|||mode|String|1|n|||\n|||mode|String|1|b|||\n")
+        with self.assertRaises(ValueError):
+            FitcrackTLVConfig.from_string("|||x|UInt|1|1|||\n|||x|UInt|1|2|||\n")
+
+
+class TestTLVStream(unittest.TestCase):
+    """
+    Streaming TLV parser over bytes-like objects and files
+    """
+
+    def setUp(self):
+        self.configs = [str(c) for c in TestTLVCodec.configs] + [
+            "|||mode|String|1|n|||\n|||enable_opencl|Bool|1|1|||\n\n|||name|String|3|a|b|||\n",
+        ]
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, name, content):
+        path = os.path.join(self.directory.name, name)
+        with open(path, "wb") as f:
+            f.write(content.encode() if isinstance(content, str) else content)
+        return path
+
+    def test_same_as_from_string(self):
+        for string in self.configs:
+            with self.subTest(config=string):
+                expected = str(FitcrackTLVConfig.from_string(string))
+                data = string.encode()
+                for buffer in (data, bytearray(data), memoryview(data)):
+                    self.assertEqual(expected, str(FitcrackTLVConfig.from_bytes(buffer)))
+                self.assertEqual(expected, str(FitcrackTLVConfig.from_file(
+                    self.write("config", string))))
+
+    def test_records_without_copy(self):
+        data = bytearray(b"|||name|String|3|abc|||\n|||hash_type|UInt|4|1400|||")
+        records = list(iter_records(data))
+        self.assertEqual([("name", "String"), ("hash_type", "UInt")],
+                         [(name, type_name) for name, type_name, _ in records])
+        self.assertIsInstance(records[0][2], memoryview)
+        data[17] = ord("x")
+        self.assertEqual(b"xbc", bytes(records[0][2]))
+
+    def test_truncated(self):
+        for content in ["|||name|String|5|abc|||\n", "|||name|String|3|abc", "|||name|String|3|",
+                        "|||name|String|3|abc|||x|||mode|String|1|n|||\n"]:
+            with self.subTest(content=content):
+                with self.assertRaises(ValueError):
+                    list(iter_records(content.encode()))
+                with self.assertRaises(ValueError):
+                    verify_file(self.write("truncated", content))
+
+    def test_length_not_digit(self):
+        for content in ["|||name|String|x|a|||\n", "|||name|String|-1|a|||\n",
+                        "|||name|String||a|||\n", "|||name|String|\u00b2|ab|||\n"]:
+            with self.subTest(content=content):
+                with self.assertRaises(ValueError):
+                    list(iter_records(content.encode()))
+
+    def test_verify_file(self):
+        self.assertEqual(8, verify_file(self.write("full", self.configs[4])))
+        self.assertEqual(0, verify_file(self.write("empty", "")))
+        self.assertEqual(FitcrackTLVConfig().extra, FitcrackTLVConfig.from_file(
+            self.write("empty", "")).extra)
+        with self.assertRaises(ValueError):
+            verify_file(self.write("uint", "|||hash_type|UInt|2|1a|||\n"))
+
+    def test_scan_tree(self):
+        os.makedirs(os.path.join(self.directory.name, "a", "b"))
+        ok = self.write(os.path.join("a", "ok"), self.configs[2])
+        bad = self.write(os.path.join("a", "b", "bad"), "|||name|String|9|abc|||\n")
+        self.write(os.path.join("a", "other"), b"\x00binary file")
+        self.assertEqual({ok: None}, {path: error for path, error in scan_tree(
+            self.directory.name) if path != bad})
+        self.assertIsNotNone(dict(scan_tree(self.directory.name))[bad])
+
+
+@unittest.skipUnless(RunnerOutputColumns, "runner_output_columns needs NumPy")
+class TestRunnerOutputColumns(unittest.TestCase):
+    """
+    Bulk loader of runner output files parses files same as RunnerOutput
+    """
+
+    def test_same_as_runner_output(self):
+        paths = list(config.in_files["assimilator"].values())
+        columns = RunnerOutputColumns.from_files(paths, key=os.path.basename)
+        self.assertEqual([], columns.errors)
+        self.assertEqual(len(paths), len(columns))
+
+        for i, path in enumerate(columns.paths):
+            with self.subTest(path=path):
+                with open(path) as f:
+                    output = RunnerOutput(f.read())
+                self.assertEqual(output.mode, columns.mode[i])
+                self.assertEqual(output.status_code, columns.status_code[i])
+                self.assertEqual(getattr(output, "power", -1), columns.power[i])
+                self.assertEqual(getattr(output, "exit_code", -1), columns.exit_code[i])
+                self.assertEqual(getattr(output, "password", None), columns.passwords.get(i))
+                self.assertEqual(getattr(output, "exit_info", None), columns.exit_info.get(i))
+                if hasattr(output, "cracking_time"):
+                    self.assertAlmostEqual(float(output.cracking_time), columns.cracking_time[i])
+                else:
+                    self.assertNotEqual(columns.cracking_time[i], columns.cracking_time[i],
+                                        "Missing cracking time should be NaN")
+
+    def test_totals(self):
+        paths = list(config.in_files["assimilator"].values()) * 2
+        columns = RunnerOutputColumns.from_files(paths, key=os.path.basename)
+
+        expected = {}
+        for path in paths:
+            with open(path) as f:
+                output = RunnerOutput(f.read())
+            expected.setdefault(os.path.basename(path), 0)
+            expected[os.path.basename(path)] += float(getattr(output, "cracking_time", 0))
+
+        by_key = columns.cracking_time_by_key()
+        self.assertEqual(set(expected), set(by_key))
+        for key, cracking_time in expected.items():
+            self.assertAlmostEqual(cracking_time, by_key[key], msg=key)
+        self.assertAlmostEqual(sum(expected.values()), columns.total_cracking_time())
+
+        counts, _ = columns.power_distribution()
+        self.assertEqual(int(columns.select(mode="b", status_code=0).sum()), counts.sum())
+
+    def test_not_runner_output(self):
+        with tempfile.TemporaryDirectory() as root:
+            for name, content in [("unknown_mode", "a\n0\n"), ("empty", ""),
+                                  ("ok", "n\n1\n28.02\n"), ("no_status", "n\n")]:
+                with open(os.path.join(root, name), "w") as f:
+                    f.write(content)
+
+            columns = RunnerOutputColumns.from_directory(root)
+
+        # unknown mode is accepted like by RunnerOutput, only mode and status code are set
+        output = RunnerOutput("a\n0\n")
+        self.assertFalse(hasattr(output, "cracking_time"))
+        self.assertEqual(2, len(columns))
+        i = [os.path.basename(path) for path in columns.paths].index("unknown_mode")
+        self.assertEqual((output.mode, output.status_code, -1, -1),
+                         (columns.mode[i], columns.status_code[i], columns.power[i],
+                          columns.exit_code[i]))
+        self.assertEqual(["empty", "no_status"],
+                         sorted(os.path.basename(path) for path, _ in columns.errors))
+
 
 # runs all tests in this file if file is run as normal python script
 if __name__ == '__main__':
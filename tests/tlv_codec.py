@@ -0,0 +1,298 @@
+"""
+Schema driven codec for Fitcrack TLV config files
+Every line of config has format |||name|type|length|value|||
+"""
+import mmap
+import os
+import re
+from operator import attrgetter
+
+# str.isdigit accepts also Unicode digits like "²", which int() rejects
+uint_pattern = re.compile(r"[0-9]+")
+
+
+def is_uint(text):
+    """
+    :param text: string
+    :return: True if text is unsigned integer written with ASCII digits
+    """
+    return uint_pattern.fullmatch(text) is not None
+
+
+class String:
+    type_name = "String"
+
+    @staticmethod
+    def encode(value):
+        return str(value)
+
+    @staticmethod
+    def decode(text):
+        return text
+
+
+class UInt:
+    type_name = "UInt"
+
+    @staticmethod
+    def encode(value):
+        return str(int(value))
+
+    @staticmethod
+    def decode(text):
+        if not is_uint(text):
+            raise ValueError(text + " is not unsigned integer")
+        return int(text)
+
+
+class BigUInt(UInt):
+    type_name = "BigUInt"
+
+
+class Bool(UInt):
+    type_name = "Bool"
+
+
+# codecs for type names used in config files
+codecs = {codec.type_name: codec for codec in [String, UInt, BigUInt, Bool]}
+integer_types = frozenset(name for name, codec in codecs.items() if issubclass(codec, UInt))
+
+
+class Schema:
+    """
+    Ordered list of known fields of TLV config with their codecs
+    Prefixes and getters of fields are prepared once, when schema is created
+    """
+
+    def __init__(self, fields):
+        """
+        :param fields: list of tuples (field name, codec)
+        """
+        self.fields = tuple(fields)
+        self.names = tuple(name for name, _ in self.fields)
+        self.index = {name: i for i, name in enumerate(self.names)}
+        self._compiled = tuple(("|||" + name + "|" + codec.type_name + "|", attrgetter(name),
+                                codec.encode) for name, codec in self.fields)
+
+    def encode(self, obj, extra=None):
+        """
+        Serializes all fields of obj which are not None
+        :param obj: object with attributes named by schema fields
+        :param extra: dictionary {name: (type name, value)} with fields not in schema
+        :return: string with TLV config
+        """
+        parts = []
+        for prefix, getter, encode in self._compiled:
+            value = getter(obj)
+            if value is not None:
+                text = encode(value)
+                parts.append(f"{prefix}{len(text)}|{text}|||\n")
+
+        if extra:
+            for name, (type_name, value) in extra.items():
+                text = codecs[type_name].encode(value) if type_name in codecs else str(value)
+                parts.append(f"|||{name}|{type_name}|{len(text)}|{text}|||\n")
+
+        return "".join(parts)
+
+
+def decode_line(line):
+    """
+    :param line: one line of TLV config
+    :return: tuple (name, type name, decoded value)
+    """
+    if line[:3] != "|||" or line[-3:] != "|||" or len(line) < 6:
+        raise ValueError("Config line malformed: " + line)
+
+    values = line[3:-3].split("|", 3)
+    if len(values) != 4:
+        raise ValueError("Config line malformed: " + line)
+
+    name, type_name, length, text = values
+    if not is_uint(length):
+        raise ValueError("Config line malformed: " + line)
+    if len(text) != int(length):
+        raise ValueError("value length is wrong:" + line)
+
+    if type_name == "String":
+        return name, type_name, text
+
+    codec = codecs.get(type_name)
+    return name, type_name, text if codec is None else codec.decode(text)
+
+
+line_pattern = re.compile(r"^\|\|\|([^|\n]*)\|([^|\n]*)\|([0-9]+)\|(.*)\|\|\|$", re.MULTILINE)
+
+
+def decode(string):
+    """
+    :param string: whole TLV config
+    :return: list of tuples (name, type name, decoded value)
+    """
+    records = line_pattern.findall(string)
+    lines = string.split("\n")
+    if len(records) != len(lines) - lines.count(""):
+        # some line is malformed, decode line by line to find it
+        return [decode_line(line) for line in lines if line]
+
+    result = []
+    for name, type_name, length, text in records:
+        if len(text) != int(length):
+            raise ValueError("value length is wrong:" + "|||" + "|".join(
+                [name, type_name, length, text]) + "|||")
+        if type_name in integer_types:
+            if not is_uint(text):
+                raise ValueError(text + " is not unsigned integer")
+            text = int(text)
+        elif type_name != "String" and type_name in codecs:
+            text = codecs[type_name].decode(text)
+        result.append((name, type_name, text))
+
+    return result
+
+
+header_pattern = re.compile(rb"\|\|\|([^|\n]*)\|([^|\n]*)\|(\d{1,20})\|")
+# cache of decoded names and type names, there are only few of them
+_names = {}
+
+
+def _name(raw):
+    name = _names.get(raw)
+    if name is None:
+        name = _names[raw] = raw.decode()
+    return name
+
+
+def iter_records(buffer):
+    """
+    Incrementally parses TLV config from bytes-like object (bytes, bytearray, mmap, memoryview)
+    Length of every value is validated while parsing, values are not copied
+    :param buffer: bytes-like object with TLV config
+    :return: generator of tuples (name, type name, memoryview of value)
+    """
+    view = memoryview(buffer)
+    try:
+        yield from _iter_view(view.cast("B") if view.format != "B" else view)
+    finally:
+        # parsed buffer (for example mmap) can be closed after parser stops
+        view.release()
+
+
+def _iter_view(view):
+    size = len(view)
+    pos = 0
+    while pos < size:
+        if view[pos] == 10:
+            # empty line
+            pos += 1
+            continue
+
+        header = header_pattern.match(view, pos)
+        if header is None:
+            raise ValueError("Config line malformed at offset " + str(pos))
+
+        start = header.end()
+        end = start + int(header.group(3))
+        if end + 3 > size or view[end:end + 3] != b"|||":
+            raise ValueError("value length is wrong at offset " + str(pos))
+
+        yield _name(header.group(1)), _name(header.group(2)), view[start:end]
+
+        pos = end + 3
+        if pos < size:
+            if view[pos] != 10:
+                raise ValueError("Config line malformed at offset " + str(pos))
+            pos += 1
+
+
+def decode_value(type_name, value):
+    """
+    :param type_name: type name from config file
+    :param value: bytes-like object with encoded value
+    :return: decoded value
+    """
+    text = bytes(value).decode()
+    if type_name == "String":
+        return text
+
+    codec = codecs.get(type_name)
+    return text if codec is None else codec.decode(text)
+
+
+def verify_file(path):
+    """
+    Validates TLV config file in constant memory
+    :param path: path to config file
+    :return: number of records in file
+    """
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return 0
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+            count = 0
+            records = iter_records(m)
+            try:
+                for _, type_name, value in records:
+                    valid = type_name not in integer_types or bytes(value).isdigit()
+                    value.release()
+                    if not valid:
+                        raise ValueError("value is not unsigned integer in record " +
+                                         str(count))
+                    count += 1
+            finally:
+                records.close()
+
+            return count
+
+
+def scan_tree(root, prefix=b"|||"):
+    """
+    Verifies all TLV config files in directory tree (for example BOINC download hierarchy)
+    Config files are recognized by their first bytes, other files are skipped
+    :param root: path to directory
+    :param prefix: first bytes of config file
+    :return: generator of tuples (path to config file, error message or None)
+    """
+    for directory, _, files in os.walk(root):
+        for filename in files:
+            path = os.path.join(directory, filename)
+            try:
+                with open(path, "rb") as f:
+                    if f.read(len(prefix)) != prefix:
+                        continue
+                verify_file(path)
+            except (ValueError, OSError) as err:
+                yield path, str(err)
+            else:
+                yield path, None
+
+
+config_schema = Schema([
+    ("mode", String),
+    ("attack", String),
+    ("attack_mode", UInt),
+    ("hash_type", UInt),
+    ("name", String),
+    ("mask", String),
+    ("hc_keyspace", BigUInt),
+    ("start_index", BigUInt),
+])
+
+
+if __name__ == '__main__':
+    import sys
+
+    import config
+
+    # verifies all config files in download hierarchy of project
+    root = sys.argv[1] if len(sys.argv) > 1 else config.project["home"] + "download"
+    checked = 0
+    failed = 0
+    for config_path, error in scan_tree(root):
+        checked += 1
+        if error is not None:
+            failed += 1
+            print(config_path + ": " + error)
+
+    print("checked:", checked, "failed:", failed)
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,176 @@
+"""
+Waiting for server modules
+Conditions are polled with adaptive backoff, so waiting ends as soon as condition holds
+Duration of every wait is recorded in wait_stats
+"""
+import os
+import time
+
+from sqlalchemy import func
+
+from database.service import session
+
+
+class WaitResult:
+    """
+    Result of one wait, evaluates to True if condition was satisfied
+    """
+
+    def __init__(self, satisfied, elapsed, attempts, description):
+        self.satisfied = satisfied
+        self.elapsed = elapsed
+        self.attempts = attempts
+        self.description = description
+
+    def __bool__(self):
+        return self.satisfied
+
+    def __str__(self):
+        return "{} {} after {:.3f}s ({} attempts)".format(
+            self.description, "satisfied" if self.satisfied else "timed out", self.elapsed,
+            self.attempts)
+
+
+class WaitStats:
+    """
+    Durations of all waits
+    """
+
+    def __init__(self):
+        self.results = []
+
+    def add(self, result):
+        self.results.append(result)
+
+    def report(self, name):
+        """
+        Prints total and slowest waits, then resets statistics
+        :param name: name of test class
+        """
+        total = sum(r.elapsed for r in self.results)
+        timeouts = sum(1 for r in self.results if not r.satisfied)
+        print("{}: {} waits, {:.2f}s total, {} timeouts".format(name, len(self.results), total,
+                                                               timeouts))
+        for result in sorted(self.results, key=lambda r: r.elapsed, reverse=True)[:5]:
+            print("    " + str(result))
+
+        self.results = []
+
+
+wait_stats = WaitStats()
+
+
+def wait_until(condition, timeout=10, description="condition", initial_delay=0.01,
+               max_delay=0.5, factor=2):
+    """
+    Polls condition until it holds or timeout expires, delay between polls grows exponentially
+    :param condition: function without arguments, which returns True when waiting should end
+    :param timeout: maximum waiting time in seconds
+    :param description: description of condition for statistics and messages
+    :param initial_delay: first delay between polls in seconds
+    :param max_delay: maximum delay between polls in seconds
+    :param factor: multiplier of delay after every unsuccessful poll
+    :return: WaitResult
+    """
+    start = time.perf_counter()
+    delay = initial_delay
+    attempts = 0
+    while True:
+        attempts += 1
+        satisfied = bool(condition())
+        elapsed = time.perf_counter() - start
+        if satisfied or elapsed >= timeout:
+            result = WaitResult(satisfied, elapsed, attempts, description)
+            wait_stats.add(result)
+            return result
+
+        time.sleep(min(delay, timeout - elapsed))
+        delay = min(delay * factor, max_delay)
+
+
+def fresh(condition):
+    """
+    :param condition: function reading objects from database
+    :return: function, which expires all objects in session before calling condition
+    """
+    def wrapper():
+        session.expire_all()
+        return condition()
+
+    return wrapper
+
+
+class LogWatcher:
+    """
+    Detects writes to log file of server module
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.size = self.current_size()
+
+    def current_size(self):
+        try:
+            return os.path.getsize(self.path)
+        except OSError:
+            return 0
+
+    def changed(self):
+        """
+        :return: True if log file was written since creation of watcher
+        """
+        return self.current_size() != self.size
+
+    def cycle_condition(self, quiet=0.3, cycles=1):
+        """
+        :param quiet: seconds without write to log, which mean end of cycle
+        :param cycles: number of cycles
+        :return: condition for wait_until, which holds when module wrote to log and then stayed
+        quiet given number of times
+        """
+        state = {"time": None, "cycles": 0}
+
+        def cycle_done():
+            size = self.current_size()
+            now = time.perf_counter()
+            if size != self.size:
+                self.size = size
+                state["time"] = now
+            elif state["time"] is not None and now - state["time"] >= quiet:
+                state["time"] = None
+                state["cycles"] += 1
+            return state["cycles"] >= cycles
+
+        return cycle_done
+
+    def wait_for_cycle(self, timeout=3, quiet=0.3, cycles=1):
+        """
+        Waits till module writes to log and then stays quiet (one cycle of module is done)
+        :param timeout: maximum waiting time in seconds
+        :param quiet: seconds without write to log, which mean end of cycle
+        :param cycles: number of cycles to wait for
+        :return: WaitResult
+        """
+        return wait_until(self.cycle_condition(quiet, cycles), timeout=timeout,
+                          max_delay=quiet / 3,
+                          description=str(cycles) + " cycles of " + os.path.basename(self.path))
+
+
+class DbChangeDetector:
+    """
+    Detects changes in database by cheap query on maximum of columns (for example id or time)
+    """
+
+    def __init__(self, *columns):
+        self.query = session.query(*[func.max(c) for c in columns])
+        self.token = self.current()
+
+    def current(self):
+        session.expire_all()
+        return tuple(self.query.one())
+
+    def changed(self):
+        """
+        :return: True if maximum of some column changed since creation of detector
+        """
+        return self.current() != self.token
@@ -0,0 +1,223 @@
+"""
+Bulk audit of TLV configs of all workunits of one package
+Configs are found from xml_doc of workunits, parsed in parallel and their keyspace ranges
+are checked for overlaps and gaps
+"""
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+import config
+from database.models import WorkUnit
+from database.service import session
+from fc_test_library import FitcrackTLVConfig
+from src.database.models import FcJob
+
+file_info_pattern = re.compile(rb"<file_info>(.*?)</file_info>", re.S)
+file_ref_pattern = re.compile(rb"<file_ref>(.*?)</file_ref>", re.S)
+name_pattern = re.compile(rb"<name>\s*(.*?)\s*</name>", re.S)
+url_pattern = re.compile(rb"<url>\s*(.*?)\s*</url>", re.S)
+file_name_pattern = re.compile(rb"<file_name>\s*(.*?)\s*</file_name>", re.S)
+open_name_pattern = re.compile(rb"<open_name>\s*(.*?)\s*</open_name>", re.S)
+# ip address needs to be changed for project home directory
+project_url_pattern = re.compile(rb"^http://((25[0-5]|2[0-4][0-9]|[01]?[0-9][0-9]?)\.){3}"
+                                 rb"(25[0-5]|2[0-4][0-9]|[01]?[0-9][0-9]?)/test_fitcrack/")
+
+
+def config_path_from_xml(xml_doc, open_name=b"config"):
+    """
+    Finds path to file opened by application under open_name in xml_doc of workunit
+    :param xml_doc: xml_doc of workunit (bytes or string)
+    :param open_name: name under which application opens file
+    :return: path to file in project home directory or "" if not found
+    """
+    if isinstance(xml_doc, str):
+        xml_doc = xml_doc.encode()
+
+    file_name = None
+    for ref in file_ref_pattern.finditer(xml_doc):
+        ref_open_name = open_name_pattern.search(ref.group(1))
+        if ref_open_name is not None and ref_open_name.group(1) == open_name:
+            ref_file_name = file_name_pattern.search(ref.group(1))
+            if ref_file_name is not None:
+                file_name = ref_file_name.group(1)
+            break
+
+    if file_name is None:
+        return ""
+
+    for info in file_info_pattern.finditer(xml_doc):
+        name = name_pattern.search(info.group(1))
+        if name is None or name.group(1) != file_name:
+            continue
+
+        url = url_pattern.search(info.group(1))
+        if url is None:
+            return ""
+        m = project_url_pattern.match(url.group(1))
+        if m is None:
+            return ""
+        return config.project["home"] + url.group(1)[m.end():].decode()
+
+    return ""
+
+
+class JobConfig:
+    """
+    Job with range of its TLV config
+    """
+
+    def __init__(self, job_id, mask_id, duplicate, db_start_index, db_hc_keyspace, path):
+        self.job_id = job_id
+        self.mask_id = mask_id
+        self.duplicate = duplicate
+        self.db_start_index = db_start_index
+        self.db_hc_keyspace = db_hc_keyspace
+        self.path = path
+        self.tlv = None
+
+    @property
+    def start(self):
+        return self.tlv.start_index or 0
+
+    @property
+    def end(self):
+        return self.start + (self.tlv.hc_keyspace or 0)
+
+
+class AuditReport:
+    """
+    Result of audit of one package
+    """
+
+    def __init__(self, package_id):
+        self.package_id = package_id
+        self.configs = 0
+        # lists of tuples (job id, message)
+        self.errors = []
+        self.mismatches = []
+        # lists of tuples (first job id, second job id, start index, end index)
+        self.overlaps = []
+        self.gaps = []
+
+    @property
+    def ok(self):
+        return not (self.errors or self.mismatches or self.overlaps or self.gaps)
+
+    def __str__(self):
+        lines = ["package {}: {} configs, {} errors, {} mismatches, {} overlaps, {} gaps".format(
+            self.package_id, self.configs, len(self.errors), len(self.mismatches),
+            len(self.overlaps), len(self.gaps))]
+        lines += ["error job {}: {}".format(*e) for e in self.errors]
+        lines += ["mismatch job {}: {}".format(*m) for m in self.mismatches]
+        lines += ["overlap jobs {} and {}: <{}, {})".format(*o) for o in self.overlaps]
+        lines += ["gap between jobs {} and {}: <{}, {})".format(*g) for g in self.gaps]
+
+        return "\n".join(lines)
+
+
+def load_job_configs(package_id, batch_size=500):
+    """
+    Streams jobs of package with xml_doc of their workunits and resolves config paths
+    :param package_id: id of package
+    :param batch_size: number of rows fetched at once
+    :return: list of JobConfig
+    """
+    q = session.query(FcJob.id, FcJob.mask_id, FcJob.duplicate, FcJob.start_index,
+                      FcJob.hc_keyspace, WorkUnit.xml_doc). \
+        join(WorkUnit, WorkUnit.id == FcJob.workunit_id). \
+        filter(FcJob.package_id == package_id).order_by(FcJob.id).yield_per(batch_size)
+
+    return [JobConfig(job_id, mask_id, duplicate, start_index, hc_keyspace,
+                      config_path_from_xml(xml_doc))
+            for job_id, mask_id, duplicate, start_index, hc_keyspace, xml_doc in q]
+
+
+def check_ranges(report, jobs, from_zero=False):
+    """
+    Finds overlaps and gaps between keyspace ranges of jobs
+    :param report: AuditReport
+    :param jobs: list of JobConfig with parsed configs from one keyspace (one mask)
+    :param from_zero: report gap before first job, if it does not start from index 0
+    """
+    by_id = {job.job_id: job for job in jobs}
+    ranges = []
+    for job in jobs:
+        # retried job is duplicated with the same range
+        original = by_id.get(job.duplicate)
+        if original is not None and (original.start, original.end) == (job.start, job.end):
+            continue
+        ranges.append(job)
+
+    ranges.sort(key=lambda j: (j.start, j.end))
+    if from_zero and ranges and ranges[0].start > 0:
+        report.gaps.append((None, ranges[0].job_id, 0, ranges[0].start))
+
+    for previous, job in zip(ranges, ranges[1:]):
+        if job.start < previous.end:
+            report.overlaps.append((previous.job_id, job.job_id, job.start,
+                                    min(previous.end, job.end)))
+        elif job.start > previous.end:
+            report.gaps.append((previous.job_id, job.job_id, previous.end, job.start))
+
+
+def audit_package(package_id, workers=8, from_zero=False):
+    """
+    Audits TLV configs of all workunits of package
+    :param package_id: id of package
+    :param workers: number of threads parsing config files
+    :param from_zero: report gap before first job, if it does not start from index 0
+    :return: AuditReport
+    """
+    report = AuditReport(package_id)
+    jobs = load_job_configs(package_id)
+
+    def parse(job):
+        try:
+            job.tlv = FitcrackTLVConfig.from_file(job.path)
+        except (ValueError, OSError) as err:
+            return str(err)
+        return None
+
+    resolved = []
+    for job in jobs:
+        if job.path == "":
+            report.errors.append((job.job_id, "Couldn't found config file"))
+        else:
+            resolved.append(job)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for job, error in zip(resolved, executor.map(parse, resolved)):
+            if error is not None:
+                report.errors.append((job.job_id, error))
+
+    groups = {}
+    for job in resolved:
+        # benchmark jobs have no keyspace range
+        if job.tlv is None or job.tlv.mode == "b":
+            continue
+        report.configs += 1
+        if job.db_start_index is not None and job.start != job.db_start_index:
+            report.mismatches.append((job.job_id, "start_index {} in config, {} in db".format(
+                job.start, job.db_start_index)))
+        if job.db_hc_keyspace is not None and job.tlv.hc_keyspace is not None and \
+                job.tlv.hc_keyspace != job.db_hc_keyspace:
+            report.mismatches.append((job.job_id, "hc_keyspace {} in config, {} in db".format(
+                job.tlv.hc_keyspace, job.db_hc_keyspace)))
+        groups.setdefault(job.mask_id, []).append(job)
+
+    for group in groups.values():
+        check_ranges(report, group, from_zero)
+
+    return report
+
+
+if __name__ == '__main__':
+    import sys
+
+    if len(sys.argv) != 2:
+        print("usage: python3 workunit_audit.py package_id")
+        sys.exit(2)
+
+    audit = audit_package(int(sys.argv[1]))
+    print(audit)
+    sys.exit(0 if audit.ok else 1)